@@ -0,0 +1,92 @@
+import ctypes
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+from multiprocessing.connection import Connection
+
+# Agent workers are forked from a launcher: a small single-threaded interpreter running this file. Forking it
+# rather than the threaded Flask process means a worker never inherits a lock some request thread was holding,
+# and unlike multiprocessing's spawn and forkserver start methods it never re-imports the server's __main__
+# module (app.py, appTesting.py, ...) in every worker.
+#
+# Wire protocol on the launcher's socket: the server sends one byte with the worker's end of a fresh socket pair
+# attached (SCM_RIGHTS); the launcher forks a worker serving that socket and replies with its pid as 8 bytes.
+# The launcher exits when the server's end of its socket closes.
+
+_PR_SET_PDEATHSIG = 1
+
+_launcher = None # (Popen, socket) of this process's launcher
+_launcher_pid = None # Server process the launcher belongs to, so a forked server starts its own
+_launcher_lock = threading.Lock()
+
+
+def _serve(sock):
+    """Launcher process body: fork one agent worker per request until the server goes away."""
+    import agent_sandbox # Imported once here so every worker starts with it loaded
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN) # Ctrl-C on the server is for the server
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN) # Exited workers are reaped by the kernel
+    while True:
+        try:
+            data, fds, _, _ = socket.recv_fds(sock, 1, 1)
+        except OSError:
+            return
+        if not data:
+            return
+        pid = os.fork()
+        if pid == 0:
+            try:
+                sock.close()
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+                if sys.platform == "linux":
+                    # Die with the launcher, i.e. with the server, even while stuck in an agent's move.
+                    ctypes.CDLL(None).prctl(_PR_SET_PDEATHSIG, signal.SIGKILL)
+                agent_sandbox._agent_worker(Connection(fds[0]))
+            finally:
+                os._exit(0)
+        for fd in fds:
+            os.close(fd)
+        sock.sendall(pid.to_bytes(8, "little"))
+
+
+def _start_launcher():
+    server_sock, launcher_sock = socket.socketpair()
+    with launcher_sock:
+        process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), str(launcher_sock.fileno()), json.dumps(sys.path)],
+            pass_fds=[launcher_sock.fileno()], stdin=subprocess.DEVNULL)
+    return process, server_sock
+
+
+def start_worker():
+    """
+    Fork a sandboxed agent worker (agent_sandbox._agent_worker) from this process's launcher, starting the
+    launcher on first use, after a fork, or if it died. Returns (conn, pid): a multiprocessing Connection
+    to the worker and the worker's pid.
+
+    Raises:
+        OSError: The launcher could not start the worker.
+    """
+    global _launcher, _launcher_pid
+    server_conn, worker_conn = socket.socketpair()
+    with worker_conn, _launcher_lock:
+        if _launcher is None or _launcher_pid != os.getpid() or _launcher[0].poll() is not None:
+            _launcher = _start_launcher()
+            _launcher_pid = os.getpid()
+        sock = _launcher[1]
+        socket.send_fds(sock, [b"w"], [worker_conn.fileno()])
+        reply = sock.recv(8, socket.MSG_WAITALL)
+    if len(reply) != 8:
+        server_conn.close()
+        raise OSError("Agent launcher exited")
+    return Connection(server_conn.detach()), int.from_bytes(reply, "little")
+
+
+if __name__ == "__main__":
+    sys.path[:] = json.loads(sys.argv[2])
+    _serve(socket.socket(fileno=int(sys.argv[1])))
@@ -0,0 +1,82 @@
+import hashlib
+import importlib.util
+import os
+import threading
+from collections import OrderedDict
+
+AGENT_CACHE_SIZE = int(os.getenv("AGENT_CACHE_SIZE", "128")) # Number of agent modules kept loaded
+
+_module_cache = OrderedDict() # absolute path -> (mtime_ns, size, sha256, module), least recently used first
+_cache_lock = threading.Lock()
+
+
+def file_digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _exec_module(path):
+    module_name = os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_module_from_file(filepath):
+    """
+    Import a Python file, reusing the module from an earlier call while the file is unchanged.
+
+    Modules are cached by absolute path and validated against the file's mtime and size, falling back
+    to its sha256 when those change so a touched-but-identical file is not re-imported.
+
+    Raises:
+        FileNotFoundError: The file does not exist.
+    """
+    path = os.path.abspath(filepath)
+    stat = os.stat(path)
+
+    with _cache_lock:
+        entry = _module_cache.get(path)
+        if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            _module_cache.move_to_end(path)
+            return entry[3]
+
+    digest = file_digest(path)
+    if entry and entry[2] == digest:
+        module = entry[3]
+    else:
+        module = _exec_module(path)
+
+    with _cache_lock:
+        _module_cache[path] = (stat.st_mtime_ns, stat.st_size, digest, module)
+        _module_cache.move_to_end(path)
+        while len(_module_cache) > AGENT_CACHE_SIZE:
+            _module_cache.popitem(last=False)
+    return module
+
+
+def load_class_from_file(filepath, class_name):
+    """
+    Dynamically load a class from a file.
+
+    Args:
+        filepath (str): This must be the absolute/relative path of the Python file containing the class.
+        class_name (str): The name of the class to get. Agents have a defined classname in the games dictionary in app.py.
+
+    Raises:
+        FileNotFoundError: The file does not exist.
+        AttributeError: The file does not define class_name.
+    Return:
+        Class : Fetches the class object from the file that we can use and call. This is going to be used mainly for playing the games.
+    """
+    return getattr(load_module_from_file(filepath), class_name)
+
+
+def invalidate_agent_cache(filepath=None):
+    """Drop the cached module for filepath (e.g. after a new upload), or every cached module if no path is given."""
+    with _cache_lock:
+        if filepath is None:
+            _module_cache.clear()
+        else:
+            _module_cache.pop(os.path.abspath(filepath), None)
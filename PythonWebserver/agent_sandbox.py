@@ -0,0 +1,355 @@
+import ctypes
+import json
+import operator
+import os
+import random
+import resource
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+
+from agent_launcher import start_worker
+from agent_loader import file_digest, load_class_from_file
+from games.engine import AgentError, MoveTimeout
+
+AGENT_POOL_SIZE = int(os.getenv("AGENT_POOL_SIZE", "0")) or 2 * (os.cpu_count() or 1) # Idle agent workers kept pre-forked per server process, two per concurrent match
+AGENT_CPU_SECONDS = int(os.getenv("AGENT_CPU_SECONDS", "300")) # CPU seconds an agent worker may use over its whole life
+AGENT_MEMORY_MB = int(os.getenv("AGENT_MEMORY_MB", "1024")) # Address-space limit per agent worker, 0 for unlimited
+AGENT_WORKER_MATCHES = int(os.getenv("AGENT_WORKER_MATCHES", "200")) # Matches a worker serves before it is replaced
+
+_CLONE_NEWUSER = 0x10000000
+_CLONE_NEWNET = 0x40000000
+_RESET_TIMEOUT = 1.0 # Seconds an idle worker gets to acknowledge a reset before it is killed
+
+
+# Wire protocol between the server and its workers. Each frame is one length-prefixed
+# Connection.send_bytes() message holding a compact JSON array [op, payload]:
+#   server -> worker: ["load", [path, class_name, seed, instances]], ["move", [args...]],
+#                     ["moves", [[instance, [args...]], ...]], ["reset", null]
+#   worker -> server: ["ready", null], ["ok", move or [moves...]], ["idle", cpu_seconds], ["error", traceback]
+# JSON rather than pickle so the server never unpickles bytes produced by student code.
+
+def _plain(value):
+    """json.dumps() fallback for agent replies: numpy scalars and arrays (e.g. np.argmax(...)) become ints and lists."""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return operator.index(value) # TypeError for anything else, which the worker reports as an agent error
+
+
+def _send(conn, op, payload=None):
+    conn.send_bytes(json.dumps([op, payload], separators=(",", ":"), default=_plain).encode())
+
+
+def _recv(conn):
+    op, payload = json.loads(conn.recv_bytes())
+    return op, payload
+
+
+def _cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _disable_network():
+    """
+    Move the worker into its own user and network namespace, which has no interfaces but a down loopback.
+    Where namespaces are unavailable (e.g. blocked by a container's seccomp profile) creating
+    internet sockets is refused instead, which stops ordinary library code but not a determined agent.
+    """
+    uid, gid = os.getuid(), os.getgid()
+    try:
+        if hasattr(os, "unshare"):
+            os.unshare(_CLONE_NEWUSER | _CLONE_NEWNET)
+        elif ctypes.CDLL(None, use_errno=True).unshare(_CLONE_NEWUSER | _CLONE_NEWNET) != 0:
+            raise OSError(ctypes.get_errno(), "unshare failed")
+        # Keep the same uid/gid inside the namespace so agent files stay readable.
+        for name, value in (("setgroups", "deny"), ("uid_map", f"{uid} {uid} 1"), ("gid_map", f"{gid} {gid} 1")):
+            with open(f"/proc/self/{name}", "w") as f:
+                f.write(value)
+    except (OSError, AttributeError):
+        pass
+
+    socket_init = socket.socket.__init__
+
+    def no_network_init(self, family=-1, type=-1, proto=-1, fileno=None):
+        if fileno is None and family != socket.AF_UNIX:
+            raise PermissionError("Network access is disabled for agents")
+        socket_init(self, family, type, proto, fileno)
+
+    socket.socket.__init__ = no_network_init
+
+
+def _seed_random(seed):
+    """Seed the random modules an agent may draw from; None reseeds them from the OS."""
+    random.seed(seed)
+    numpy = sys.modules.get("numpy") # Only if some agent already imported it
+    if numpy is not None:
+        numpy.random.seed(seed)
+
+
+def _apply_limits():
+    resource.setrlimit(resource.RLIMIT_CPU, (AGENT_CPU_SECONDS, AGENT_CPU_SECONDS + 5))
+    if AGENT_MEMORY_MB:
+        limit = AGENT_MEMORY_MB * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    # Numeric libraries otherwise start a thread per core, each reserving address space.
+    for name in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[name] = "1"
+    _disable_network()
+
+
+def _agent_worker(conn):
+    """Worker process body: sandbox this process, then serve load/move/moves/reset requests until the pipe closes."""
+    _apply_limits()
+    agents = []
+    while True:
+        try:
+            op, payload = _recv(conn)
+        except EOFError:
+            return
+        try:
+            if op == "load":
+                path, class_name, seed, instances = payload
+                # Modules stay in this process's agent_loader cache, so a warm worker only re-instantiates the class.
+                agent_class = load_class_from_file(path, class_name)
+                _seed_random(seed)
+                agents = [agent_class() for _ in range(instances)]
+                _send(conn, "ready")
+            elif op == "move":
+                _send(conn, "ok", agents[0].move(*payload))
+            elif op == "moves":
+                # One frame for a move in each of many games (see ProcessAgent.move_many).
+                _send(conn, "ok", [agents[instance].move(*args) for instance, args in payload])
+            elif op == "reset":
+                agents = []
+                _send(conn, "idle", _cpu_seconds())
+            else:
+                return
+        except Exception:
+            _send(conn, "error", traceback.format_exc())
+
+
+class AgentWorker:
+    """Server-side handle on one sandboxed worker process."""
+
+    def __init__(self):
+        self.conn, self.pid = start_worker() # Forked by the launcher in agent_launcher.py
+        # Signal through a pidfd where there is one: the launcher reaps exited workers, so the pid could be reused.
+        self._pidfd = None
+        if hasattr(os, "pidfd_open"):
+            try:
+                self._pidfd = os.pidfd_open(self.pid)
+            except ProcessLookupError:
+                self.pid = None # Already exited; the first request sees the closed connection
+        self.agent = None # (path, sha256) of the only agent file this worker may run, None until it loads one
+        self.matches = 0
+
+    def kill(self):
+        self.conn.close()
+        if self.pid is None:
+            return
+        try:
+            if self._pidfd is not None:
+                signal.pidfd_send_signal(self._pidfd, signal.SIGKILL)
+            else:
+                os.kill(self.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        if self._pidfd is not None:
+            os.close(self._pidfd)
+            self._pidfd = None
+        self.pid = None
+
+    def reset(self):
+        """Drop the worker's agent instances; returns False if the worker should be retired instead of reused."""
+        try:
+            _send(self.conn, "reset")
+            if not self.conn.poll(_RESET_TIMEOUT):
+                return False
+            op, cpu_seconds = _recv(self.conn)
+        except (EOFError, OSError, ValueError):
+            return False
+        # Retire well before RLIMIT_CPU so a long match never trips it halfway through.
+        return op == "idle" and cpu_seconds < AGENT_CPU_SECONDS / 2
+
+
+class AgentWorkerPool:
+    """
+    Pre-forked sandboxed agent workers for one server process.
+
+    A worker only ever runs one agent file: once it has imported a student's code, whatever that code patched
+    in the worker (including agent_loader and this module) must not reach another student's agent. acquire()
+    hands out an idle worker already bound to the same path and content hash, so repeated matches for an agent
+    skip the import, or else a fresh worker; a worker bound to another agent is killed and replaced instead.
+    Workers that time out, crash or reach AGENT_WORKER_MATCHES are discarded; at most size idle workers are kept.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._idle = [AgentWorker() for _ in range(size)]
+        self._lock = threading.Lock()
+
+    def acquire(self, agent):
+        """Return a worker for agent, a (path, sha256) pair, binding a fresh worker to it."""
+        worker = stale = None
+        with self._lock:
+            for index in range(len(self._idle) - 1, -1, -1):
+                if self._idle[index].agent == agent:
+                    return self._idle.pop(index)
+            fresh = [index for index, idle in enumerate(self._idle) if idle.agent is None]
+            if fresh:
+                worker = self._idle.pop(fresh[-1])
+            elif self._idle:
+                stale = self._idle.pop(0) # Least recently used
+        if stale is not None:
+            stale.kill()
+        if worker is None:
+            worker = AgentWorker()
+        worker.agent = agent
+        return worker
+
+    def release(self, worker, reusable=True):
+        worker.matches += 1
+        if reusable and worker.matches < AGENT_WORKER_MATCHES and worker.reset():
+            with self._lock:
+                if len(self._idle) < self.size:
+                    self._idle.append(worker)
+                    return
+        worker.kill()
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_worker_pool():
+    """Return this process's agent worker pool, pre-forking it on first use (or after a fork)."""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = AgentWorkerPool(AGENT_POOL_SIZE)
+            _pool_pid = os.getpid()
+        return _pool
+
+
+class ProcessAgent:
+    """
+    Proxy that plays an agent inside a sandboxed worker from the pool so a slow move can be cut off.
+
+    Each move must arrive within move_timeout seconds, and all of the agent's moves (plus loading it)
+    must fit in match_timeout seconds. Running out of either kills the worker and raises
+    games.engine.MoveTimeout; an agent that raises, fails to load or whose worker dies raises
+    games.engine.AgentError. The game engines score both as an illegal move. A None limit is unbounded.
+    The worker's random module (and numpy's, if loaded) is seeded with seed before the agent is created.
+    With instances > 1 the worker holds that many agent instances, one per game of a batch (see move_many()).
+    close() hands a healthy worker back to the pool with the agent's module still imported; only this agent
+    file, unchanged, is ever run in that worker again.
+    """
+
+    def __init__(self, filepath, class_name, move_timeout=None, match_timeout=None, seed=None, instances=1):
+        if not filepath:
+            raise FileNotFoundError("Agent file path is missing.")
+        full_path = os.path.abspath(filepath)
+        if not os.path.exists(full_path):
+            raise FileNotFoundError(f"Agent file not found: {full_path}")
+
+        self.filepath = full_path
+        self.digest = file_digest(full_path)
+        self.class_name = class_name
+        self.move_timeout = move_timeout
+        self.match_timeout = match_timeout
+        self.seed = seed
+        self.instances = instances
+        self._pool = get_worker_pool()
+        self._start()
+
+    def _start(self):
+        self.time_left = self.match_timeout
+        self._worker = self._pool.acquire((self.filepath, self.digest))
+        _send(self._worker.conn, "load", [self.filepath, self.class_name, self.seed, self.instances])
+        self._loading = True # The worker's reply to "load" has not been read yet
+        self._healthy = True
+
+    def new_game(self, seed=None):
+        """
+        Start a fresh agent instance with a full match budget, e.g. for the next game of a series, seeded with seed.
+        The worker goes back to the pool and is normally handed straight back, with the module still imported.
+        """
+        self.close()
+        self.seed = seed
+        self._start()
+
+    def _receive(self, timeout):
+        """Wait for the worker's reply, charging the wait to the match budget."""
+        conn = self._worker.conn
+        started = time.monotonic()
+        arrived = conn.poll(timeout)
+        if self.time_left is not None:
+            self.time_left -= time.monotonic() - started
+        if not arrived:
+            self._healthy = False
+            self.close()
+            raise MoveTimeout(f"{self.class_name} exceeded its time limit")
+        try:
+            op, value = _recv(conn)
+        except (EOFError, OSError, ValueError):
+            self._healthy = False
+            self.close()
+            raise AgentError(f"{self.class_name} worker exited unexpectedly")
+        if op == "error":
+            self.close()
+            raise AgentError(value)
+        return value
+
+    def _timeout(self, include_move_limit=True, moves=1):
+        limits = [self.time_left] if self.time_left is not None else []
+        if include_move_limit and self.move_timeout is not None:
+            limits.append(self.move_timeout * moves)
+        return max(0, min(limits)) if limits else None
+
+    def _request(self, op, payload, moves=1):
+        if self._worker is None:
+            raise MoveTimeout(f"{self.class_name} is no longer running")
+        if self._loading:
+            # Loading the agent only counts against the match budget.
+            self._loading = False
+            self._receive(self._timeout(include_move_limit=False))
+        _send(self._worker.conn, op, payload)
+        return self._receive(self._timeout(moves=moves))
+
+    def move(self, *args):
+        return self._request("move", list(args))
+
+    def move_many(self, calls):
+        """
+        Ask several agent instances for a move in a single round trip: calls is a list of (instance, args) pairs
+        and the moves come back in the same order. The batch may take move_timeout per move in it.
+        """
+        if not calls:
+            return []
+        return self._request("moves", [[instance, list(args)] for instance, args in calls], moves=len(calls))
+
+    def close(self):
+        """Give the worker back to the pool (or kill it after a timeout). Safe to call more than once."""
+        if self._worker is None:
+            return
+        worker, self._worker = self._worker, None
+        if self._healthy and self._loading:
+            # Never asked for a move: wait briefly for the load reply so the worker is in a known state.
+            self._healthy = worker.conn.poll(_RESET_TIMEOUT)
+            if self._healthy:
+                try:
+                    self._healthy = _recv(worker.conn)[0] == "ready"
+                except (EOFError, OSError, ValueError):
+                    self._healthy = False
+        self._pool.release(worker, reusable=self._healthy)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,19 +1,34 @@
 from flask import Flask, request, jsonify, session
 from flask_cors import CORS
-import importlib.util
-import psycopg2
 from psycopg2 import errors
-from psycopg2.extras import execute_batch
+from psycopg2.extras import execute_batch, execute_values
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 import bcrypt
 import os
 import random
 import json
+import ast
+import base64
+import binascii
+import hashlib
+from datetime import datetime
+from agent_loader import invalidate_agent_cache
+from agent_sandbox import AGENT_CPU_SECONDS, ProcessAgent
+from db import db_connection, get_db_connection, release_db_connection
+from jobs import job_handler, enqueue_job, find_active_job, fetch_job, wake_job_workers, start_job_workers
+from tournament_pairings import TOURNAMENT_FORMATS, round_robin_schedule, swiss_pairings, swiss_round_count
+from ratings import update_ratings, recompute_ratings
+from replay import replay_actions
+from games.engine import agent_seed, new_seed
+from batch_sim import BATCH_MAX_GAMES, BATCH_TIME_LIMIT, simulate, supports_batch
 
 app = Flask(__name__)
 CORS(app, origins=["http://localhost:3000", "http://127.0.0.1:3000", "http://100.112.255.106:3000"], supports_credentials=True)
 app.secret_key = os.getenv("SECRET_KEY", "your-secret-key")  # Use a strong secret in production
 
-DB_URL = os.getenv("DATABASE_URL") # Setup the DB url in a .env
+TOURNAMENT_WORKERS = int(os.getenv("TOURNAMENT_WORKERS", "0")) or os.cpu_count() or 1 # Matches of a round played at once
+LEAGUE_POINTS = {"win": 3, "draw": 1, "loss": 0} # Round-robin and Swiss scoring; knockouts keep +1/-1
 
 games = {
     "conn4": {
@@ -24,17 +39,22 @@ games = {
         ],
         "gamesize" : 2, # Number of players
         "agent": "C4Agent",
-        "mode": "move" # The agent name for every student.
+        "mode": "move", # The agent name for every student.
+        "time_limits": {"move": 2.0, "match": 30.0}, # Seconds per move / for all of an agent's moves in a match
+        "series": 4 # Games per tournament pairing, seats swapped every game
     },
     "tictactoe": {
        "module" : "games.tictactoe.game",
        "tests": [
            ("firstavail.py", "FirstAvailableAgent"),
-           ("random.py", "RandomAgent") 
+           ("random.py", "RandomAgent"),
+           ("perfect.py", "PerfectAgent")
        ],
        "gamesize" : 2, # Number of players
        "agent" : "TTTAgent",
-       "mode" : "move"
+       "mode" : "move",
+       "time_limits": {"move": 1.0, "match": 5.0},
+       "series": 2
     },
     "rps": {
         "module": "games.rps.game",
@@ -44,13 +64,12 @@ games = {
         ],
        "gamesize" : 2, # Number of players
         "agent": "RPSAgent",
-        "mode": "round"
+        "mode": "round",
+        "time_limits": {"move": 1.0, "match": 5.0},
+        "series": 1 # One game is already many rounds
     }
 }
 
-def get_db_connection():
-    return psycopg2.connect(DB_URL)
-    
 def fetch_agents(groupname, game):
     """
     Fetch the list of all agents in the database for a specific group and game.
@@ -65,27 +84,25 @@ def fetch_agents(groupname, game):
     Returns:
         List : List that each contain a dictionary that has three keys: agent_id, name, and file_path for each agent.
     """
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT a.agent_id, a.name, a.file_path
-        FROM agents a
-        JOIN groups g ON a.group_id = g.group_id
-        WHERE g.groupname = %s
-          AND a.game = %s ;
-    """, (groupname, game))
-    agents = cur.fetchall()
-    cur.close()
-    conn.close()
+    with db_connection() as conn, conn.cursor() as cur:
+        cur.execute("""
+            SELECT a.agent_id, a.name, a.file_path
+            FROM agents a
+            JOIN groups g ON a.group_id = g.group_id
+            WHERE g.groupname = %s
+              AND a.game = %s ;
+        """, (groupname, game))
+        agents = cur.fetchall()
     return [{"agent_id": row[0], "name": row[1], "file_path": row[2]} for row in agents]
 
-def fetch_latest_agent(groupname, game):
+def fetch_latest_agent(groupname, game, cur=None):
     """
     Fetch only the latest agents from the specified group for a specific game.
     
     Args:
         groupname (str)
         game (str) : ID of the game, this must be one of the valid games in the games dict defined above
+        cur (cursor, optional) : Reuse an open cursor instead of checking out a pooled connection
         
     Raises:
         #TODO: Write error checking code for this function.
@@ -93,9 +110,11 @@ def fetch_latest_agent(groupname, game):
     Returns:
        Dict : Return a single dictionary that contains the agent_id, name, and file_path information 
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("""           
+    if cur is None:
+        with db_connection() as conn, conn.cursor() as cur:
+            return fetch_latest_agent(groupname, game, cur)
+
+    cur.execute("""           
         SELECT a.agent_id, a.name, a.file_path
         FROM agents a
         JOIN groups g ON a.group_id = g.group_id
@@ -104,9 +123,7 @@ def fetch_latest_agent(groupname, game):
         ORDER BY a.created_at DESC 
         LIMIT 1
     """, (groupname, game))
-    row = cursor.fetchone()
-    cursor.close()
-    conn.close()
+    row = cur.fetchone()
     if row:
         return {"agent_id": row[0], "name": row[1], "file_path": row[2]}
     return None
@@ -168,20 +185,64 @@ def resolve_agent_path(game, groupname, file_path):
     return file_path
 
 
-def load_agent_class(filepath, class_name):
-    """Import the agent class from a concrete file path, raising if the file is missing."""
-    if not filepath:
-        raise FileNotFoundError("Agent file path is missing.")
+def start_agent(game, filepath, class_name, seed=None, instances=1, max_match_time=None):
+    """Launch an agent in its own killable worker process, bounded by the game's time_limits.
+    seed seeds the worker's random module before the agent is created (see games.engine.agent_seed).
+    With instances > 1 the worker plays that many games at once and gets a match budget for each,
+    but never more than max_match_time seconds in total when that is given.
+
+    Raises:
+        FileNotFoundError: The agent file path is missing or does not exist.
+    """
+    limits = games[game].get("time_limits", {})
+    match_timeout = limits.get("match") * instances if limits.get("match") is not None else None
+    if max_match_time is not None:
+        match_timeout = max_match_time if match_timeout is None else min(match_timeout, max_match_time)
+    return ProcessAgent(
+        filepath, class_name, move_timeout=limits.get("move"), match_timeout=match_timeout, seed=seed, instances=instances
+    )
+
+
+def start_agents(game, specs):
+    """start_agent() for every (filepath, class_name, seed) in specs. If one of them fails to start, the workers
+    already started are closed before the error propagates, so none of them leaks out of the pool."""
+    with ExitStack() as stack:
+        agents = [stack.enter_context(start_agent(game, filepath, class_name, seed)) for filepath, class_name, seed in specs]
+        stack.pop_all() # Every agent started: the caller closes them from here on
+    return agents
+
+
+def play_and_close(game_instance):
+    """Play a game whose agents came from start_agent, stopping their worker processes afterwards."""
+    try:
+        return game_instance.play()
+    finally:
+        for agent in game_instance.agents:
+            agent.close()
+
 
-    full_path = os.path.abspath(filepath)
-    if not os.path.exists(full_path):
-        raise FileNotFoundError(f"Agent file not found: {full_path}")
+def replay_contest_actions(game, seed, moves):
+    """Rebuild a game's actions from its seed and move log, see replay.replay_actions."""
+    game_module = __import__(games[game]["module"], fromlist=["Game"])
+    return replay_actions(getattr(game_module, "Game"), seed, moves)
 
-    return load_class_from_file(full_path, class_name)
+
+def parse_board_state(board_state):
+    """The board of a legacy contest_actions row, stored as its str(); text that is not a literal is returned as-is."""
+    try:
+        return ast.literal_eval(board_state)
+    except (ValueError, SyntaxError):
+        return board_state
 
 
 def play_agents_match(agent1_info, agent2_info, game):
-    """Execute a single game between two latest agents and return normalized scoring metadata.
+    """Play a best-of-N series between two latest agents and return normalized scoring metadata.
+
+    N is the game's "series" entry (default 1). Seats are swapped after every game, and the series stops as
+    soon as the games left cannot change the winner. The whole series runs in one call with the same two
+    agent proxies, so each agent's module is imported once and only its instance is recreated per game.
+    The agent with more game wins takes the series; equal wins is a draw. Every game gets its own seed,
+    kept with its result so the game can be replayed.
 
     Note:
         Reusing the higher-level endpoint helper would require extra lookups/mocking that
@@ -194,50 +255,81 @@ def play_agents_match(agent1_info, agent2_info, game):
     game_module = __import__(game_info["module"], fromlist=["Game"])
     GameClass = getattr(game_module, "Game")
     agent_class_name = game_info["agent"]
+    series_length = game_info.get("series", 1)
 
     agent1_path = resolve_agent_path(game, agent1_info["groupname"], agent1_info["file_path"])
     agent2_path = resolve_agent_path(game, agent2_info["groupname"], agent2_info["file_path"])
 
-    Agent1Class = load_agent_class(agent1_path, agent_class_name)
-    Agent2Class = load_agent_class(agent2_path, agent_class_name)
-
-    game_instance = GameClass([Agent1Class(), Agent2Class()])
-
-    result_payload = game_instance.play()
+    seed = new_seed()
+    agents = [start_agent(game, agent1_path, agent_class_name, agent_seed(seed, 0))]
+    try:
+        agents.append(start_agent(game, agent2_path, agent_class_name, agent_seed(seed, 1)))
+        wins = [0, 0]
+        game_results = []
+        for game_number in range(series_length):
+            seats = (0, 1) if game_number % 2 == 0 else (1, 0) # seats[i] is the series agent sitting at engine index i
+            if game_number:
+                seed = new_seed()
+                for index, seat in enumerate(seats):
+                    agents[seat].new_game(agent_seed(seed, index))
+            game_instance = GameClass([agents[seat] for seat in seats], seed=seed)
+            result_payload = game_instance.play()
+            if isinstance(result_payload, (list, tuple)) and result_payload and result_payload[0] in (0, 1):
+                wins[seats[result_payload[0]]] += 1
+            else:
+                # Unsupported result types are treated as draw for safety.
+                result_payload = None
+            game_results.append({
+                "seats": list(seats),
+                "raw_winner": result_payload,
+                "seed": seed,
+                "moves": game_instance.move_log,
+            })
+            if abs(wins[0] - wins[1]) > series_length - len(game_results):
+                break
+    finally:
+        for agent in agents:
+            agent.close()
 
     winner_agent_id = None
-    agent1_score = 0
-    agent2_score = 0
     result_key = "draw"
     winner_label = "Draw"
-
-    if isinstance(result_payload, (list, tuple)) and result_payload:
-        winner_index = result_payload[0]
-        if winner_index in (0, 1):
-            if winner_index == 0:
-                winner_agent_id = agent1_info["agent_id"]
-                agent1_score, agent2_score = 1, 0
-                result_key = "agent1"
-                winner_label = agent1_info["agent_name"]
-            else:
-                winner_agent_id = agent2_info["agent_id"]
-                agent1_score, agent2_score = 0, 1
-                result_key = "agent2"
-                winner_label = agent2_info["agent_name"]
-    else:
-        # Unsupported result types are treated as draw for safety.
-        result_payload = None
+    series_winner = None
+
+    if wins[0] > wins[1]:
+        winner_agent_id = agent1_info["agent_id"]
+        result_key = "agent1"
+        winner_label = agent1_info["agent_name"]
+        series_winner = [0, 1]
+    elif wins[1] > wins[0]:
+        winner_agent_id = agent2_info["agent_id"]
+        result_key = "agent2"
+        winner_label = agent2_info["agent_name"]
+        series_winner = [1, 0]
 
     return {
         "winner_agent_id": winner_agent_id,
-        "agent1_score": agent1_score,
-        "agent2_score": agent2_score,
+        "agent1_score": wins[0],
+        "agent2_score": wins[1],
         "result": result_key,
         "winner_label": winner_label,
-        "raw_winner": result_payload, # Preserve engine-native outcome for debugging/audit trails.
+        "raw_winner": series_winner if series_length > 1 else game_results[0]["raw_winner"], # Preserve engine-native outcome for debugging/audit trails.
+        "games": game_results,
     }
 
 
+def play_round_matches(executor, pairings, game):
+    """Play a round's independent (agent1, agent2) pairings across the executor.
+
+    Results are returned in the same order as pairings so the bracket is persisted deterministically.
+    """
+    if not pairings:
+        return []
+    agent1s = [agent1 for agent1, _ in pairings]
+    agent2s = [agent2 for _, agent2 in pairings]
+    return list(executor.map(play_agents_match, agent1s, agent2s, [game] * len(pairings)))
+
+
 def initialize_tournament_standings(cur, tournament_id, agents):
     """Seed standing rows (DB + in-memory) with zero points for all participating agents."""
     if not agents:
@@ -248,8 +340,7 @@ def initialize_tournament_standings(cur, tournament_id, agents):
         """
         INSERT INTO tournament_standings (tournament_id, agent_id, points, rounds_played)
         VALUES (%s, %s, 0, 0)
-        ON CONFLICT (tournament_id, agent_id)
-        DO UPDATE SET points = EXCLUDED.points, rounds_played = EXCLUDED.rounds_played;
+        ON CONFLICT (tournament_id, agent_id) DO NOTHING;
         """,
         [(tournament_id, agent["agent_id"]) for agent in agents],
     )
@@ -268,26 +359,70 @@ def initialize_tournament_standings(cur, tournament_id, agents):
     }
 
 
-def update_standing(cur, standings, tournament_id, agent_id, points_increment, opponent_id=None):
-    """Apply a point delta for an agent, tracking rounds-played and opponent history."""
+def load_tournament_standings(cur, tournament_id):
+    """Read back the participants and standings of a tournament that was already started, e.g. to resume it."""
+    cur.execute(
+        """
+        SELECT ts.agent_id, a.group_id, g.groupname, a.name, a.file_path, ts.points, ts.rounds_played
+        FROM tournament_standings ts
+        JOIN agents a ON ts.agent_id = a.agent_id
+        JOIN groups g ON a.group_id = g.group_id
+        WHERE ts.tournament_id = %s
+        ORDER BY a.group_id
+        """,
+        (tournament_id,),
+    )
+    return {
+        row[0]: {
+            "agent_id": row[0],
+            "group_id": row[1],
+            "groupname": row[2],
+            "agent_name": row[3],
+            "file_path": row[4],
+            "points": row[5] or 0,
+            "rounds_played": row[6] or 0,
+        }
+        for row in cur.fetchall()
+    }
+
+
+def update_standing(standings, deltas, agent_id, points_increment, opponent_id=None):
+    """Apply a point delta for an agent, tracking rounds-played and opponent history.
+
+    Only the in-memory standings change here; the delta is accumulated in deltas (agent_id -> [points, rounds])
+    and written for the whole round by flush_standings().
+    """
     entry = standings[agent_id]
     increment = int(points_increment)
     entry["points"] += increment
     entry["rounds_played"] += 1
-    cur.execute(
+    delta = deltas.setdefault(agent_id, [0, 0])
+    delta[0] += increment
+    delta[1] += 1
+
+
+def flush_standings(cur, tournament_id, deltas):
+    """Write a round's accumulated standing deltas with a single UPDATE ... FROM (VALUES ...), then clear them."""
+    if not deltas:
+        return
+    execute_values(
+        cur,
         """
-        UPDATE tournament_standings
-        SET points = points + %s,
-            rounds_played = rounds_played + 1,
+        UPDATE tournament_standings AS ts
+        SET points = ts.points + d.points,
+            rounds_played = ts.rounds_played + d.rounds,
             last_updated = CURRENT_TIMESTAMP
-        WHERE tournament_id = %s AND agent_id = %s
+        FROM (VALUES %s) AS d (tournament_id, agent_id, points, rounds)
+        WHERE ts.tournament_id = d.tournament_id AND ts.agent_id = d.agent_id
         """,
-        (increment, tournament_id, agent_id),
+        [(tournament_id, agent_id, points, rounds) for agent_id, (points, rounds) in deltas.items()],
+        page_size=len(deltas),
     )
+    deltas.clear()
 
 
-def record_tournament_match(cur, tournament_id, round_id, round_number, agent1, agent2, match_result):
-    """Persist the outcome of a tournament match, including metadata used by the UI."""
+def record_tournament_match(pending_matches, tournament_id, round_id, round_number, agent1, agent2, match_result):
+    """Queue the outcome of a tournament match, including metadata used by the UI, for flush_tournament_matches()."""
     raw_winner = match_result.get("raw_winner")
     normalized_winner = match_result.get("result")
 
@@ -319,6 +454,8 @@ def record_tournament_match(cur, tournament_id, round_id, round_number, agent1,
     else:
         metadata["agent2"] = None
 
+    if "games" in match_result:
+        metadata["games"] = match_result["games"]  # Per-game seats and outcomes of a best-of-N series.
     if "decision" in match_result:
         metadata["decision"] = match_result["decision"]  # Indicates whether advancement was regulation, bye, or tiebreak.
     if "advancing_agent_id" in match_result:
@@ -329,7 +466,28 @@ def record_tournament_match(cur, tournament_id, round_id, round_number, agent1,
             advancing_agent = agent2
         metadata["advancing_agent_name"] = advancing_agent["agent_name"]
 
-    cur.execute(
+    pending_matches.append(
+        (
+            tournament_id,
+            round_id,
+            round_number,
+            agent1["agent_id"],
+            agent2_id,
+            match_result["agent1_score"],
+            agent2_score,
+            match_result["result"],
+            match_result["winner_agent_id"],
+            json.dumps(metadata),
+        )
+    )
+
+
+def flush_tournament_matches(cur, pending_matches):
+    """Insert every queued tournament match with one multi-row INSERT, then clear the queue."""
+    if not pending_matches:
+        return
+    execute_values(
+        cur,
         """
         INSERT INTO tournament_matches (
             tournament_id,
@@ -343,50 +501,23 @@ def record_tournament_match(cur, tournament_id, round_id, round_number, agent1,
             winner_agent_id,
             metadata
         )
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        RETURNING tournament_match_id
+        VALUES %s
         """,
-        (
-            tournament_id,
-            round_id,
-            round_number,
-            agent1["agent_id"],
-            agent2_id,
-            match_result["agent1_score"],
-            agent2_score,
-            match_result["result"],
-            match_result["winner_agent_id"],
-            json.dumps(metadata),
-        ),
+        pending_matches,
+        page_size=len(pending_matches),
     )
-    return cur.fetchone()[0]
+    pending_matches.clear()
 
 # ------ Tournament Functions Above ------ #
 
-def load_class_from_file(filepath, class_name):
-    """
-    Dynamically load a class from a file.
-    
-    Args: 
-        filepath (str): This must be the absolute/relative path of the Python file containing the class.
-        class_name (str): The name of the class to get. Agents have a defined classname in the games dictionary above.
-    
-    Raises:
-        TODO: Write extra testing code, what if the file isn't there?
-    Return: 
-        Class : Fetches the class object from the file that we can use and call. This is going to be used mainly for playing the games.
-    """
-    module_name = os.path.splitext(os.path.basename(filepath))[0]
-    spec = importlib.util.spec_from_file_location(module_name, filepath)
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    return getattr(module, class_name)
-
-
-def run_tests_on_group(groupname, game):
+def run_tests_on_group(groupname, game, game_count=1):
     """
     Run test games for a group's latest agent against test agents.
     Supports both move-based (mode='move') and round-based (mode='round') games.
+
+    With game_count > 1, test agents that batch_sim can simulate are played game_count times in lockstep
+    instead, and their match reports win-rate "stats" rather than one game's actions. Other test agents
+    still play a single game.
     """
     if game not in games:
         raise ValueError(f"Game '{game}' not found in configuration.")
@@ -399,16 +530,32 @@ def run_tests_on_group(groupname, game):
 
     results = {"group": groupname, "agent": group_agent["name"], "matches": []}
 
-    GroupAgentClass = load_class_from_file(group_agent["file_path"], game_info["agent"])
     group_agent_name = group_agent["name"]
 
     for test_file, test_class in game_info["tests"]:
         test_path = os.path.join("games", game, "agents", "test", test_file)
-        TestAgentClass = load_class_from_file(test_path, test_class)
         test_agent_name = test_class
 
-        # instantiate game with list of agents
-        game_instance = GameClass([GroupAgentClass(), TestAgentClass()])
+        if game_count > 1 and supports_batch(game, test_class):
+            # One worker holds an agent instance per game and answers each ply's moves in a single round trip.
+            # The pool only hands out workers with at least half of AGENT_CPU_SECONDS left, and the agent cannot use
+            # more CPU than the batch's wall-clock budget, so a slow agent forfeits its remaining games on time
+            # instead of being killed by RLIMIT_CPU, and the request stays bounded.
+            seed = new_seed()
+            budget = min(BATCH_TIME_LIMIT, AGENT_CPU_SECONDS / 2)
+            with start_agent(
+                game, group_agent["file_path"], game_info["agent"], agent_seed(seed, 0),
+                instances=game_count, max_match_time=budget,
+            ) as agent:
+                stats = simulate(game, test_class, agent, game_count, seed)
+            results["matches"].append({"test_agent": test_agent_name, "stats": stats})
+            continue
+
+        # instantiate game with list of agents, each running in its own time-limited process
+        game_instance = GameClass(start_agents(game, [
+            (group_agent["file_path"], game_info["agent"], None),
+            (test_path, test_class, None),
+        ]))
 
         actions = []
 
@@ -427,11 +574,11 @@ def run_tests_on_group(groupname, game):
             for idx, agent in enumerate(game_instance.agents):
                 agent.move = make_wrapper(idx, original_moves[idx])
 
-            result = game_instance.play()
+            result = play_and_close(game_instance)
 
         else:  # round-based
             # run play which should populate a logs/round_logs attribute or return logs
-            result = game_instance.play()
+            result = play_and_close(game_instance)
             # Attempt to extract round logs
             if hasattr(game_instance, "round_logs"):
                 for i, r in enumerate(game_instance.round_logs):
@@ -467,21 +614,19 @@ def run_group_vs_group(groups, game):
     GameClass = getattr(__import__(game_info["module"], fromlist=["Game"]), "Game")
 
     agents_data = []
-    for group in groups:
-        agent = fetch_latest_agent(group, game)
-        if not agent:
-            return {"error": f"No agent found for group: {group}"}
-        agents_data.append(agent)
+    with db_connection() as conn, conn.cursor() as cur:
+        for group in groups:
+            agent = fetch_latest_agent(group, game, cur)
+            if not agent:
+                return {"error": f"No agent found for group: {group}"}
+            agents_data.append(agent)
 
     mode = game_info.get("mode", "move")
     if len(agents_data) != game_info.get("gamesize", 2):
         return {"error": f"Game '{game}' requires {game_info.get('gamesize',2)} players"}
 
     # load agent classes and instances
-    agent_instances = []
-    for ad in agents_data:
-        AgentClass = load_class_from_file(ad["file_path"], game_info["agent"])
-        agent_instances.append(AgentClass())
+    agent_instances = start_agents(game, [(ad["file_path"], game_info["agent"], None) for ad in agents_data])
 
     game_instance = GameClass(agent_instances)
     actions = []
@@ -497,9 +642,9 @@ def run_group_vs_group(groups, game):
             return wrap
         for idx,a in enumerate(agent_instances):
             a.move = make_wrap(idx, orig_moves[idx])
-        result = game_instance.play()
+        result = play_and_close(game_instance)
     else:
-        result = game_instance.play()
+        result = play_and_close(game_instance)
         if hasattr(game_instance, "round_logs"):
             for i,r in enumerate(game_instance.round_logs):
                 actions.append({"round_number": i+1, "action": str(r), "board_state": None})
@@ -590,7 +735,7 @@ def assign_group():
         return jsonify({"error": str(e)}), 500
     finally:
         if conn:
-            conn.close()
+            release_db_connection(conn)
 
 @app.route("/agents/upload/<game>", methods=["POST"])
 def upload_agent(game):
@@ -635,6 +780,7 @@ def upload_agent(game):
     if not file.filename.endswith(".py"):
         return {"error": "Only .py files allowed"}, 400
     
+    conn = None
     try:
         conn = get_db_connection()
         cur = conn.cursor()
@@ -647,6 +793,7 @@ def upload_agent(game):
 
         save_path = os.path.join(path, file.filename)
         file.save(save_path)
+        invalidate_agent_cache(save_path) # Re-uploads can reuse a file name, so never serve the old class.
         
         cur.execute(
             """
@@ -679,7 +826,7 @@ def upload_agent(game):
 
     finally:
         if conn:
-            conn.close()
+            release_db_connection(conn)
     
 
 @app.route("/agents/<groupname>/<game>", methods=["GET"])
@@ -694,8 +841,19 @@ def get_agents(groupname, game):
 
 @app.route("/play/run_tests/<groupname>/<game>", methods=["GET"])
 def play_group_vs_tests(groupname, game):
+    """
+    Play a group's latest agent against the game's test agents.
+
+    Query parameters:
+        games (int): Games per test agent (default 1, at most BATCH_MAX_GAMES). Above 1, test agents with a
+            vectorized version in batch_sim report win-rate statistics over that many games.
+    """
+    try:
+        game_count = max(1, min(int(request.args.get("games", 1)), BATCH_MAX_GAMES))
+    except ValueError:
+        return jsonify({"error": "games must be an integer"}), 400
     try:
-        results = run_tests_on_group(groupname, game)
+        results = run_tests_on_group(groupname, game, game_count)
         return jsonify(results)
     except Exception as e:
         import traceback
@@ -786,7 +944,7 @@ def register():
     
     finally:
         if conn:
-            conn.close()
+            release_db_connection(conn)
         
 @app.route("/api/logout", methods=["POST"])
 def logout():
@@ -814,6 +972,7 @@ def create_group():
     if not groupname:
         return jsonify({"error": "Group name required"}), 400
     
+    conn = None
     try:
         conn = get_db_connection()
         cur = conn.cursor()
@@ -846,7 +1005,7 @@ def create_group():
     
     finally:
         if conn:
-            conn.close()
+            release_db_connection(conn)
     
 
 @app.route("/api/me", methods=["GET"])
@@ -898,7 +1057,7 @@ def me():
         })
     finally:
         if conn:
-            conn.close()
+            release_db_connection(conn)
 
 @app.route("/api/login", methods=["POST"])
 def login():
@@ -974,7 +1133,7 @@ def login():
         return jsonify({"error": str(e)}), 500
     finally:
         if conn:
-            conn.close()
+            release_db_connection(conn)
             
 @app.route("/api/users", methods=["GET"])
 def get_users():
@@ -1013,7 +1172,7 @@ def get_users():
         return jsonify({"error": str(e)}), 500
     finally:
         if conn:
-            conn.close()
+            release_db_connection(conn)
             
 @app.route("/api/groups", methods=["GET"])
 def get_groups():
@@ -1054,7 +1213,7 @@ def get_groups():
         return jsonify({"error": str(e)}), 500
     finally:
         if conn:
-            conn.close()
+            release_db_connection(conn)
             
 @app.route("/api/user/agents", methods=["GET"])
 def get_user_agents():
@@ -1120,7 +1279,7 @@ def get_user_agents():
         return jsonify({"error": str(e)}), 500
     finally:
         if conn:
-            conn.close()
+            release_db_connection(conn)
             
 @app.route("/api/admin/agents", methods=["GET"])
 def get_all_agents():
@@ -1180,7 +1339,7 @@ def get_all_agents():
         return jsonify({"error": str(e)}), 500
     finally:
         if conn:
-            conn.close()
+            release_db_connection(conn)
 
 
 # ==================== CONTEST MANAGEMENT ENDPOINTS (FR3.x) ====================
@@ -1275,27 +1434,133 @@ def create_contest():
         return jsonify({"error": str(e)}), 500
     finally:
         if conn:
-            conn.close()
+            release_db_connection(conn)
 
 
-@app.route("/api/contests/<int:contest_id>/run", methods=["POST"])
-def run_contest(contest_id):
+@job_handler("contest")
+def execute_contest(payload, progress):
     """
+    Job handler for queued contests.
     FR3.3: Execute a contest and track all actions throughout the match.
     FR3.4: Update win/loss records for participating agents.
+
+    The contest is claimed (status 'running') and committed before the game starts, and the game is played without
+    holding a database connection. The result, records and ratings are then written in one short transaction,
+    but only by the run that moves the contest from 'running' to 'completed', so a contest queued twice (or run again
+    after its worker died) is only ever counted once. A game that raises puts the contest back to 'pending'.
+
+    Raises:
+        ValueError: The contest does not exist, is already completed, or its game is not configured.
+    """
+    contest_id = payload["contest_id"]
+    with db_connection() as conn, conn.cursor() as cur:
+        cur.execute("""
+            UPDATE contests c
+            SET status = 'running'
+            FROM agents a1, agents a2
+            WHERE c.contest_id = %s AND c.status <> 'completed'
+              AND a1.agent_id = c.agent1_id AND a2.agent_id = c.agent2_id
+            RETURNING c.game, c.agent1_id, c.agent2_id, a1.file_path as agent1_path, a2.file_path as agent2_path
+        """, (contest_id,))
+
+        contest = cur.fetchone()
+        if not contest:
+            cur.execute("SELECT 1 FROM contests WHERE contest_id = %s", (contest_id,))
+            raise ValueError("Contest already completed" if cur.fetchone() else "Contest not found")
+
+        game, agent1_id, agent2_id, agent1_path, agent2_path = contest
+
+        if game not in games:
+            raise ValueError(f"Game '{game}' not found in configuration") # Rolled back: the contest stays unclaimed
+        conn.commit()
+
+    game_info = games[game]
+
+    try:
+        # Load game module and agent classes
+        game_module = __import__(game_info["module"], fromlist=["Game"])
+        GameClass = getattr(game_module, "Game")
+
+        agent_class_name = game_info["agent"]
+
+        # Create agent instances, each running in its own time-limited process
+        seed = new_seed()
+        agent_instances = start_agents(game, [
+            (agent1_path, agent_class_name, agent_seed(seed, 0)),
+            (agent2_path, agent_class_name, agent_seed(seed, 1)),
+        ])
+
+        # Create game instance with NEW format (list of agents)
+        agent_ids = [agent1_id, agent2_id]
+        game_instance = GameClass(agent_instances, seed=seed)
+
+        # Run the game with NEW return format. The seed and game_instance.move_log are all that is
+        # stored of the action history (FR3.3): positions are rebuilt on read by replaying them.
+        result = play_and_close(game_instance)
+    except Exception:
+        with db_connection() as conn, conn.cursor() as cur:
+            cur.execute("UPDATE contests SET status = 'pending' WHERE contest_id = %s AND status = 'running'", (contest_id,))
+            conn.commit()
+        raise
+
+    # Determine winner from NEW format
+    # result is [winner_index, loser_index] or None for draw
+    winner_id = None
+
+    if result is not None:
+        winner_index = result[0]
+        winner_id = agent_ids[winner_index]
+    # If result is None, it's a draw (winner_id stays None)
+
+    with db_connection() as conn, conn.cursor() as cur:
+        # Update contest status and save its action history (FR3.3) in the same row.
+        cur.execute("""
+            UPDATE contests
+            SET status = 'completed', winner_id = %s, completed_at = CURRENT_TIMESTAMP,
+                seed = %s, moves = %s
+            WHERE contest_id = %s AND status = 'running'
+        """, (winner_id, seed, json.dumps(game_instance.move_log), contest_id))
+        if cur.rowcount == 0:
+            raise ValueError("Contest already completed") # Another run recorded its result first
+
+        # Update agent records (FR3.4): create-or-increment both records in one statement.
+        if winner_id:
+            loser_id = agent2_id if winner_id == agent1_id else agent1_id
+            record_deltas = [(winner_id, 1, 0, 0), (loser_id, 0, 1, 0)]
+        else:
+            # It's a draw
+            record_deltas = [(agent1_id, 0, 0, 1), (agent2_id, 0, 0, 1)]
+        execute_values(
+            cur,
+            """
+            INSERT INTO agent_records (agent_id, wins, losses, draws)
+            VALUES %s
+            ON CONFLICT (agent_id) DO UPDATE
+            SET wins = agent_records.wins + EXCLUDED.wins,
+                losses = agent_records.losses + EXCLUDED.losses,
+                draws = agent_records.draws + EXCLUDED.draws
+            """,
+            record_deltas,
+        )
+        update_ratings(cur, [(agent1_id, agent2_id, 1.0 if winner_id == agent1_id else 0.0 if winner_id else 0.5)])
+
+        conn.commit()
+
+    progress(1, 1)
+    return {"contest_id": contest_id, "winner_id": winner_id, "moves": len(game_instance.move_log)}
+
+
+@app.route("/api/contests/<int:contest_id>/run", methods=["POST"])
+def run_contest(contest_id):
+    """
+    Queue a contest for execution by a background job (see execute_contest).
+    Poll GET /api/jobs/<job_id> for its status; a contest that is already queued returns the existing job.
     
     Response:
-        200: {
-            "message": "Contest completed",
-            "winner_id": int,
-            "actions": [
-                {
-                    "move_number": int,
-                    "agent_id": int,
-                    "action": string,
-                    "board_state": string
-                }
-            ]
+        202: {
+            "message": "Contest queued",
+            "job_id": int,
+            "status_url": string
         }
         404: {"error": "Contest not found"}
         400: {"error": "Contest already completed"}
@@ -1306,143 +1571,30 @@ def run_contest(contest_id):
         conn = get_db_connection()
         cur = conn.cursor()
         
-        # Fetch contest details
-        cur.execute("""
-            SELECT c.contest_id, c.game, c.agent1_id, c.agent2_id, c.status,
-                   a1.file_path as agent1_path, a2.file_path as agent2_path
-            FROM contests c
-            JOIN agents a1 ON c.agent1_id = a1.agent_id
-            JOIN agents a2 ON c.agent2_id = a2.agent_id
-            WHERE c.contest_id = %s
-        """, (contest_id,))
-        
+        cur.execute("SELECT game, status FROM contests WHERE contest_id = %s", (contest_id,))
         contest = cur.fetchone()
         if not contest:
             return jsonify({"error": "Contest not found"}), 404
         
-        if contest[4] == 'completed':
+        if contest[1] == 'completed':
             return jsonify({"error": "Contest already completed"}), 400
         
-        game = contest[1]
-        agent1_id = contest[2]
-        agent2_id = contest[3]
-        agent1_path = contest[5]
-        agent2_path = contest[6]
-        
         # Verify game exists in configuration
-        if game not in games:
-            return jsonify({"error": f"Game '{game}' not found in configuration"}), 400
-        
-        game_info = games[game]
-        
-        # Load game module and agent classes
-        game_module = __import__(game_info["module"], fromlist=["Game"])
-        GameClass = getattr(game_module, "Game")
-        
-        agent_class_name = game_info["agent"]
-        Agent1Class = load_class_from_file(agent1_path, agent_class_name)
-        Agent2Class = load_class_from_file(agent2_path, agent_class_name)
-        
-        # Create agent instances
-        agent1_instance = Agent1Class()
-        agent2_instance = Agent2Class()
-        
-        # Create game instance with NEW format (list of agents)
-        agent_instances = [agent1_instance, agent2_instance]
-        agent_ids = [agent1_id, agent2_id]
-        game_instance = GameClass(agent_instances)
-        
-        # Track actions during gameplay by wrapping the play() method
-        actions = []
-        move_number = 0
-        
-        # Monkey-patch the agents' move methods to capture actions
-        original_moves = [agent.move for agent in agent_instances]
-        
-        def create_tracked_move(agent_idx, original_move_func):
-            def tracked_move(*args, **kwargs):
-                move = original_move_func(*args, **kwargs)
-                # Capture the action
-                actions.append({
-                    "move_number": len(actions),
-                    "agent_id": agent_ids[agent_idx],
-                    "action": str(move),
-                    "board_state": str(game_instance.board.copy())
-                })
-                return move
-            return tracked_move
-        
-        # Apply tracking wrappers
-        for idx, agent in enumerate(agent_instances):
-            agent.move = create_tracked_move(idx, original_moves[idx])
-        
-        # Run the game with NEW return format
-        result = game_instance.play()
-        
-        # Determine winner from NEW format
-        # result is [winner_index, loser_index] or None for draw
-        winner_id = None
-        
-        if result is not None:
-            winner_index = result[0]
-            winner_id = agent_ids[winner_index]
-        # If result is None, it's a draw (winner_id stays None)
-        
-        # Update contest status
-        cur.execute("""
-            UPDATE contests 
-            SET status = 'completed', winner_id = %s, completed_at = CURRENT_TIMESTAMP
-            WHERE contest_id = %s
-        """, (winner_id, contest_id))
-        
-        # Save all actions to database (FR3.3)
-        for action in actions:
-            cur.execute("""
-                INSERT INTO contest_actions (contest_id, move_number, agent_id, action_data, board_state)
-                VALUES (%s, %s, %s, %s, %s)
-            """, (contest_id, action["move_number"], action["agent_id"], 
-                  action["action"], action["board_state"]))
-        
-        # Update agent records (FR3.4)
-        for agent_id in [agent1_id, agent2_id]:
-            # Ensure record exists
-            cur.execute("""
-                INSERT INTO agent_records (agent_id, wins, losses, draws)
-                VALUES (%s, 0, 0, 0)
-                ON CONFLICT (agent_id) DO NOTHING
-            """, (agent_id,))
-        
-        if winner_id:
-            # Update winner's wins
-            cur.execute("""
-                UPDATE agent_records 
-                SET wins = wins + 1 
-                WHERE agent_id = %s
-            """, (winner_id,))
-            
-            # Update loser's losses
-            loser_id = agent2_id if winner_id == agent1_id else agent1_id
-            cur.execute("""
-                UPDATE agent_records 
-                SET losses = losses + 1 
-                WHERE agent_id = %s
-            """, (loser_id,))
-        else:
-            # It's a draw
-            cur.execute("""
-                UPDATE agent_records 
-                SET draws = draws + 1 
-                WHERE agent_id IN (%s, %s)
-            """, (agent1_id, agent2_id))
-        
-        conn.commit()
+        if contest[0] not in games:
+            return jsonify({"error": f"Game '{contest[0]}' not found in configuration"}), 400
+        
+        job_id = find_active_job(cur, "contest", "contest_id", contest_id)
+        if job_id is None:
+            job_id = enqueue_job(cur, "contest", {"contest_id": contest_id}, session.get("user_id"))
+            conn.commit()
+            wake_job_workers()
         cur.close()
         
         return jsonify({
-            "message": "Contest completed",
-            "winner_id": winner_id,
-            "actions": actions
-        }), 200
+            "message": "Contest queued",
+            "job_id": job_id,
+            "status_url": f"/api/jobs/{job_id}"
+        }), 202
         
     except Exception as e:
         if conn:
@@ -1450,16 +1602,41 @@ def run_contest(contest_id):
         return jsonify({"error": str(e)}), 500
     finally:
         if conn:
-            conn.close()
+            release_db_connection(conn)
+
+
+# Fields GET /api/contests can return (see ?fields=), with the column each one is read from.
+CONTEST_FIELDS = {
+    "contest_id": "c.contest_id",
+    "name": "c.name",
+    "game": "c.game",
+    "agent1_id": "c.agent1_id",
+    "agent1_name": "a1.name",
+    "agent2_id": "c.agent2_id",
+    "agent2_name": "a2.name",
+    "winner_id": "c.winner_id",
+    "status": "c.status",
+    "created_at": "c.created_at",
+    "completed_at": "c.completed_at",
+}
 
 
 @app.route("/api/contests", methods=["GET"])
 def get_contests():
     """
-    Retrieve all contests or filter by status.
+    Retrieve one page of contests, newest first, optionally filtered.
     
     Query Parameters:
-        status: string (optional) - Filter by status: 'pending', 'completed', 'all'
+        status: string (optional) - Filter by status: 'pending', 'running', 'completed', 'all'
+        game: string (optional) - Only contests of this game
+        agent: int (optional) - Only contests this agent played in
+        group: string (optional) - Only contests an agent of this group played in
+        fields: string (optional) - Comma-separated fields to return, e.g. 'contest_id,name,status' (default: all)
+        limit: int (optional) - Contests per page (default 20, at most 100)
+        cursor: string (optional) - next_cursor from the previous page; omit for the first page
+    
+    Pages are read by keyset on (created_at, contest_id), so every page costs the same however long the
+    history is. The agent names are only joined in when they are requested.
     
     Response:
         200: {
@@ -1477,60 +1654,85 @@ def get_contests():
                     "created_at": string,
                     "completed_at": string
                 }
-            ]
+            ],
+            "next_cursor": string or null
         }
+        400: {"error": error_message} for an invalid limit, cursor, agent or field
         500: {"error": error_message}
     """
     status_filter = request.args.get('status', 'all')
+    game_filter = request.args.get('game')
+    group_filter = request.args.get('group')
+    
+    try:
+        limit = parse_page_limit()
+        after = decode_cursor(request.args["cursor"]) if request.args.get("cursor") else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    agent_filter = request.args.get("agent")
+    if agent_filter is not None:
+        if not agent_filter.isdigit():
+            return jsonify({"error": "agent must be an integer"}), 400
+        agent_filter = int(agent_filter)
+    
+    fields = [field.strip() for field in request.args.get("fields", "").split(",") if field.strip()] or list(CONTEST_FIELDS)
+    unknown = [field for field in fields if field not in CONTEST_FIELDS]
+    if unknown:
+        return jsonify({"error": f"Unknown fields: {', '.join(unknown)}"}), 400
+    
+    # Field names are checked against CONTEST_FIELDS above, so only known column names reach the SQL.
+    query = "SELECT c.created_at, c.contest_id, " + ", ".join(CONTEST_FIELDS[field] for field in fields) + " FROM contests c"
+    if "agent1_name" in fields:
+        query += " JOIN agents a1 ON c.agent1_id = a1.agent_id"
+    if "agent2_name" in fields:
+        query += " JOIN agents a2 ON c.agent2_id = a2.agent_id"
+    
+    conditions = []
+    params = {"limit": limit + 1} # One extra row tells us whether there is a next page
+    if status_filter != 'all':
+        conditions.append("c.status = %(status)s")
+        params["status"] = status_filter
+    if game_filter:
+        conditions.append("c.game = %(game)s")
+        params["game"] = game_filter
+    if agent_filter is not None:
+        conditions.append("(c.agent1_id = %(agent)s OR c.agent2_id = %(agent)s)")
+        params["agent"] = agent_filter
+    if group_filter:
+        conditions.append("""(c.agent1_id IN (SELECT a.agent_id FROM agents a JOIN groups g ON a.group_id = g.group_id WHERE g.groupname = %(group)s)
+               OR c.agent2_id IN (SELECT a.agent_id FROM agents a JOIN groups g ON a.group_id = g.group_id WHERE g.groupname = %(group)s))""")
+        params["group"] = group_filter
+    if after:
+        conditions.append("(c.created_at, c.contest_id) < (%(after_created_at)s, %(after_id)s)")
+        params["after_created_at"], params["after_id"] = after
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY c.created_at DESC, c.contest_id DESC LIMIT %(limit)s"
     
     conn = None
     try:
         conn = get_db_connection()
         cur = conn.cursor()
-        
-        query = """
-            SELECT c.contest_id, c.name, c.game, 
-                   c.agent1_id, a1.name as agent1_name,
-                   c.agent2_id, a2.name as agent2_name,
-                   c.winner_id, c.status, c.created_at, c.completed_at
-            FROM contests c
-            JOIN agents a1 ON c.agent1_id = a1.agent_id
-            JOIN agents a2 ON c.agent2_id = a2.agent_id
-        """
-        
-        if status_filter != 'all':
-            query += " WHERE c.status = %s"
-            cur.execute(query + " ORDER BY c.created_at DESC", (status_filter,))
-        else:
-            cur.execute(query + " ORDER BY c.created_at DESC")
-        
-        contests = cur.fetchall()
+        cur.execute(query, params)
+        rows = cur.fetchall()
         cur.close()
         
-        return jsonify({
-            "contests": [
-                {
-                    "contest_id": contest[0],
-                    "name": contest[1],
-                    "game": contest[2],
-                    "agent1_id": contest[3],
-                    "agent1_name": contest[4],
-                    "agent2_id": contest[5],
-                    "agent2_name": contest[6],
-                    "winner_id": contest[7],
-                    "status": contest[8],
-                    "created_at": contest[9].isoformat() if contest[9] else None,
-                    "completed_at": contest[10].isoformat() if contest[10] else None
-                }
-                for contest in contests
-            ]
-        }), 200
+        contests = []
+        for row in rows[:limit]:
+            contest = dict(zip(fields, row[2:]))
+            for key in ("created_at", "completed_at"):
+                if contest.get(key) is not None:
+                    contest[key] = contest[key].isoformat()
+            contests.append(contest)
+        next_cursor = encode_cursor(rows[limit - 1][0], rows[limit - 1][1]) if len(rows) > limit else None
+        
+        return jsonify({"contests": contests, "next_cursor": next_cursor}), 200
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     finally:
         if conn:
-            conn.close()
+            release_db_connection(conn)
 
 
 @app.route("/api/contests/<int:contest_id>", methods=["GET"])
@@ -1574,7 +1776,7 @@ def get_contest_details(contest_id):
             SELECT c.contest_id, c.name, c.game,
                    c.agent1_id, a1.name as agent1_name, g1.groupname as group1,
                    c.agent2_id, a2.name as agent2_name, g2.groupname as group2,
-                   c.winner_id, c.status, c.created_at, c.completed_at
+                   c.winner_id, c.status, c.created_at, c.completed_at, c.seed, c.moves
             FROM contests c
             JOIN agents a1 ON c.agent1_id = a1.agent_id
             JOIN agents a2 ON c.agent2_id = a2.agent_id
@@ -1587,16 +1789,38 @@ def get_contest_details(contest_id):
         if not contest:
             return jsonify({"error": "Contest not found"}), 404
         
-        # Fetch actions
-        cur.execute("""
-            SELECT ca.move_number, ca.agent_id, a.name, ca.action_data, ca.board_state
-            FROM contest_actions ca
-            JOIN agents a ON ca.agent_id = a.agent_id
-            WHERE ca.contest_id = %s
-            ORDER BY ca.move_number
-        """, (contest_id,))
-        
-        actions = cur.fetchall()
+        if contest[14] is not None:
+            # Rebuild the actions by replaying the contest from its seed and move log.
+            players = [(contest[3], contest[4]), (contest[6], contest[7])]
+            actions = [
+                {
+                    "move_number": action["move_number"],
+                    "agent_id": players[action["agent_index"]][0],
+                    "agent_name": players[action["agent_index"]][1],
+                    "action": str(action["action"]),
+                    "board_state": str(action["board"])
+                }
+                for action in replay_contest_actions(contest[2], contest[13], contest[14])
+            ]
+        else:
+            # Contests played before seeded replays have one contest_actions row per move.
+            cur.execute("""
+                SELECT ca.move_number, ca.agent_id, a.name, ca.action_data, ca.board_state
+                FROM contest_actions ca
+                JOIN agents a ON ca.agent_id = a.agent_id
+                WHERE ca.contest_id = %s
+                ORDER BY ca.move_number
+            """, (contest_id,))
+            actions = [
+                {
+                    "move_number": action[0],
+                    "agent_id": action[1],
+                    "agent_name": action[2],
+                    "action": action[3],
+                    "board_state": action[4]
+                }
+                for action in cur.fetchall()
+            ]
         cur.close()
         
         return jsonify({
@@ -1611,23 +1835,104 @@ def get_contest_details(contest_id):
                 "created_at": contest[11].isoformat() if contest[11] else None,
                 "completed_at": contest[12].isoformat() if contest[12] else None
             },
-            "actions": [
-                {
-                    "move_number": action[0],
-                    "agent_id": action[1],
-                    "agent_name": action[2],
-                    "action": action[3],
-                    "board_state": action[4]
-                }
-                for action in actions
-            ]
+            "actions": actions
         }), 200
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     finally:
         if conn:
-            conn.close()
+            release_db_connection(conn)
+
+
+@app.route("/api/contests/<int:contest_id>/replay", methods=["GET"])
+def replay_contest(contest_id):
+    """
+    Return a contest move by move as NDJSON. Contests with a seed are replayed from it and their move log in
+    memory (a game is a few hundred moves at most) and sent in one body, after the connection is released. Older
+    contests stream their contest_actions rows from a server-side cursor, decoding each stored board only when its
+    line is sent.
+
+    Response:
+        200 (application/x-ndjson): one JSON object per line, first the contest then one line per action:
+            {"contest_id": int, "game": string, "agent1_id": int, "agent2_id": int, "winner_id": int, "status": string,
+             "seed": int}
+            {"move_number": int, "agent_id": int, "action": string, "board": list}
+        404: {"error": "Contest not found"}
+        500: {"error": error_message}
+    """
+    conn = None
+    streaming = False # Once the response is handed back, its close releases the connection
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT contest_id, game, agent1_id, agent2_id, winner_id, status, seed, moves
+            FROM contests
+            WHERE contest_id = %s
+            """,
+            (contest_id,),
+        )
+        contest = cur.fetchone()
+        cur.close()
+        if not contest:
+            return jsonify({"error": "Contest not found"}), 404
+        game = contest[1]
+        header = json.dumps(dict(zip(
+            ("contest_id", "game", "agent1_id", "agent2_id", "winner_id", "status", "seed"), contest
+        ))) + "\n"
+
+        if contest[7] is not None:
+            release_db_connection(conn)
+            conn = None
+            agent_ids = [contest[2], contest[3]]
+            body = header + "".join(
+                json.dumps({
+                    "move_number": action["move_number"],
+                    "agent_id": agent_ids[action["agent_index"]],
+                    "action": str(action["action"]),
+                    "board": action["board"],
+                }) + "\n"
+                for action in replay_contest_actions(game, contest[6], contest[7])
+            )
+            return app.response_class(body, mimetype="application/x-ndjson")
+
+        # Named cursor: the moves arrive from Postgres in batches rather than all at once.
+        actions_cur = conn.cursor(name=f"contest_replay_{contest_id}")
+        actions_cur.itersize = 200
+        actions_cur.execute(
+            """
+            SELECT move_number, agent_id, action_data, board_state
+            FROM contest_actions
+            WHERE contest_id = %s
+            ORDER BY move_number
+            """,
+            (contest_id,),
+        )
+
+        def generate():
+            yield header
+            for move_number, agent_id, action, board_state in actions_cur:
+                yield json.dumps({
+                    "move_number": move_number,
+                    "agent_id": agent_id,
+                    "action": action,
+                    "board": parse_board_state(board_state),
+                }) + "\n"
+
+        response = app.response_class(generate(), mimetype="application/x-ndjson")
+        # The connection stays checked out until the server closes the response: after the last move is sent,
+        # when the client goes away, or straight away for a HEAD request whose body is never iterated.
+        response.call_on_close(lambda: release_db_connection(conn))
+        streaming = True
+        return response
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        if conn and not streaming:
+            release_db_connection(conn)
 
 
 @app.route("/api/agents/<int:agent_id>/record", methods=["GET"])
@@ -1686,14 +1991,411 @@ def get_agent_record(agent_id):
         return jsonify({"error": str(e)}), 500
     finally:
         if conn:
-            conn.close()
+            release_db_connection(conn)
+
+
+
+@app.route("/api/leaderboard/<game>", methods=["GET"])
+def get_leaderboard(game):
+    """
+    Rating leaderboard for a game, read from the materialized agent_ratings table (see ratings.py).
+
+    Query Parameters:
+        limit: int (optional) - Number of agents to return (default 20, at most 100)
+
+    Response:
+        200: {
+            "game": string,
+            "leaderboard": [
+                {"rank": int, "agent_id": int, "agent_name": string, "groupname": string,
+                 "rating": float, "games_played": int}
+            ]
+        }
+        400: {"error": error_message}
+    """
+    if game not in games:
+        return jsonify({"error": f"Game '{game}' not found in configuration"}), 400
+    try:
+        limit = parse_page_limit()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    conn = None
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT ar.agent_id, a.name, COALESCE(g.groupname, 'Unknown'), ar.rating, ar.games_played
+            FROM agent_ratings ar
+            JOIN agents a ON a.agent_id = ar.agent_id
+            LEFT JOIN groups g ON g.group_id = a.group_id
+            WHERE ar.game = %s
+            ORDER BY ar.rating DESC
+            LIMIT %s
+        """, (game, limit))
+        leaderboard = [
+            {
+                "rank": rank,
+                "agent_id": row[0],
+                "agent_name": row[1],
+                "groupname": row[2],
+                "rating": round(row[3], 1),
+                "games_played": row[4],
+            }
+            for rank, row in enumerate(cur.fetchall(), start=1)
+        ]
+        return jsonify({"game": game, "leaderboard": leaderboard}), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        if conn:
+            release_db_connection(conn)
+
+
+@app.route("/api/admin/ratings/recompute", methods=["POST"])
+def recompute_agent_ratings():
+    """
+    Admin endpoint that rebuilds agent_ratings from the full contest and tournament history in one vectorized pass.
+
+    Request Body:
+        game (str): Optional, only rebuild this game's ratings.
+
+    Response:
+        200: {"message": "Ratings recomputed", "results": int}
+    """
+    if "role" not in session or session["role"] != "admin":
+        return jsonify({"error": "Unauthorized"}), 401
+
+    game = (request.json or {}).get("game") if request.is_json else None
+    if game is not None and game not in games:
+        return jsonify({"error": f"Game '{game}' not found in configuration"}), 400
+
+    conn = None
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor()
+        replayed = recompute_ratings(cur, game)
+        conn.commit()
+        return jsonify({"message": "Ratings recomputed", "results": replayed}), 200
+
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        return jsonify({"error": str(e)}), 500
+    finally:
+        if conn:
+            release_db_connection(conn)
+
+
+def insert_tournament_round(cur, tournament_id, round_number):
+    cur.execute(
+        """
+        INSERT INTO tournament_rounds (tournament_id, round_number)
+        VALUES (%s, %s)
+        RETURNING round_id
+        """,
+        (tournament_id, round_number),
+    )
+    return cur.fetchone()[0]
+
+
+def commit_tournament_round(tournament_id, round_number, matches, deltas, rating_results):
+    """
+    Record a played round in one short transaction of its own: the round, its (agent1, agent2, match_result)
+    matches, the standing deltas and the rating changes. A resumed tournament continues after the last round
+    committed here (see load_tournament_progress).
+    """
+    with db_connection() as conn, conn.cursor() as cur:
+        round_id = insert_tournament_round(cur, tournament_id, round_number)
+        pending_matches = []
+        for agent1, agent2, match_result in matches:
+            record_tournament_match(pending_matches, tournament_id, round_id, round_number, agent1, agent2, match_result)
+        flush_tournament_matches(cur, pending_matches)
+        flush_standings(cur, tournament_id, deltas)
+        update_ratings(cur, rating_results)
+        conn.commit()
+
+
+def play_knockout(executor, tournament_id, game, standings, progress, bracket=None, round_number=1, matches_played=0):
+    """
+    Single elimination: winners advance, draws are settled by a random tiebreak and odd brackets give a bye.
+    Each game is rated with tiebreaks rated as draws. bracket lists the agent ids still in, in bracket order,
+    starting at round_number; None draws a fresh bracket of every agent in standings.
+    """
+    if bracket is None:
+        bracket = list(standings)
+        random.shuffle(bracket)
+
+    while len(bracket) > 1:
+        next_round = []
+        # Each round's writes are buffered and committed together, so a round costs a constant number of statements.
+        deltas = {}
+        matches = []
+        rating_results = []
+
+        if len(bracket) % 2 == 1: # Handle bye if odd number of agents
+            bye_agent_id = bracket.pop() # last agent for bye
+            bye_agent = standings[bye_agent_id]
+            bye_result = {
+                "winner_agent_id": bye_agent_id,
+                "agent1_score": 1,
+                "agent2_score": 0,
+                "result": "bye",
+                "winner_label": bye_agent["agent_name"],
+                "raw_winner": "BYE",
+                "decision": "bye",
+                "advancing_agent_id": bye_agent_id,
+            }
+            update_standing(standings, deltas, bye_agent_id, 1) # Win for bye
+            matches.append((bye_agent, None, bye_result))
+            next_round.append(bye_agent_id)
+
+        pairings = [
+            (standings[bracket[index]], standings[bracket[index + 1]])
+            for index in range(0, len(bracket), 2)
+        ]
+        round_results = play_round_matches(executor, pairings, game)
+
+        for (agent1, agent2), match_result in zip(pairings, round_results):
+            agent1_id = agent1["agent_id"]
+            agent2_id = agent2["agent_id"]
+            record_payload = dict(match_result)
+
+            winner_id = match_result["winner_agent_id"]
+            decision = "regulation"  # Default outcome; adjusted below for byes/tiebreaks.
+            rating_results.append((agent1_id, agent2_id, 1.0 if winner_id == agent1_id else 0.0 if winner_id else 0.5))
+
+            if winner_id == agent1_id:
+                update_standing(standings, deltas, agent1_id, 1, opponent_id=agent2_id)
+                update_standing(standings, deltas, agent2_id, -1, opponent_id=agent1_id)
+            elif winner_id == agent2_id:
+                update_standing(standings, deltas, agent1_id, -1, opponent_id=agent2_id)
+                update_standing(standings, deltas, agent2_id, 1, opponent_id=agent1_id)
+            else:
+                decision = "tiebreak(draw)"  # No winner; choose advancement while keeping scores neutral.
+                update_standing(standings, deltas, agent1_id, 0, opponent_id=agent2_id)
+                update_standing(standings, deltas, agent2_id, 0, opponent_id=agent1_id)
+                winner_id = random.choice((agent1_id, agent2_id))
+                record_payload["winner_agent_id"] = winner_id
+                record_payload["result"] = "agent1" if winner_id == agent1_id else "agent2"
+                record_payload["winner_label"] = f"{standings[winner_id]['agent_name']} (tiebreak)"
+
+            record_payload["decision"] = decision
+            record_payload["advancing_agent_id"] = winner_id
+
+            matches.append((agent1, agent2, record_payload))
+            next_round.append(winner_id)
+
+        commit_tournament_round(tournament_id, round_number, matches, deltas, rating_results)
+        matches_played += len(pairings)
+        progress(matches_played)
+        bracket = next_round
+        round_number += 1
+
+
+def play_league_round(executor, tournament_id, round_number, game, standings, pairings, bye=None):
+    """
+    Play one round of a round-robin or Swiss tournament as a single batch and commit it.
+    Results score LEAGUE_POINTS and are rated; a bye (Swiss only) is recorded and scored as a win.
+    Returns the number of games played.
+    """
+    deltas = {}
+    matches = []
+    rating_results = []
+
+    if bye is not None:
+        bye_agent = standings[bye]
+        update_standing(standings, deltas, bye, LEAGUE_POINTS["win"])
+        matches.append((bye_agent, None, {
+            "winner_agent_id": bye,
+            "agent1_score": 1,
+            "agent2_score": 0,
+            "result": "bye",
+            "winner_label": bye_agent["agent_name"],
+            "raw_winner": "BYE",
+            "decision": "bye",
+        }))
+
+    pairings = [(standings[agent1_id], standings[agent2_id]) for agent1_id, agent2_id in pairings]
+    round_results = play_round_matches(executor, pairings, game)
+
+    for (agent1, agent2), match_result in zip(pairings, round_results):
+        agent1_id = agent1["agent_id"]
+        agent2_id = agent2["agent_id"]
+        winner_id = match_result["winner_agent_id"]
+        if winner_id == agent1_id:
+            agent1_points, agent2_points = LEAGUE_POINTS["win"], LEAGUE_POINTS["loss"]
+            rating_results.append((agent1_id, agent2_id, 1.0))
+        elif winner_id == agent2_id:
+            agent1_points, agent2_points = LEAGUE_POINTS["loss"], LEAGUE_POINTS["win"]
+            rating_results.append((agent1_id, agent2_id, 0.0))
+        else:
+            agent1_points = agent2_points = LEAGUE_POINTS["draw"]
+            rating_results.append((agent1_id, agent2_id, 0.5))
+        update_standing(standings, deltas, agent1_id, agent1_points, opponent_id=agent2_id)
+        update_standing(standings, deltas, agent2_id, agent2_points, opponent_id=agent1_id)
 
+        record_payload = dict(match_result)
+        record_payload["decision"] = "regulation" if winner_id is not None else "draw"
+        matches.append((agent1, agent2, record_payload))
+
+    commit_tournament_round(tournament_id, round_number, matches, deltas, rating_results)
+    return len(pairings)
+
+
+def load_swiss_state(cur, tournament_id):
+    """Read the points, previous opponents and byes that the next Swiss round is paired from."""
+    cur.execute(
+        "SELECT agent_id, COALESCE(points, 0) FROM tournament_standings WHERE tournament_id = %s",
+        (tournament_id,),
+    )
+    points = dict(cur.fetchall())
+    opponents = {agent_id: set() for agent_id in points}
+    byes = set()
+    cur.execute(
+        "SELECT agent1_id, agent2_id FROM tournament_matches WHERE tournament_id = %s",
+        (tournament_id,),
+    )
+    for agent1_id, agent2_id in cur.fetchall():
+        if agent2_id is None:
+            byes.add(agent1_id)
+        else:
+            opponents[agent1_id].add(agent2_id)
+            opponents[agent2_id].add(agent1_id)
+    return points, opponents, byes
+
+
+def load_tournament_progress(cur, tournament_id):
+    """Return (rounds committed, games played) of a tournament; byes are not games."""
+    cur.execute(
+        """
+        SELECT
+            (SELECT COALESCE(MAX(round_number), 0) FROM tournament_rounds WHERE tournament_id = %(id)s),
+            (SELECT COUNT(*) FROM tournament_matches WHERE tournament_id = %(id)s AND agent2_id IS NOT NULL)
+        """,
+        {"id": tournament_id},
+    )
+    return cur.fetchone()
+
+
+def load_knockout_bracket(cur, tournament_id, round_number):
+    """The agent ids that advanced from a committed knockout round, in the order they were recorded."""
+    cur.execute(
+        """
+        SELECT (metadata->>'advancing_agent_id')::int
+        FROM tournament_matches
+        WHERE tournament_id = %s AND round_number = %s
+        ORDER BY tournament_match_id
+        """,
+        (tournament_id, round_number),
+    )
+    return [row[0] for row in cur.fetchall()]
+
+
+@job_handler("tournament")
+def execute_tournament(payload, progress):
+    """
+    Job handler that plays a queued tournament in its format (knockout, round_robin or swiss),
+    recording rounds, matches and standings. Every round's pairings are played concurrently as one batch
+    without holding a database connection, then the round is committed on its own (commit_tournament_round).
+    A run that takes the job over from a dead worker keeps the participants and standings already recorded
+    and resumes after the last committed round.
+    Progress is reported in games played. The tournament is marked 'failed' if anything raises.
+    """
+    tournament_id = payload["tournament_id"]
+    with db_connection() as conn, conn.cursor() as cur:
+        cur.execute(
+            "UPDATE tournaments SET status = 'running' WHERE tournament_id = %s RETURNING game, format, rounds",
+            (tournament_id,),
+        )
+        row = cur.fetchone()
+        if not row:
+            raise ValueError("Tournament not found")
+        game, tournament_format, rounds = row
+        conn.commit()
+
+    try:
+        with db_connection() as conn, conn.cursor() as cur:
+            standings = load_tournament_standings(cur, tournament_id)
+            if not standings:
+                agents = fetch_latest_agents_for_game(cur, game)
+                if len(agents) < 2:
+                    raise ValueError("At least two agents are required to start a tournament")
+                standings = initialize_tournament_standings(cur, tournament_id, agents)
+            rounds_completed, games_played = load_tournament_progress(cur, tournament_id)
+            agent_count = len(standings)
+
+            if tournament_format == "round_robin":
+                # Shuffled by a generator seeded with the tournament, so a resumed run rebuilds the same schedule.
+                agent_ids = sorted(standings)
+                random.Random(tournament_id).shuffle(agent_ids)
+                schedule = round_robin_schedule(agent_ids)
+                rounds = len(schedule)
+                total_games = agent_count * (agent_count - 1) // 2
+            elif tournament_format == "swiss":
+                rounds = rounds or swiss_round_count(agent_count)
+                total_games = rounds * (agent_count // 2)
+            else:
+                bracket = load_knockout_bracket(cur, tournament_id, rounds_completed) if rounds_completed else None
+                total_games = agent_count - 1
+            cur.execute("UPDATE tournaments SET rounds = %s WHERE tournament_id = %s", (rounds, tournament_id))
+            conn.commit()
+        progress(games_played, total_games)
+
+        # Matches within a round are independent, so each round is played concurrently. The agents themselves
+        # run in the sandboxed worker processes, so threads are enough to keep every core busy.
+        with ThreadPoolExecutor(max_workers=min(TOURNAMENT_WORKERS, agent_count // 2)) as executor:
+            if tournament_format == "round_robin":
+                for round_number, (pairings, _) in enumerate(schedule, start=1):
+                    if round_number <= rounds_completed:
+                        continue
+                    # Round-robin byes are plain rest rounds: everybody sits out the same number of times.
+                    games_played += play_league_round(executor, tournament_id, round_number, game, standings, pairings)
+                    progress(games_played)
+            elif tournament_format == "swiss":
+                for round_number in range(rounds_completed + 1, rounds + 1):
+                    with db_connection() as conn, conn.cursor() as cur:
+                        swiss_state = load_swiss_state(cur, tournament_id)
+                    pairings, bye = swiss_pairings(*swiss_state)
+                    games_played += play_league_round(executor, tournament_id, round_number, game, standings, pairings, bye)
+                    progress(games_played)
+            else:
+                play_knockout(executor, tournament_id, game, standings, progress, bracket, rounds_completed + 1, games_played)
+
+        with db_connection() as conn, conn.cursor() as cur:
+            cur.execute(
+                "UPDATE tournaments SET status = 'completed' WHERE tournament_id = %s",
+                (tournament_id,),
+            )
+            conn.commit()
+    except Exception:
+        with db_connection() as conn, conn.cursor() as cur:
+            cur.execute(
+                "UPDATE tournaments SET status = 'failed' WHERE tournament_id = %s",
+                (tournament_id,),
+            )
+            conn.commit()
+        raise
+
+    return {"tournament_id": tournament_id}
 
 
 @app.route("/api/admin/tournaments", methods=["POST"])
 def start_tournament():
     """
-    Admin endpoint to launch a single-elimination tournament for a game.
+    Admin endpoint to launch a tournament for a game.
+    The tournament is created straight away and played by a background job (see execute_tournament);
+    poll GET /api/jobs/<job_id> for progress.
+
+    Request Body:
+        game (str): Key of the game in the games dictionary.
+        format (str): "knockout" (default), "round_robin" or "swiss".
+        rounds (int): Swiss only, number of rounds (default ceil(log2(agents))).
+        name (str): Optional display name.
+
+    Returns:
+        202: {"tournament_id": int, "job_id": int, "status_url": string}
     """
     if "role" not in session or session["role"] != "admin":
         return jsonify({"error": "Unauthorized"}), 401
@@ -1702,10 +2404,26 @@ def start_tournament():
     game = data.get("game")
     if not game:
         return jsonify({"error": "Game is required"}), 400
-
-    name = data.get("name") or f"{game.title()} Knockout Tournament"
+    if game not in games:
+        return jsonify({"error": f"Game '{game}' not found in configuration"}), 400
+
+    tournament_format = data.get("format") or "knockout"
+    if tournament_format not in TOURNAMENT_FORMATS:
+        return jsonify({"error": f"format must be one of {', '.join(TOURNAMENT_FORMATS)}"}), 400
+    rounds = None
+    if tournament_format == "swiss" and data.get("rounds") is not None:
+        try:
+            rounds = int(data["rounds"])
+        except (TypeError, ValueError):
+            rounds = 0
+        if rounds < 1:
+            return jsonify({"error": "rounds must be a positive integer"}), 400
+
+    format_label = tournament_format.replace("_", " ").title()
+    name = data.get("name") or f"{game.title()} {format_label} Tournament"
 
     conn = None
+    cur = None
     try:
         conn = get_db_connection()
         cur = conn.cursor()
@@ -1718,92 +2436,22 @@ def start_tournament():
 
         cur.execute(
             """
-            INSERT INTO tournaments (name, game, rounds, status, created_by)
-            VALUES (%s, %s, %s, %s, %s)
+            INSERT INTO tournaments (name, game, format, rounds, status, created_by)
+            VALUES (%s, %s, %s, %s, %s, %s)
             RETURNING tournament_id
             """,
-            (name, game, None, "running", session.get("user_id")),
+            (name, game, tournament_format, rounds, "pending", session.get("user_id")),
         )
         tournament_id = cur.fetchone()[0]
-
-        standings = initialize_tournament_standings(cur, tournament_id, agents)
-        bracket = [agent["agent_id"] for agent in agents]
-        random.shuffle(bracket)
-
-        round_number = 1
-        while len(bracket) > 1:
-            cur.execute(
-                """
-                INSERT INTO tournament_rounds (tournament_id, round_number)
-                VALUES (%s, %s)
-                RETURNING round_id
-                """,
-                (tournament_id, round_number),
-            )
-            round_id = cur.fetchone()[0]
-
-            next_round = []
-
-            if len(bracket) % 2 == 1: # Handle bye if odd number of agents
-                bye_agent_id = bracket.pop() # last agent for bye
-                bye_agent = standings[bye_agent_id]
-                bye_result = {
-                    "winner_agent_id": bye_agent_id,
-                    "agent1_score": 1,
-                    "agent2_score": 0,
-                    "result": "bye",
-                    "winner_label": bye_agent["agent_name"],
-                    "raw_winner": "BYE",
-                    "decision": "bye",
-                    "advancing_agent_id": bye_agent_id,
-                }
-                update_standing(cur, standings, tournament_id, bye_agent_id, 1) # Win for bye
-                record_tournament_match(cur, tournament_id, round_id, round_number, bye_agent, None, bye_result)
-                next_round.append(bye_agent_id)
-
-            for index in range(0, len(bracket), 2):
-                agent1_id = bracket[index]
-                agent2_id = bracket[index + 1]
-                agent1 = standings[agent1_id]
-                agent2 = standings[agent2_id]
-
-                match_result = play_agents_match(agent1, agent2, game)
-                record_payload = dict(match_result)
-
-                winner_id = match_result["winner_agent_id"]
-                decision = "regulation"  # Default outcome; adjusted below for byes/tiebreaks.
-
-                if winner_id == agent1_id:
-                    update_standing(cur, standings, tournament_id, agent1_id, 1, opponent_id=agent2_id)
-                    update_standing(cur, standings, tournament_id, agent2_id, -1, opponent_id=agent1_id)
-                elif winner_id == agent2_id:
-                    update_standing(cur, standings, tournament_id, agent1_id, -1, opponent_id=agent2_id)
-                    update_standing(cur, standings, tournament_id, agent2_id, 1, opponent_id=agent1_id)
-                else:
-                    decision = "tiebreak(draw)"  # No winner; choose advancement while keeping scores neutral.
-                    update_standing(cur, standings, tournament_id, agent1_id, 0, opponent_id=agent2_id)
-                    update_standing(cur, standings, tournament_id, agent2_id, 0, opponent_id=agent1_id)
-                    winner_id = random.choice((agent1_id, agent2_id))
-                    record_payload["winner_agent_id"] = winner_id
-                    record_payload["result"] = "agent1" if winner_id == agent1_id else "agent2"
-                    record_payload["winner_label"] = f"{standings[winner_id]['agent_name']} (tiebreak)"
-
-                record_payload["decision"] = decision
-                record_payload["advancing_agent_id"] = winner_id
-
-                record_tournament_match(cur, tournament_id, round_id, round_number, agent1, agent2, record_payload)
-                next_round.append(winner_id)
-
-            bracket = next_round
-            round_number += 1
-
-        cur.execute(
-            "UPDATE tournaments SET status = 'completed' WHERE tournament_id = %s",
-            (tournament_id,),
-        )
+        job_id = enqueue_job(cur, "tournament", {"tournament_id": tournament_id}, session.get("user_id"))
         conn.commit()
+        wake_job_workers()
 
-        return jsonify({"tournament_id": tournament_id}), 201
+        return jsonify({
+            "tournament_id": tournament_id,
+            "job_id": job_id,
+            "status_url": f"/api/jobs/{job_id}"
+        }), 202
 
     except Exception as e:
         if conn:
@@ -1813,217 +2461,329 @@ def start_tournament():
         if cur:
             cur.close()
         if conn:
-            conn.close()
+            release_db_connection(conn)
+
+
+def encode_cursor(created_at, row_id):
+    """Opaque keyset cursor for the row at the end of a page, ordered by (created_at, id) descending."""
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{row_id}".encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor(). Raises ValueError for a malformed cursor."""
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+def parse_page_limit(default=20, maximum=100):
+    """Read ?limit= for a paginated endpoint, clamped to [1, maximum]. Raises ValueError if it is not a number."""
+    try:
+        limit = int(request.args.get("limit", default))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    return max(1, min(limit, maximum))
 
 
 @app.route("/api/admin/tournaments", methods=["GET"])
 def list_tournaments():
     """
-    Fetch summary of all tournaments with basic info and top 3 leaderboard.
+    Fetch one page of tournaments, newest first, with basic info and top 3 leaderboard.
+
+    The page is read with a single query regardless of its size: completed rounds are counted with a
+    GROUP BY and the leaderboard is the first three rows of ROW_NUMBER() over each tournament's standings.
+
+    Query parameters:
+        limit (int): Tournaments per page (default 20, at most 100).
+        cursor (str): next_cursor from the previous page; omit for the first page.
+
+    Response:
+        200: {"tournaments": [...], "next_cursor": string or null}
+        400: {"error": "Invalid cursor"} or {"error": "limit must be an integer"}
     """
     if "role" not in session or session["role"] != "admin":
         return jsonify({"error": "Unauthorized"}), 401
 
+    try:
+        limit = parse_page_limit()
+        after = decode_cursor(request.args["cursor"]) if request.args.get("cursor") else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     conn = None
     try:
         conn = get_db_connection()
         cur = conn.cursor()
         cur.execute(
             """
-            SELECT tournament_id, name, game, rounds, status, created_at
-            FROM tournaments
-            ORDER BY created_at DESC
-            """
-        )
-        tournaments = []
-        for row in cur.fetchall():
-            tournament_id = row[0]
-            cur.execute(
-                "SELECT COUNT(*) FROM tournament_rounds WHERE tournament_id = %s",
-                (tournament_id,),
-            )
-            round_count = cur.fetchone()[0]
-            cur.execute(
-                """
-                SELECT ts.agent_id, ts.points, ts.rounds_played,
+            WITH page AS (
+                SELECT tournament_id, name, game, format, rounds, status, created_at
+                FROM tournaments
+                WHERE %(after_created_at)s::timestamptz IS NULL
+                   OR (created_at, tournament_id) < (%(after_created_at)s, %(after_id)s)
+                ORDER BY created_at DESC, tournament_id DESC
+                LIMIT %(limit)s
+            ),
+            round_counts AS (
+                SELECT tr.tournament_id, COUNT(*) AS round_count
+                FROM tournament_rounds tr
+                JOIN page p ON p.tournament_id = tr.tournament_id
+                GROUP BY tr.tournament_id
+            ),
+            ranked AS (
+                SELECT ts.tournament_id, ts.agent_id, ts.points, ts.rounds_played,
                        COALESCE(g.groupname, 'Unknown') AS groupname,
-                       COALESCE(a.name, 'Unknown') AS agent_name
+                       COALESCE(a.name, 'Unknown') AS agent_name,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY ts.tournament_id
+                           ORDER BY ts.points DESC, ts.rounds_played DESC, COALESCE(g.groupname, 'Unknown')
+                       ) AS position
                 FROM tournament_standings ts
+                JOIN page p ON p.tournament_id = ts.tournament_id
                 LEFT JOIN agents a ON ts.agent_id = a.agent_id
                 LEFT JOIN groups g ON a.group_id = g.group_id
-                WHERE ts.tournament_id = %s
-                ORDER BY ts.points DESC, ts.rounds_played DESC, groupname
-                LIMIT 3
-                """,
-                (tournament_id,), # Fetch top 3
-            )
-            leaderboard = [
-                {
-                    "agent_id": entry[0],
-                    "points": int(entry[1]) if entry[1] is not None else 0,
-                    "rounds_played": entry[2],
-                    "groupname": entry[3],
-                    "agent_name": entry[4],
-                }
-                for entry in cur.fetchall()
-            ]
-            tournaments.append(
-                {
-                    "id": row[0],
-                    "name": row[1],
-                    "game": row[2],
-                    "rounds": row[3],
-                    "status": row[4],
-                    "created_at": row[5].isoformat() if row[5] else None,
-                    "completed_rounds": round_count,
-                    "leaderboard": leaderboard,
-                }
             )
+            SELECT p.tournament_id, p.name, p.game, p.rounds, p.status, p.created_at, p.format,
+                   COALESCE(rc.round_count, 0),
+                   r.agent_id, r.points, r.rounds_played, r.groupname, r.agent_name
+            FROM page p
+            LEFT JOIN round_counts rc ON rc.tournament_id = p.tournament_id
+            LEFT JOIN ranked r ON r.tournament_id = p.tournament_id AND r.position <= 3 -- Fetch top 3
+            ORDER BY p.created_at DESC, p.tournament_id DESC, r.position
+            """,
+            {
+                "after_created_at": after[0] if after else None,
+                "after_id": after[1] if after else None,
+                "limit": limit + 1, # One extra row tells us whether there is a next page
+            },
+        )
+        tournaments = []
+        created_at = {}
+        for row in cur.fetchall():
+            if not tournaments or tournaments[-1]["id"] != row[0]:
+                created_at[row[0]] = row[5]
+                tournaments.append(
+                    {
+                        "id": row[0],
+                        "name": row[1],
+                        "game": row[2],
+                        "rounds": row[3],
+                        "status": row[4],
+                        "created_at": row[5].isoformat() if row[5] else None,
+                        "format": row[6],
+                        "completed_rounds": row[7],
+                        "leaderboard": [],
+                    }
+                )
+            if row[8] is not None:
+                tournaments[-1]["leaderboard"].append(
+                    {
+                        "agent_id": row[8],
+                        "points": int(row[9]) if row[9] is not None else 0,
+                        "rounds_played": row[10],
+                        "groupname": row[11],
+                        "agent_name": row[12],
+                    }
+                )
+
+        next_cursor = None
+        if len(tournaments) > limit:
+            tournaments = tournaments[:limit]
+            last = tournaments[-1]
+            next_cursor = encode_cursor(created_at[last["id"]], last["id"])
 
-        return jsonify({"tournaments": tournaments})
+        return jsonify({"tournaments": tournaments, "next_cursor": next_cursor})
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     finally:
         if conn:
-            conn.close()
+            release_db_connection(conn)
 
 
 @app.route("/api/admin/tournaments/<int:tournament_id>", methods=["GET"])
 def tournament_detail(tournament_id):
     """
     Fetch full knockout bracket detail including rounds, matches, and standings.
+
+    Postgres builds the JSON with jsonb_agg in two queries: the tournament with its standings, then one row
+    per round holding all of that round's matches. Rounds are read through a server-side cursor and streamed
+    to the client as they arrive. Completed tournaments no longer change, so they are sent with an ETag and a
+    request whose If-None-Match matches it gets 304 Not Modified after the first query.
+
+    Response:
+        200: {"tournament": {...}, "rounds": [{..., "matches": [...]}], "standings": [...]}
+        304: Not modified (completed tournaments only)
+        404: {"error": "Tournament not found"}
     """
     if "role" not in session or session["role"] != "admin":
         return jsonify({"error": "Unauthorized"}), 401
 
     conn = None
+    streaming = False # Once the response is handed back, its close releases the connection
     try:
         conn = get_db_connection()
         cur = conn.cursor()
 
         cur.execute(
             """
-            SELECT tournament_id, name, game, rounds, status, created_at
-            FROM tournaments
-            WHERE tournament_id = %s
+            SELECT jsonb_build_object(
+                       'id', t.tournament_id,
+                       'name', t.name,
+                       'game', t.game,
+                       'format', t.format,
+                       'rounds', t.rounds,
+                       'status', t.status,
+                       'created_at', t.created_at
+                   )::text,
+                   COALESCE((
+                       SELECT jsonb_agg(
+                                  jsonb_build_object(
+                                      'agent_id', ts.agent_id,
+                                      'points', COALESCE(ts.points, 0),
+                                      'rounds_played', ts.rounds_played,
+                                      'groupname', COALESCE(g.groupname, 'Unknown'),
+                                      'agent_name', COALESCE(a.name, 'Unknown')
+                                  )
+                                  ORDER BY ts.points DESC, ts.rounds_played DESC, COALESCE(g.groupname, 'Unknown')
+                              )
+                       FROM tournament_standings ts
+                       LEFT JOIN agents a ON ts.agent_id = a.agent_id
+                       LEFT JOIN groups g ON a.group_id = g.group_id
+                       WHERE ts.tournament_id = t.tournament_id
+                   ), '[]'::jsonb)::text,
+                   t.status
+            FROM tournaments t
+            WHERE t.tournament_id = %s
             """,
             (tournament_id,),
         )
         tournament = cur.fetchone()
         if not tournament:
             return jsonify({"error": "Tournament not found"}), 404
-
-        cur.execute(
+        tournament_json, standings_json, status = tournament
+
+        etag = None
+        if status == "completed":
+            etag = hashlib.sha1(f"{tournament_json}{standings_json}".encode()).hexdigest()
+            if request.if_none_match.contains(etag):
+                response = app.response_class(status=304)
+                response.set_etag(etag)
+                return response
+
+        # Named cursor: Postgres hands the rounds over in batches instead of materialising the whole bracket here.
+        rounds_cur = conn.cursor(name=f"tournament_detail_{tournament_id}")
+        rounds_cur.itersize = 50
+        rounds_cur.execute(
             """
-            SELECT round_id, round_number, created_at
-            FROM tournament_rounds
-            WHERE tournament_id = %s
-            ORDER BY round_number ASC
+            SELECT jsonb_build_object(
+                       'round_id', tr.round_id,
+                       'round_number', tr.round_number,
+                       'created_at', tr.created_at,
+                       'matches', COALESCE(
+                           jsonb_agg(
+                               jsonb_build_object(
+                                   'id', tm.tournament_match_id,
+                                   'agent1_id', tm.agent1_id,
+                                   'agent2_id', tm.agent2_id,
+                                   'agent1_score', COALESCE(tm.agent1_score, 0),
+                                   'agent2_score', COALESCE(tm.agent2_score, 0),
+                                   'result', tm.result,
+                                   'winner_agent_id', tm.winner_agent_id,
+                                   'metadata', tm.metadata,
+                                   'created_at', tm.created_at
+                               )
+                               ORDER BY tm.tournament_match_id
+                           ) FILTER (WHERE tm.tournament_match_id IS NOT NULL),
+                           '[]'::jsonb
+                       )
+                   )::text
+            FROM tournament_rounds tr
+            LEFT JOIN tournament_matches tm ON tm.round_id = tr.round_id
+            WHERE tr.tournament_id = %s
+            GROUP BY tr.round_id
+            ORDER BY tr.round_number ASC
             """,
             (tournament_id,),
         )
-        rounds = [] # Will hold all rounds with their matches
-        for round_row in cur.fetchall():
-            round_id, round_number, created_at = round_row
-            cur.execute(
-                """
-                SELECT tm.tournament_match_id,
-                       tm.agent1_id,
-                       tm.agent2_id,
-                       tm.agent1_score,
-                       tm.agent2_score,
-                       tm.result,
-                       tm.winner_agent_id,
-                       tm.metadata,
-                       tm.created_at
-                FROM tournament_matches tm
-                WHERE tm.tournament_id = %s AND tm.round_id = %s
-                ORDER BY tm.tournament_match_id
-                """,
-                (tournament_id, round_id),
-            )
-            match_rows = cur.fetchall()
-            matches = []
-            for match in match_rows:
-                raw_metadata = match[7]
-                if raw_metadata is None:
-                    metadata = None
-                elif isinstance(raw_metadata, str):
-                    try:
-                        metadata = json.loads(raw_metadata)
-                    except json.JSONDecodeError:
-                        metadata = raw_metadata
-                else:
-                    metadata = raw_metadata
-                matches.append(
-                    {
-                        "id": match[0],
-                        "agent1_id": match[1],
-                        "agent2_id": match[2],
-                        "agent1_score": int(match[3]) if match[3] is not None else 0,
-                        "agent2_score": int(match[4]) if match[4] is not None else 0,
-                        "result": match[5],
-                        "winner_agent_id": match[6],
-                        "metadata": metadata,
-                        "created_at": match[8].isoformat() if match[8] else None,
-                    }
-                )
-            rounds.append(
-                {
-                    "round_id": round_id,
-                    "round_number": round_number,
-                    "created_at": created_at.isoformat() if created_at else None,
-                    "matches": matches,
-                }
-            )
 
-        cur.execute(
-            """
-            SELECT ts.agent_id,
-                   ts.points,
-                   ts.rounds_played,
-                   COALESCE(g.groupname, 'Unknown') AS groupname,
-                   COALESCE(a.name, 'Unknown') AS agent_name
-            FROM tournament_standings ts
-            LEFT JOIN agents a ON ts.agent_id = a.agent_id
-            LEFT JOIN groups g ON a.group_id = g.group_id
-            WHERE ts.tournament_id = %s
-            ORDER BY ts.points DESC, ts.rounds_played DESC, groupname
-            """,
-            (tournament_id,),
-        )
-        standings = [
-            {
-                "agent_id": row[0],
-                "points": int(row[1]) if row[1] is not None else 0,
-                "rounds_played": row[2],
-                "groupname": row[3],
-                "agent_name": row[4],
-            }
-            for row in cur.fetchall()
-        ]
+        def generate():
+            yield '{"tournament":' + tournament_json + ',"rounds":['
+            for index, (round_json,) in enumerate(rounds_cur):
+                yield ("," if index else "") + round_json
+            yield '],"standings":' + standings_json + "}"
+
+        response = app.response_class(generate(), mimetype="application/json")
+        # The connection stays checked out until the server closes the response: after the last round is sent,
+        # when the client goes away, or straight away for a HEAD request whose body is never iterated.
+        response.call_on_close(lambda: release_db_connection(conn))
+        if etag:
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = "private, no-cache" # Browsers may keep it but must revalidate
+        streaming = True
+        return response
 
-        return jsonify(
-            {
-                "tournament": {
-                    "id": tournament[0],
-                    "name": tournament[1],
-                    "game": tournament[2],
-                    "rounds": tournament[3],
-                    "status": tournament[4],
-                    "created_at": tournament[5].isoformat() if tournament[5] else None,
-                },
-                "rounds": rounds,
-                "standings": standings,
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        if conn and not streaming:
+            release_db_connection(conn)
+
+# ==================== BACKGROUND JOB ENDPOINTS ====================
+
+@app.before_request
+def ensure_job_workers():
+    """Start this process's job worker threads on its first request (see jobs.py)."""
+    start_job_workers()
+
+
+@app.route("/api/jobs/<int:job_id>", methods=["GET"])
+def get_job_status(job_id):
+    """
+    Report the status and progress of a background job such as a contest run or a tournament.
+
+    Response:
+        200: {
+            "job": {
+                "id": int,
+                "kind": string ("contest" | "tournament"),
+                "status": string ("queued" | "running" | "completed" | "failed"),
+                "progress": {"done": int, "total": int | null},
+                "result": object | null,
+                "error": string | null,
+                "created_by": int | null,
+                "created_at": string,
+                "started_at": string | null,
+                "finished_at": string | null
             }
-        )
+        }
+        401: {"error": "Not authenticated"}
+        404: {"error": "Job not found"}
+    """
+    if "user_id" not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    conn = None
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor()
+        job = fetch_job(cur, job_id)
+        cur.close()
+
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+        if session.get("role") != "admin" and job["created_by"] not in (None, session["user_id"]):
+            return jsonify({"error": "Unauthorized"}), 401
+
+        return jsonify({"job": job}), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     finally:
         if conn:
-            conn.close()
+            release_db_connection(conn)
 
 if __name__ == "__main__":
     app.run(debug=True, port=5001)
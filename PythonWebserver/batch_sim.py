@@ -0,0 +1,235 @@
+import os
+
+import numpy as np
+
+from games.engine import AgentError, MoveTimeout
+from games.conn4.game import WIDTH as C4_WIDTH, HEIGHT as C4_HEIGHT
+from games.tictactoe import solver
+
+BATCH_MAX_GAMES = int(os.getenv("BATCH_MAX_GAMES", "5000")) # Most games one run_tests request may simulate per test agent
+BATCH_TIME_LIMIT = float(os.getenv("BATCH_TIME_LIMIT", "60")) # Seconds the agent gets for all of its moves in one batch
+
+# Board cells hold 1 for X (who moves first), -1 for O and 0 when empty; SYMBOLS[cell % 3] is the cell's symbol.
+SYMBOLS = np.array([" ", "X", "O"])
+
+
+def line_table(rows, cols, length):
+    """Flat cell indices of every straight line of length cells on a rows x cols board, shape (lines, length)."""
+    lines = []
+    for row in range(rows):
+        for col in range(cols):
+            for d_row, d_col in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                end_row, end_col = row + d_row * (length - 1), col + d_col * (length - 1)
+                if 0 <= end_row < rows and 0 <= end_col < cols:
+                    lines.append([(row + d_row * step) * cols + col + d_col * step for step in range(length)])
+    return np.array(lines, dtype=np.intp)
+
+
+def lines_through(lines, cells):
+    """
+    For every cell, the indices of the lines passing through it, shape (cells, most lines through one cell).
+    Short rows are padded by repeating one of the cell's own lines, which leaves "is any line complete" unchanged.
+    """
+    through = [[index for index, line in enumerate(lines.tolist()) if cell in line] for cell in range(cells)]
+    width = max(len(indices) for indices in through)
+    return np.array([indices + indices[:1] * (width - len(indices)) for indices in through], dtype=np.intp)
+
+
+class BatchGame:
+    """
+    N independent games of one board game advanced in lockstep: boards is an (N, rows, cols) int8 array.
+    Only the lines through the cell just played are checked, for all games of a ply at once.
+    """
+    rows = cols = length = actions = 0
+    LINES = LINES_THROUGH = None
+
+    def __init__(self, count):
+        self.boards = np.zeros((count, self.rows, self.cols), dtype=np.int8)
+        self.cells = self.boards.reshape(count, -1) # Flat view of the same memory
+
+    def legal_moves(self, games):
+        '''(len(games), actions) bool array of the moves each game allows.'''
+        raise NotImplementedError
+
+    def place(self, games, moves, value):
+        '''Play moves (one per game) for value and return the flat cells they filled.'''
+        raise NotImplementedError
+
+    def completes_line(self, games, cells, value):
+        '''Whether the token value just placed in each game's cell completes a line.'''
+        line_cells = self.LINES[self.LINES_THROUGH[cells]] # (games, lines through the cell, length)
+        values = self.cells[games[:, None, None], line_cells]
+        return (values.sum(axis=2) == self.length * value).any(axis=1)
+
+    def agent_args(self, game, value, last_move):
+        '''The arguments the game engine would pass to the move() of the agent playing value in game.'''
+        raise NotImplementedError
+
+
+class TicTacToeBatch(BatchGame):
+    rows = cols = length = 3
+    actions = 9
+    LINES = line_table(3, 3, 3)
+    LINES_THROUGH = lines_through(LINES, 9)
+    POWERS = np.array(solver.POWERS, dtype=np.intp)
+
+    def state_indices(self, games):
+        '''solver.state_index() of each game's board (cell % 3 is already the solver's digit).'''
+        return (self.cells[games] % 3) @ self.POWERS
+
+    def legal_moves(self, games):
+        return self.cells[games] == 0
+
+    def place(self, games, moves, value):
+        self.cells[games, moves] = value
+        return moves
+
+    def agent_args(self, game, value, last_move):
+        return [SYMBOLS[self.cells[game] % 3].tolist()]
+
+
+class Conn4Batch(BatchGame):
+    rows, cols, length = C4_HEIGHT, C4_WIDTH, 4 # Row 0 is the bottom of the board
+    actions = C4_WIDTH
+    LINES = line_table(C4_HEIGHT, C4_WIDTH, 4)
+    LINES_THROUGH = lines_through(LINES, C4_HEIGHT * C4_WIDTH)
+
+    def __init__(self, count):
+        super().__init__(count)
+        self.heights = np.zeros((count, self.cols), dtype=np.intp)
+
+    def legal_moves(self, games):
+        return self.heights[games] < self.rows
+
+    def place(self, games, moves, value):
+        rows = self.heights[games, moves]
+        self.boards[games, rows, moves] = value
+        self.heights[games, moves] += 1
+        return rows * self.cols + moves
+
+    def agent_args(self, game, value, last_move):
+        symbols = SYMBOLS[self.boards[game] % 3]
+        board = ["".join(symbols[:height, col]) for col, height in enumerate(self.heights[game].tolist())]
+        return ["X" if value == 1 else "O", board, int(last_move)]
+
+
+# A policy picks the test agent's move in each of the given games: policy(rng, batch, games, legal) -> moves.
+
+def random_policy(rng, batch, games, legal):
+    '''A uniformly random legal move per row of legal, like the RandomAgent test agents.'''
+    keys = rng.random(legal.shape)
+    keys[~legal] = -1.0
+    return keys.argmax(axis=1)
+
+
+def first_available_policy(rng, batch, games, legal):
+    '''The lowest legal move per row of legal, like FirstAvailableAgent.'''
+    return legal.argmax(axis=1)
+
+
+TTT_BEST_MOVE = np.frombuffer(solver.BEST_MOVE, dtype=np.int8)
+
+
+def perfect_policy(rng, batch, games, legal):
+    '''The solved table's move for each board, like the tictactoe PerfectAgent.'''
+    return TTT_BEST_MOVE[batch.state_indices(games)].astype(np.intp)
+
+
+BATCH_GAMES = {"tictactoe": TicTacToeBatch, "conn4": Conn4Batch}
+# Test agents (by game and class name in the games registry) that have a vectorized equivalent.
+BATCH_POLICIES = {
+    ("tictactoe", "RandomAgent"): random_policy,
+    ("tictactoe", "FirstAvailableAgent"): first_available_policy,
+    ("tictactoe", "PerfectAgent"): perfect_policy,
+    ("conn4", "C4RandomAgent"): random_policy,
+}
+
+
+def supports_batch(game, test_class):
+    return (game, test_class) in BATCH_POLICIES
+
+
+def simulate(game, test_class, agent, count, seed=None):
+    """
+    Play count games of game between agent and the vectorized version of test_class, and return win-rate statistics.
+
+    agent is a ProcessAgent started with count instances; instance i plays game i, and every ply it is asked for all
+    of its moves in one move_many() call. The agent moves first in the even-numbered games and second in the others.
+    As in the real engines an illegal move loses the game. Once the agent times out (e.g. its match budget for the
+    batch runs out) or fails with AgentError its worker is gone, so it forfeits every game still in progress.
+    """
+    batch = BATCH_GAMES[game](count)
+    policy = BATCH_POLICIES[(game, test_class)]
+    rng = np.random.default_rng(seed)
+
+    games = np.arange(count)
+    agent_value = np.where(games % 2 == 0, 1, -1).astype(np.int8)
+    outcome = np.zeros(count, dtype=np.int8) # 1 agent win, -1 agent loss, 0 draw
+    done = np.zeros(count, dtype=bool)
+    last_move = np.full(count, -1, dtype=np.intp)
+    illegal_moves = timeouts = agent_errors = 0
+
+    value = 1
+    for _ in range(batch.rows * batch.cols):
+        active = np.flatnonzero(~done)
+        if not active.size:
+            break
+        legal = batch.legal_moves(active)
+        agent_turn = agent_value[active] == value
+        moves = np.zeros(active.size, dtype=np.intp)
+        moves[~agent_turn] = policy(rng, batch, active[~agent_turn], legal[~agent_turn])
+
+        agent_rows = np.flatnonzero(agent_turn)
+        try:
+            replies = agent.move_many([
+                (int(game_index), batch.agent_args(game_index, value, last_move[game_index]))
+                for game_index in active[agent_rows]
+            ])
+        except (MoveTimeout, AgentError) as e:
+            if isinstance(e, MoveTimeout):
+                timeouts += active.size
+            else:
+                agent_errors += active.size
+            outcome[active] = -1
+            done[active] = True
+            break
+        valid = np.ones(active.size, dtype=bool)
+        for row, reply in zip(agent_rows.tolist(), replies):
+            if isinstance(reply, int) and 0 <= reply < batch.actions and legal[row, reply]:
+                moves[row] = reply
+            else:
+                valid[row] = False
+                illegal_moves += 1
+        forfeited = active[~valid]
+        outcome[forfeited] = -1
+        done[forfeited] = True
+
+        playing, moves = active[valid], moves[valid]
+        cells = batch.place(playing, moves, value)
+        won = playing[batch.completes_line(playing, cells, value)]
+        outcome[won] = np.where(agent_value[won] == value, 1, -1)
+        done[won] = True
+        last_move[playing] = moves
+        value = -value
+
+    def summary(selected):
+        results = outcome[selected]
+        wins, losses = int((results == 1).sum()), int((results == -1).sum())
+        return {
+            "games": int(results.size),
+            "wins": wins,
+            "losses": losses,
+            "draws": int(results.size) - wins - losses,
+            "win_rate": round(wins / results.size, 4) if results.size else 0.0,
+        }
+
+    stats = summary(games)
+    stats.update({
+        "moving_first": summary(games[agent_value == 1]),
+        "moving_second": summary(games[agent_value == -1]),
+        "illegal_moves": illegal_moves,
+        "timeouts": timeouts,
+        "agent_errors": agent_errors,
+        "seed": seed,
+    })
+    return stats
@@ -0,0 +1,110 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions, pool
+
+DB_URL = os.getenv("DATABASE_URL") # Setup the DB url in a .env
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1")) # Connections opened up front
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10")) # Upper bound per process, keep workers * this below Postgres max_connections
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10")) # Seconds to wait for a free connection before failing
+DB_POOL_PING_AFTER = float(os.getenv("DB_POOL_PING_AFTER", "30")) # Idle seconds after which a connection is pinged before reuse
+
+_pool = None
+_pool_pid = None
+_pool_slots = None
+_pool_lock = threading.Lock()
+_inherited_pools = [] # Pools copied into a forked child; kept referenced so their parent's sockets are never closed here
+_last_released = {} # id(conn) -> time.monotonic() when the connection went back to the pool
+
+
+def get_pool():
+    """Return this process's connection pool, creating it on first use (or after a fork)."""
+    global _pool, _pool_pid, _pool_slots
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            if _pool is not None:
+                _inherited_pools.append(_pool)
+            _pool = pool.ThreadedConnectionPool(DB_POOL_MIN, DB_POOL_MAX, DB_URL)
+            _pool_pid = os.getpid()
+            _pool_slots = threading.BoundedSemaphore(DB_POOL_MAX)
+            _last_released.clear()
+        return _pool
+
+
+def _is_healthy(conn):
+    """Cheap liveness check; connections idle for a while also get a SELECT 1 round trip."""
+    if conn.closed:
+        return False
+    if conn.info.transaction_status == extensions.TRANSACTION_STATUS_UNKNOWN:
+        return False
+    if time.monotonic() - _last_released.get(id(conn), 0) < DB_POOL_PING_AFTER:
+        return True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+
+def get_db_connection():
+    """
+    Check a connection out of the process-wide pool, waiting up to DB_POOL_TIMEOUT seconds for one.
+    Every connection must be handed back with release_db_connection(), or use db_connection().
+
+    Raises:
+        psycopg2.pool.PoolError: No connection became free in time.
+    """
+    connection_pool = get_pool()
+    slots = _pool_slots
+    if not slots.acquire(timeout=DB_POOL_TIMEOUT):
+        raise pool.PoolError("Timed out waiting for a database connection")
+    try:
+        for _ in range(DB_POOL_MAX + 1):
+            conn = connection_pool.getconn()
+            if _is_healthy(conn):
+                return conn
+            # Broken connections are closed and replaced by a fresh one on the next getconn().
+            _last_released.pop(id(conn), None)
+            connection_pool.putconn(conn, close=True)
+        raise pool.PoolError("No healthy database connection available")
+    except Exception:
+        slots.release()
+        raise
+
+
+def release_db_connection(conn):
+    """Return a connection to the pool, rolling back anything the caller left uncommitted."""
+    connection_pool = get_pool()
+    close = conn.closed != 0
+    if not close:
+        try:
+            if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            if conn.autocommit:
+                conn.autocommit = False
+        except psycopg2.Error:
+            close = True
+    if close:
+        _last_released.pop(id(conn), None)
+    else:
+        _last_released[id(conn)] = time.monotonic()
+    connection_pool.putconn(conn, close=close)
+    _pool_slots.release()
+
+
+@contextmanager
+def db_connection():
+    """
+    Context manager around get_db_connection()/release_db_connection().
+    Callers commit explicitly; uncommitted work is rolled back when the block exits.
+    """
+    conn = get_db_connection()
+    try:
+        yield conn
+    finally:
+        release_db_connection(conn)
@@ -1,5 +1,8 @@
 import psycopg2
 import os
+import sys
+
+from migrate import apply_migrations
 
 DB_URL = os.getenv("DATABASE_URL")
 user_name = os.getenv("POSTGRES_USER", "postgres")
@@ -8,7 +11,7 @@ host = "db"
 port = "5432"
 db_name = "test"
 
-# Step 1: connect to default 'postgres' DB to create/drop 'test'
+# Step 1: connect to default 'postgres' DB to create (or, with --reset, drop and recreate) 'test'
 conn = psycopg2.connect(
     dbname="postgres",
     user=user_name,
@@ -20,18 +23,21 @@ conn = psycopg2.connect(
 conn.autocommit = True
 cur = conn.cursor()
 
-# Drop + recreate database
+# Create the database if needed; --reset drops it first, which deletes all data
 cur.execute(f"SELECT 1 FROM pg_database WHERE datname = '{db_name}'")
-if cur.fetchone():
+exists = cur.fetchone() is not None
+if exists and "--reset" in sys.argv[1:]:
     cur.execute(f"DROP DATABASE {db_name}")
-cur.execute(f"CREATE DATABASE {db_name}")
+    exists = False
+if not exists:
+    cur.execute(f"CREATE DATABASE {db_name}")
 
 
 # After creating database, close the first connection properly
 cur.close()
 conn.close()
 
-# Step 2: connect directly to 'test' and build schema
+# Step 2: connect directly to 'test'
 conn = psycopg2.connect(
     dbname=db_name,
     user=user_name,
@@ -39,161 +45,9 @@ conn = psycopg2.connect(
     host=host,
     port=port
 )
-cur = conn.cursor()
-
-# Schema
-# Drop existing tables first (in correct order due to foreign key constraints)
-cur.execute("""
-DROP TABLE IF EXISTS contest_actions CASCADE;
-DROP TABLE IF EXISTS contests CASCADE;
-DROP TABLE IF EXISTS agent_records CASCADE;
-DROP TABLE IF EXISTS tournament_matches CASCADE;
-DROP TABLE IF EXISTS tournament_rounds CASCADE;
-DROP TABLE IF EXISTS tournament_standings CASCADE;
-DROP TABLE IF EXISTS tournaments CASCADE;
-DROP TABLE IF EXISTS matches CASCADE;
-DROP TABLE IF EXISTS agents CASCADE;
-DROP TABLE IF EXISTS users CASCADE;
-DROP TABLE IF EXISTS groups CASCADE;
-""")
-
-# Database setup code
-# NOTE: Serial is better instead of integer, as serial is an automatic incrementer for user ID!
-cur.execute("""
-CREATE TABLE groups (
-    group_id SERIAL PRIMARY KEY,
-    groupname VARCHAR UNIQUE NOT NULL
-);
-""")
-
-cur.execute("""
-CREATE TABLE users (
-    user_id SERIAL PRIMARY KEY,
-    username VARCHAR(50) UNIQUE NOT NULL,
-    email VARCHAR(50) UNIQUE NOT NULL,
-    hashed_password TEXT NOT NULL,
-    role VARCHAR(20) NOT NULL,
-    group_id INT REFERENCES groups(group_id) ON DELETE SET NULL
-);
-""")
-
-cur.execute("""
-CREATE TABLE agents (
-    agent_id SERIAL PRIMARY KEY,
-    group_id INT NOT NULL REFERENCES groups(group_id) ON DELETE CASCADE,
-    name VARCHAR(50) NOT NULL,
-    game varchar(50) NOT NULL,
-    file_path varchar(255),
-    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
-);
-""")
-
-cur.execute("""
-CREATE TABLE matches (
-    match_id SERIAL PRIMARY KEY,
-    agent1_id INT NOT NULL REFERENCES agents(agent_id) ON DELETE CASCADE,
-    agent2_id INT NOT NULL REFERENCES agents(agent_id) ON DELETE CASCADE,
-    group1_id INT NOT NULL REFERENCES groups(group_id) ON DELETE CASCADE,
-    group2_id INT NOT NULL REFERENCES groups(group_id) ON DELETE CASCADE,
-    played_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
-);
-""")
-
-# Contest tables for FR3.x requirements
-cur.execute("""
-CREATE TABLE contests (
-    contest_id SERIAL PRIMARY KEY,
-    name VARCHAR(100) NOT NULL,
-    game VARCHAR(50) NOT NULL,
-    agent1_id INT NOT NULL REFERENCES agents(agent_id) ON DELETE CASCADE,
-    agent2_id INT NOT NULL REFERENCES agents(agent_id) ON DELETE CASCADE,
-    winner_id INT REFERENCES agents(agent_id) ON DELETE SET NULL,
-    status VARCHAR(20) NOT NULL DEFAULT 'pending',
-    created_by INT REFERENCES users(user_id) ON DELETE SET NULL,
-    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
-    completed_at TIMESTAMPTZ
-);
-""")
 
-cur.execute("""
-CREATE TABLE contest_actions (
-    action_id SERIAL PRIMARY KEY,
-    contest_id INT NOT NULL REFERENCES contests(contest_id) ON DELETE CASCADE,
-    move_number INT NOT NULL,
-    agent_id INT NOT NULL REFERENCES agents(agent_id) ON DELETE CASCADE,
-    action_data TEXT NOT NULL,
-    board_state TEXT NOT NULL,
-    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
-);
-""")
-
-cur.execute("""
-CREATE TABLE agent_records (
-    record_id SERIAL PRIMARY KEY,
-    agent_id INT NOT NULL REFERENCES agents(agent_id) ON DELETE CASCADE,
-    wins INT DEFAULT 0,
-    losses INT DEFAULT 0,
-    draws INT DEFAULT 0,
-    UNIQUE(agent_id)
-);
-""")
-
-# Tournament related tables
-# Note: Added round_number to tournament_matches for easier querying
-cur.execute("""
-CREATE TABLE tournaments (
-    tournament_id SERIAL PRIMARY KEY,
-    name VARCHAR(100) NOT NULL,
-    game VARCHAR(50) NOT NULL,
-    rounds INT,
-    status VARCHAR(20) NOT NULL DEFAULT 'pending',
-    created_by INT REFERENCES users(user_id),
-    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
-);
-""")
-
-cur.execute("""
-CREATE TABLE tournament_rounds (
-    round_id SERIAL PRIMARY KEY,
-    tournament_id INT NOT NULL REFERENCES tournaments(tournament_id) ON DELETE CASCADE,
-    round_number INT NOT NULL,
-    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
-    UNIQUE (tournament_id, round_number)
-);
-""")
-
-cur.execute("""
-CREATE TABLE tournament_matches (
-    tournament_match_id SERIAL PRIMARY KEY,
-    tournament_id INT NOT NULL REFERENCES tournaments(tournament_id) ON DELETE CASCADE,
-    round_id INT NOT NULL REFERENCES tournament_rounds(round_id) ON DELETE CASCADE,
-    round_number INT NOT NULL,
-    agent1_id INT NOT NULL REFERENCES agents(agent_id),
-    agent2_id INT REFERENCES agents(agent_id),
-    agent1_score INTEGER DEFAULT 0,
-    agent2_score INTEGER DEFAULT 0,
-    result VARCHAR(20) DEFAULT 'pending',
-    winner_agent_id INT REFERENCES agents(agent_id),
-    metadata JSONB,
-    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
-    UNIQUE (tournament_id, round_number, agent1_id, agent2_id)
-);
-""")
-
-cur.execute("""
-CREATE TABLE tournament_standings (
-    standing_id SERIAL PRIMARY KEY,
-    tournament_id INT NOT NULL REFERENCES tournaments(tournament_id) ON DELETE CASCADE,
-    agent_id INT NOT NULL REFERENCES agents(agent_id) ON DELETE CASCADE,
-    points INTEGER DEFAULT 0,
-    rounds_played INT DEFAULT 0,
-    last_updated TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
-    UNIQUE (tournament_id, agent_id)
-);
-""")
-
-conn.commit()
-cur.close()
+# Step 3: bring the schema up to date. Tables and indexes live in migrations/*.sql; see migrate.py
+apply_migrations(conn)
 conn.close()
 
 print("Database setup complete.")
@@ -1,5 +1,64 @@
 import random
+import time
+from games.conn4.game import WIDTH, HEIGHT, COLUMN_BITS, connects_four
+from games.conn4.book import default_book
+
+# Centre columns take part in the most fours, so searching them first gives the earliest cutoffs.
+CENTER_ORDER = sorted(range(WIDTH), key=lambda col: abs(col - WIDTH // 2))
+PAYOFFS = [0, 1, 3, 6, 0] # Score of a four holding 1, 2 or 3 tokens of one player and none of the other's
+WIN_SCORE = 2 ** 16 # Minus the number of tokens on the board, so quicker wins score higher
+EXACT, LOWER, UPPER = 0, 1, 2 # How a transposition table value bounds the true value
+
+
+def four_windows():
+    '''The cells (in games.conn4.game's bitboard layout) of each of the 69 fours a player can complete.'''
+    windows = []
+    for col in range(WIDTH):
+        for row in range(HEIGHT):
+            for d_col, d_row in ((1, 0), (0, 1), (1, 1), (1, -1)):
+                if 0 <= col + 3 * d_col < WIDTH and 0 <= row + 3 * d_row < HEIGHT:
+                    windows.append([(col + k * d_col) * COLUMN_BITS + row + k * d_row for k in range(4)])
+    return windows
+
+
+WINDOWS = four_windows()
+# For every cell, the windows that pass through it (at most 13); only these change when a token lands there.
+CELL_WINDOWS = [[index for index, window in enumerate(WINDOWS) if cell in window] for cell in range(WIDTH * COLUMN_BITS)]
+# WINDOW_SCORE[mine][theirs]: what a window holding mine of player 0's tokens and theirs of player 1's adds to
+# the evaluation from player 0's point of view.
+WINDOW_SCORE = [
+    [PAYOFFS[mine] if not theirs else -PAYOFFS[theirs] if not mine else 0 for theirs in range(5)]
+    for mine in range(5)
+]
+# Zobrist keys: one random 64-bit number per (player, cell); a position's key is the XOR of its tokens' keys.
+# The same tokens can be reached with either player to move (who moved first depends on the game), so the
+# transposition table key also XORs in SIDE_TO_MOVE[player].
+_keys = random.Random(4)
+ZOBRIST = [[_keys.getrandbits(64) for _ in range(WIDTH * COLUMN_BITS)] for _ in range(2)]
+SIDE_TO_MOVE = [0, _keys.getrandbits(64)]
+
+
+class _OutOfTime(Exception):
+    '''Raised inside the search when the move's time budget is spent.'''
+
+
 class C4MinimaxAgent:
+    '''
+    Alpha-beta (negamax) search with centre-first move ordering, iterative deepening under a time budget
+    and a fixed-size Zobrist-hashed transposition table that is kept between the moves of a game.
+    Player 0 in the search is always this agent, player 1 its opponent.
+
+    The evaluation is a running sum: every window keeps its (player 0, player 1) token counts, and making or
+    unmaking a move only rescores the windows through that cell.
+
+    Positions in the opening book (games.conn4.book) are answered from it without searching.
+    '''
+    time_budget = 0.25 # Seconds of search per move
+    table_size = 1 << 16 # Transposition table entries, a power of two
+    use_book = True # The book builder turns this off to search the positions it stores
+
+    def __init__(self):
+        self.table = [None] * self.table_size
 
     def move(self, symbol, board, last_move):
          '''
@@ -9,68 +68,150 @@ class C4MinimaxAgent:
          last_move is the column that the opponent last droped a piece into (or -1 if it is the firts move of the game).
          This method should return the column the agent would like to drop their token into.
          '''
-         return self.minimax(symbol,board,2)[0]
+         self.load(symbol, board)
+         book = default_book() if self.use_book else None
+         if book is not None:
+             entry = book.probe(self.bitboards[0], self.bitboards[0] | self.bitboards[1])
+             if entry is not None and entry.move >= 0 and self.heights[entry.move] < HEIGHT:
+                 return entry.move
+         return self.search(self.time_budget)[1]
 
-    def minimax(self, symbol, board, ply):
+    def search(self, time_budget):
         '''
-        return a pair (move, value), 
-        where move is the optimal move, that gives value.
+        Iterative deepening from the loaded position, player 0 to move, for up to time_budget seconds.
+        Returns (value, move, depth) of the deepest search that finished.
         '''
-        val = self.evaluate(symbol,board)
-        if ply == 0 or val > 2**12 or val < -2**12:#terminal position
-            return (None, val)
-        best_move = 0
-        best_value = -2**32
-        for move in range(7):
-            if len(board[move]) < 6:
-                board[move] = board[move]+symbol
-                (_,value) = self.maximin(symbol, board, ply-1)
-                if value > best_value or (value == best_value and random.random() < 0.5):
-                    best_value = value
-                    best_move = move
-                board[move] = board[move][:-1]
-        return (best_move, best_value)        
-
-    def maximin(self, symbol, board, ply):
+        legal = [col for col in CENTER_ORDER if self.heights[col] < HEIGHT]
+        best_value, best_move, best_depth = 0, legal[0], 0
+        self.deadline = time.monotonic() + time_budget
+        self.nodes = 0
+        for depth in range(1, WIDTH * HEIGHT - self.moves_played + 1):
+            try:
+                value, move = self.negamax(0, depth, -WIN_SCORE, WIN_SCORE)
+            except _OutOfTime:
+                break # Keep the move of the last depth that finished
+            best_value, best_move, best_depth = value, move, depth
+            if self.is_proven(value, depth):
+                break # Searching deeper cannot change the result
+        return best_value, best_move, best_depth
+
+    def is_proven(self, value, depth):
+        '''Whether a search of depth plies from the loaded position returning value found the game's result.'''
+        return abs(value) > WIN_SCORE - WIDTH * HEIGHT - 1 or depth >= WIDTH * HEIGHT - self.moves_played
+
+    def reset(self):
+        self.bitboards = [0, 0]
+        self.heights = [0] * WIDTH
+        self.moves_played = 0
+        self.key = 0
+        self.counts = [[0] * len(WINDOWS), [0] * len(WINDOWS)] # Tokens of each player in each window
+        self.score = 0 # evaluate(0), kept up to date by make_move() and unmake_move()
+
+    def load(self, symbol, board):
+        '''Builds the bitboards, column heights, Zobrist key and window counts of the board.'''
+        self.reset()
+        for col, column in enumerate(board):
+            for token in column:
+                self.make_move(col, 0 if token == symbol else 1)
+
+    def play_sequence(self, moves):
+        '''Loads the position after the columns in moves are played from the empty board, player 0 to move.'''
+        self.reset()
+        for ply, col in enumerate(moves):
+            self.make_move(col, (len(moves) - ply) % 2)
+
+    def make_move(self, col, player):
+        cell = col * COLUMN_BITS + self.heights[col]
+        self.bitboards[player] |= 1 << cell
+        self.key ^= ZOBRIST[player][cell]
+        self.heights[col] += 1
+        self.moves_played += 1
+        mine, theirs = self.counts
+        counts = self.counts[player]
+        score = self.score
+        for window in CELL_WINDOWS[cell]:
+            score -= WINDOW_SCORE[mine[window]][theirs[window]]
+            counts[window] += 1
+            score += WINDOW_SCORE[mine[window]][theirs[window]]
+        self.score = score
+
+    def unmake_move(self, col, player):
+        self.heights[col] -= 1
+        self.moves_played -= 1
+        cell = col * COLUMN_BITS + self.heights[col]
+        self.bitboards[player] ^= 1 << cell
+        self.key ^= ZOBRIST[player][cell]
+        mine, theirs = self.counts
+        counts = self.counts[player]
+        score = self.score
+        for window in CELL_WINDOWS[cell]:
+            score -= WINDOW_SCORE[mine[window]][theirs[window]]
+            counts[window] -= 1
+            score += WINDOW_SCORE[mine[window]][theirs[window]]
+        self.score = score
+
+    def negamax(self, player, depth, alpha, beta):
         '''
-        symbol is the symbol of this agent, (i.e. not the agent being maximized)
+        Returns (value, move) for player to move, searching depth plies.
+        Values are from player's point of view and exact when they fall strictly between alpha and beta.
         '''
-        val = self.evaluate(symbol, board)
-        if ply == 0 or val > 2**12 or val < -2**12:#terminal position
-            return (None, val)
-        best_move = 0
-        best_value = 2**32
-        for move in range(7):
-            if len(board[move]) < 6:
-                board[move] = board[move]+chr(ord(symbol)+1)
-                (_,value) = self.minimax(symbol, board, ply-1)
-                if value < best_value or (value == best_value and random.random() < 0.5):
-                    best_value = value
-                    best_move = move
-                board[move] = board[move][:-1]
-        return (best_move, best_value)        
-
-    def evaluate(self, symbol, board):
+        self.nodes += 1
+        if self.nodes & 1023 == 0 and time.monotonic() > self.deadline:
+            raise _OutOfTime()
+        if self.moves_played == WIDTH * HEIGHT:
+            return 0, None # Draw
+        if depth == 0:
+            return self.evaluate(player), None
+
+        original_alpha = alpha
+        key = self.key ^ SIDE_TO_MOVE[player]
+        slot = key & (self.table_size - 1)
+        entry = self.table[slot]
+        table_move = None
+        if entry is not None and entry[0] == key:
+            _, entry_depth, entry_value, entry_flag, table_move = entry
+            if entry_depth >= depth:
+                if entry_flag == EXACT:
+                    return entry_value, table_move
+                if entry_flag == LOWER:
+                    alpha = max(alpha, entry_value)
+                else:
+                    beta = min(beta, entry_value)
+                if alpha >= beta:
+                    return entry_value, table_move
+
+        order = CENTER_ORDER if table_move is None else [table_move] + [col for col in CENTER_ORDER if col != table_move]
+        best_value, best_move = -WIN_SCORE - 1, None
+        for col in order:
+            if self.heights[col] == HEIGHT:
+                continue
+            self.make_move(col, player)
+            if connects_four(self.bitboards[player]):
+                value = WIN_SCORE - self.moves_played
+            else:
+                value = -self.negamax(1 - player, depth - 1, -beta, -alpha)[0]
+            self.unmake_move(col, player)
+            if value > best_value:
+                best_value, best_move = value, col
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= original_alpha:
+            flag = UPPER
+        elif best_value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table[slot] = (key, depth, best_value, flag, best_move)
+        return best_value, best_move
+
+    def evaluate(self, player):
         '''
-        evaluates the quality of the board for the agent represented by symbol.
-        The evaluation metric is: 
-        sum_{viable symb fours: f} e(f) - sum_viable opp fours:f} e(f), 
-        where e(f) is 1,3,6,400 if there are 1,2,3,4 tokens on the four.
-        Higher values are better.
+        evaluates the quality of the board for player.
+        The evaluation metric is:
+        sum_{viable player fours: f} e(f) - sum_{viable opponent fours: f} e(f),
+        where e(f) is 1,3,6 if there are 1,2,3 tokens on the four.
+        Higher values are better. The sum is maintained incrementally, so this is a lookup.
         '''
-        dirs = [(0,1),(1,1),(1,0),(1,-1)]
-        payoffs = [0,1,3,6,2**16]
-        (sym_val,other_val) = (0,0)
-        for i in range(7):
-            for j in range(6):
-                for (x,y) in dirs:
-                    (sym_count,other_count) = (0,0)
-                    k = 0
-                    while i+k*x < 7 and j+k*y < 6 and j+k*y >= 0 and k < 4: 
-                        if j+k*y < len(board[i+k*x]):
-                            if board[i+k*x][j+k*y] == symbol: sym_count = sym_count+1
-                            else: other_count = other_count+1
-                        k += 1
-                    if k == 4 and other_count == 0: sym_val += payoffs[sym_count]
-                    if k == 4 and sym_count == 0: other_val += payoffs[other_count]
-        return sym_val - other_val
\ No newline at end of file
+        return self.score if player == 0 else -self.score
@@ -0,0 +1,329 @@
+'''
+Opening book and solved-position cache for Connect 4, stored as an mmap'd hash file.
+
+Entries are keyed by the position a move sequence reaches rather than by the sequence itself, so transpositions
+("3 4 2" and "2 4 3") share one entry, and a position and its mirror image are stored once. Each entry holds the
+reference agent's (agents/test/minimax.py) search result for the player to move: its negamax value, best move and
+search depth, and whether the value is proven, i.e. the search reached a forced result or the end of the game.
+
+The file is a header followed by an open-addressing hash table of fixed-size slots, so opening it costs nothing
+and a lookup reads one or two slots straight from the page cache, however many processes share the file.
+Build or extend it offline with
+
+    python -m games.conn4.book build [--plies 6] [--time 0.5] [--games FILE] [--workers N]
+
+and inspect it with "python -m games.conn4.book probe 3 3 4" or "python -m games.conn4.book stats".
+'''
+import argparse
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+from collections import namedtuple
+from games.conn4.game import WIDTH, HEIGHT, COLUMN_BITS, connects_four
+
+BOOK_PATH = os.getenv("C4_BOOK_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")) # Book read by the conn4 reference agents
+MINIMAX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "agents", "test", "minimax.py")
+
+MAGIC = b"C4BK"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQQ") # magic, version, slot size, slot count, entry count
+SLOT = struct.Struct("<QiBbB") # key (0 when empty), value, depth, move, flags
+SOLVED = 1 # flags bit: value is the proven game result, not a heuristic estimate
+HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+
+BOTTOM = sum(1 << (col * COLUMN_BITS) for col in range(WIDTH)) # Lowest cell of every column
+COLUMN_MASK = (1 << COLUMN_BITS) - 1
+
+BookEntry = namedtuple("BookEntry", ["value", "move", "depth", "solved"])
+
+
+def position_key(current, mask):
+    '''
+    A unique non-zero number for the position where current holds the tokens of the player to move and mask every
+    token: adding BOTTOM sets the cell above each column's top token, which marks the heights inside current.
+    '''
+    return current + mask + BOTTOM
+
+
+def mirror(bitboard):
+    '''The bitboard reflected left to right.'''
+    mirrored = 0
+    for col in range(WIDTH):
+        mirrored |= ((bitboard >> (col * COLUMN_BITS)) & COLUMN_MASK) << ((WIDTH - 1 - col) * COLUMN_BITS)
+    return mirrored
+
+
+def canonical_key(current, mask):
+    '''(key, mirrored): the smaller of the position's key and its mirror image's, and whether that was the mirror.'''
+    key = position_key(current, mask)
+    mirrored_key = position_key(mirror(current), mirror(mask))
+    return (mirrored_key, True) if mirrored_key < key else (key, False)
+
+
+def play(current, mask, col):
+    '''The (current, mask) after the player to move drops a token in col, which must not be full.'''
+    return current ^ mask, mask | (mask + (1 << (col * COLUMN_BITS)))
+
+
+def play_sequence(moves):
+    '''
+    The (current, mask) reached by playing the columns in moves from the empty board.
+    Raises ValueError if a move is not a legal column or is played after the game was won.
+    '''
+    current = mask = 0
+    for ply, col in enumerate(moves):
+        if ply and connects_four(current ^ mask):
+            raise ValueError(f"Move {ply} is played after the game was won")
+        if not 0 <= col < WIDTH or mask >> (col * COLUMN_BITS + HEIGHT - 1) & 1:
+            raise ValueError(f"Move {ply} ({col!r}) is not a legal column")
+        current, mask = play(current, mask, col)
+    return current, mask
+
+
+def _slot_index(key, bits):
+    return ((key * HASH_MULTIPLIER) & 0xFFFFFFFFFFFFFFFF) >> (64 - bits)
+
+
+class Book:
+    '''
+    A read-only view of a book file. probe() works on bitboards (as in games.conn4.game, with the player to move's
+    tokens in current), lookup() on a sequence of columns played from the empty board.
+    '''
+
+    def __init__(self, path=BOOK_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, slot_size, self.slots, self.count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION or slot_size != SLOT.size:
+            self.data.close()
+            raise ValueError(f"{path} is not a version {VERSION} Connect 4 book")
+        self.bits = self.slots.bit_length() - 1
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.data.close()
+
+    def probe(self, current, mask):
+        '''The BookEntry for the position, with its move oriented like the position, or None if it is not stored.'''
+        key, mirrored = canonical_key(current, mask)
+        index = _slot_index(key, self.bits)
+        while True:
+            slot_key, value, depth, move, flags = SLOT.unpack_from(self.data, HEADER.size + index * SLOT.size)
+            if slot_key == key:
+                if mirrored and move >= 0:
+                    move = WIDTH - 1 - move
+                return BookEntry(value, move, depth, bool(flags & SOLVED))
+            if slot_key == 0:
+                return None
+            index = (index + 1) & (self.slots - 1)
+
+    def lookup(self, moves):
+        return self.probe(*play_sequence(moves))
+
+    def entries(self):
+        '''{canonical key: BookEntry} of every stored position, moves in the canonical orientation.'''
+        entries = {}
+        for index in range(self.slots):
+            key, value, depth, move, flags = SLOT.unpack_from(self.data, HEADER.size + index * SLOT.size)
+            if key:
+                entries[key] = BookEntry(value, move, depth, bool(flags & SOLVED))
+        return entries
+
+
+def write_book(path, entries):
+    '''
+    Write {canonical key: BookEntry} to path as a book file with the table at most half full.
+    The file is written next to path and renamed over it, so processes that have the old book mapped keep reading it.
+    '''
+    slots = 16
+    while slots < 2 * len(entries):
+        slots *= 2
+    bits = slots.bit_length() - 1
+    table = bytearray(HEADER.size + slots * SLOT.size)
+    HEADER.pack_into(table, 0, MAGIC, VERSION, SLOT.size, slots, len(entries))
+    taken = bytearray(slots)
+    for key, entry in entries.items():
+        index = _slot_index(key, bits)
+        while taken[index]:
+            index = (index + 1) & (slots - 1)
+        taken[index] = 1
+        move = -1 if entry.move is None else entry.move
+        SLOT.pack_into(table, HEADER.size + index * SLOT.size, key, entry.value, entry.depth, move, SOLVED if entry.solved else 0)
+    temporary = f"{path}.tmp{os.getpid()}"
+    with open(temporary, "wb") as f:
+        f.write(table)
+    os.replace(temporary, path)
+
+
+_default_book = False # Not opened yet; None once BOOK_PATH turned out to be missing or unreadable
+
+
+def default_book():
+    '''The Book at BOOK_PATH, opened on first use, or None if there is no usable book.'''
+    global _default_book
+    if _default_book is False:
+        try:
+            _default_book = Book(BOOK_PATH)
+        except (OSError, ValueError):
+            _default_book = None
+    return _default_book
+
+
+# Building
+
+def opening_positions(plies):
+    '''
+    {canonical key: move sequence} of every position reachable in at most plies moves in which nobody has won yet,
+    one sequence per position.
+    '''
+    positions = {}
+    frontier = [((), 0, 0)]
+    for ply in range(plies + 1):
+        next_frontier = []
+        for moves, current, mask in frontier:
+            key, _ = canonical_key(current, mask)
+            if key in positions:
+                continue
+            positions[key] = moves
+            if ply == plies:
+                continue
+            for col in range(WIDTH):
+                if mask >> (col * COLUMN_BITS + HEIGHT - 1) & 1:
+                    continue
+                after, after_mask = play(current, mask, col)
+                if not connects_four(after ^ after_mask):
+                    next_frontier.append((moves + (col,), after, after_mask))
+        frontier = next_frontier
+    return positions
+
+
+def game_positions(lines, min_ply):
+    '''
+    {canonical key: move sequence} of the positions from ply min_ply onwards in recorded games, one game per line
+    given as its columns (e.g. "3342" or a contest's JSON move list). Games stop at the first illegal or winning move.
+    '''
+    positions = {}
+    for line in lines:
+        columns = [int(digit) for digit in re.findall(r"\d+", line)]
+        current = mask = 0
+        for ply, col in enumerate(columns):
+            if ply >= min_ply:
+                positions.setdefault(canonical_key(current, mask)[0], tuple(columns[:ply]))
+            if not 0 <= col < WIDTH or mask >> (col * COLUMN_BITS + HEIGHT - 1) & 1:
+                break
+            current, mask = play(current, mask, col)
+            if connects_four(current ^ mask):
+                break
+    return positions
+
+
+_worker_agent = None
+
+
+def _start_worker(time_budget):
+    '''Pool initializer: one reference agent per process, searching one position at a time.'''
+    global _worker_agent
+    from agent_loader import load_class_from_file
+    _worker_agent = load_class_from_file(MINIMAX_PATH, "C4MinimaxAgent")()
+    _worker_agent.use_book = False
+    _worker_agent.time_budget = time_budget
+
+
+def _analyse(moves):
+    '''(canonical key, BookEntry) of the position after moves, searched by the worker's agent.'''
+    agent = _worker_agent
+    # Start every position with an empty transposition table, so an entry depends only on its own position and not
+    # on which positions this worker happened to search before it.
+    agent.table = [None] * agent.table_size
+    agent.play_sequence(moves)
+    current, mask = agent.bitboards[0], agent.bitboards[0] | agent.bitboards[1]
+    key, mirrored = canonical_key(current, mask)
+    value, move, depth = agent.search(agent.time_budget)
+    solved = agent.is_proven(value, depth)
+    if mirrored:
+        move = WIDTH - 1 - move
+    return key, BookEntry(value, move, depth, solved)
+
+
+def build(path, positions, time_budget, workers=None, existing=None, progress=None):
+    '''
+    Search every {canonical key: move sequence} in positions with time_budget seconds each, spread over workers
+    processes (all cores by default), and write them together with the existing entries to path.
+    Positions that existing already has solved, or searched at least as deep, keep their entry.
+    Returns the number of positions searched.
+    '''
+    from multiprocessing import Pool
+    entries = dict(existing or {})
+    todo = [moves for key, moves in positions.items() if key not in entries or not entries[key].solved]
+    searched = 0
+    with Pool(workers or os.cpu_count(), initializer=_start_worker, initargs=(time_budget,)) as pool:
+        for key, entry in pool.imap_unordered(_analyse, todo, chunksize=16):
+            old = entries.get(key)
+            if old is None or entry.solved or (not old.solved and entry.depth >= old.depth):
+                entries[key] = entry
+            searched += 1
+            if progress is not None and searched % 500 == 0:
+                progress(searched, len(todo))
+    write_book(path, entries)
+    return searched
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m games.conn4.book", description="Build and query the Connect 4 opening book.")
+    parser.add_argument("--book", default=BOOK_PATH, help="book file (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="search positions on every core and add them to the book")
+    build_parser.add_argument("--plies", type=int, default=6, help="add every position up to this many moves in (default: %(default)s)")
+    build_parser.add_argument("--time", type=float, default=0.5, help="seconds of search per position (default: %(default)s)")
+    build_parser.add_argument("--games", help="file of recorded games, one per line, whose later positions are added too")
+    build_parser.add_argument("--min-ply", type=int, default=20, help="first ply of --games positions to add (default: %(default)s)")
+    build_parser.add_argument("--workers", type=int, help="processes to search with (default: one per core)")
+    build_parser.add_argument("--fresh", action="store_true", help="discard the existing book instead of extending it")
+    probe_parser = commands.add_parser("probe", help="print the book entry after a sequence of columns")
+    probe_parser.add_argument("moves", type=int, nargs="*")
+    commands.add_parser("stats", help="print the book's size and how many entries are solved")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        positions = opening_positions(args.plies)
+        if args.games:
+            with open(args.games) as f:
+                for key, moves in game_positions(f, args.min_ply).items():
+                    positions.setdefault(key, moves)
+        existing = None
+        if not args.fresh and os.path.exists(args.book):
+            with Book(args.book) as book:
+                existing = book.entries()
+        started = time.monotonic()
+        searched = build(
+            args.book, positions, args.time, args.workers, existing,
+            progress=lambda done, total: print(f"{done}/{total} positions searched", file=sys.stderr),
+        )
+        print(f"Searched {searched} of {len(positions)} positions in {time.monotonic() - started:.0f} s, wrote {args.book}")
+    elif args.command == "probe":
+        with Book(args.book) as book:
+            try:
+                entry = book.lookup(args.moves)
+            except ValueError as e:
+                parser.error(str(e))
+        print("Not in the book" if entry is None else f"move {entry.move}, value {entry.value}, depth {entry.depth}{', solved' if entry.solved else ''}")
+    else:
+        with Book(args.book) as book:
+            entries = book.entries()
+            print(f"{len(entries)} positions in {book.slots} slots, {sum(entry.solved for entry in entries.values())} solved")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,85 @@
-import random
-class Game:
-    def __init__(self, agents):
+import operator
+from games.engine import MoveGame
+
+WIDTH = 7
+HEIGHT = 6
+# Each column takes HEIGHT + 1 bits in a bitboard. The spare top bit stops a
+# shifted line from wrapping into the bottom of the next column.
+COLUMN_BITS = HEIGHT + 1
+# Bit shifts for the vertical, horizontal and both diagonal directions.
+DIRECTIONS = (1, COLUMN_BITS, COLUMN_BITS - 1, COLUMN_BITS + 1)
+
+
+def connects_four(bitboard):
+    '''Returns True if the bitboard contains four tokens in a row in any direction.'''
+    for shift in DIRECTIONS:
+        pairs = bitboard & (bitboard >> shift)
+        if pairs & (pairs >> (2 * shift)):
+            return True
+    return False
+
+
+class Game(MoveGame):
+    max_moves = WIDTH * HEIGHT
+
+    def __init__(self, agents, observer=None, seed=None):
         '''
         Creates a new game with a list of agents. Connect 4 requires exactly 2 agents.
+        observer receives the game's events (see games.engine.GameEngine); None plays silently.
+        seed fixes who moves first, so a seed and the agents' moves replay the game exactly.
         '''
         if len(agents) != 2:
             raise ValueError("Connect 4 requires exactly 2 agents.")
+        super().__init__(observer, seed)
         self.agents = agents
-        self.board = ['','','','','','','']
+        self.symbols = ['X','O']
+        self.bitboards = [0, 0]  # One mask per symbol, bit (column * COLUMN_BITS + row) is set for each token.
+        self.heights = [0] * WIDTH
         self.move_order = ['','','','','','','']
-        self.winner = None
+        self._board = None
+
+    @property
+    def board(self):
+        '''
+        The board as 7 strings each describing a column from the bottom up, e.g. ['XO', '', ...].
+        Built from the bitboards on first access after a move, so agents keep the original view.
+        '''
+        if self._board is None:
+            self._board = [self.column_string(col) for col in range(WIDTH)]
+        return self._board
+
+    def column_string(self, col):
+        base = col * COLUMN_BITS
+        x_tokens = self.bitboards[0]
+        return ''.join(
+            self.symbols[0] if x_tokens >> (base + row) & 1 else self.symbols[1]
+            for row in range(self.heights[col])
+        )
+
+    def is_legal(self, col):
+        '''Tests whether a token can be dropped into col.'''
+        try:
+            col = operator.index(col)
+        except TypeError:
+            return False
+        return 0 <= col < WIDTH and self.heights[col] < HEIGHT
+
+    def drop(self, col, player):
+        '''
+        Drops a token for agents[player] into col, which must be legal.
+        Returns True if the move connects four, in which case self.winner is set.
+        '''
+        self.bitboards[player] |= 1 << (col * COLUMN_BITS + self.heights[col])
+        self.heights[col] += 1
+        self._board = None
+        return self.record_move(col, self.symbols[player])
+
+    def is_winning_move(self, col, symbol):
+        '''
+        Checks the lines through the top token of col. The board held no four before this
+        move, so any four left in the mover's bitboard passes through the new token.
+        '''
+        return connects_four(self.bitboards[self.symbols.index(symbol)])
 
     def play(self):
         '''
@@ -17,24 +87,27 @@ class Game:
         Returns [winner_index, loser_index] where indices correspond to self.agents,
         or [None, None] for a draw.
         '''
-        current = 0 if random.random() < 0.5 else 1
-        symbols = ['X','O']
+        current = 0 if self.rng.random() < 0.5 else 1
+        symbols = self.symbols
         counters = ['A','a']
-        last_move = -1 
+        last_move = -1
         while not self.game_over():
-            last_move = self.agents[current].move(symbols[current], self.board.copy(), last_move)
-            
-            if last_move < 7 and last_move >= 0 and len(self.board[last_move]) < 6:
-                self.board[last_move] = self.board[last_move] + symbols[current]
+            last_move = self.ask_agent(current, symbols[current], self.board.copy(), last_move)
+
+            if self.is_legal(last_move):
+                last_move = operator.index(last_move)
+                self.drop(last_move, current)
                 self.move_order[last_move] = self.move_order[last_move] + counters[current]
                 counters[current] = chr(ord(counters[current])+1)
+                self.emit("move", player=current, symbol=symbols[current], column=last_move)
                 current = (current + 1) % 2
             else:
-                print('Illegal move. Game over')
+                self.emit("illegal_move", player=current, symbol=symbols[current], move=last_move)
                 self.winner = symbols[(current + 1) % 2]  # Opponent wins on illegal move
-        
-        print('Final board\n', self.board_string())
-        
+
+        if self.observer is not None:
+            self.emit("game_over", winner=self.winner, board=self.board_string())
+
         if self.winner == 'X':
             return [0, 1]  # agents[0] wins, agents[1] loses
         elif self.winner == 'O':
@@ -48,23 +121,4 @@ class Game:
             for i in range(7):
                 s +=  ' ' if j>=len(self.move_order[i]) else self.move_order[i][j]
             s+='\n'
-        return s        
-
-    def game_over(self):
-        '''Tests winning condition'''
-        if self.winner is not None:
-            return True
-        dirs = [(0,1),(1,1),(1,0),(1,-1)]
-        for i in range(7):
-            for j in range(len(self.board[i])):
-                symb = self.board[i][j]
-                for (x,y) in dirs:
-                    k = 1
-                    while i+k*x < 7 and j+k*y < len(self.board[i+k*x]) and j+k*y>=0 and self.board[i+k*x][j+k*y]==symb:
-                        k += 1
-                        if k == 4: 
-                            self.winner = symb
-                            return True
-        if all([len(col)==6 for col in self.board]):
-            return True
-        return False
\ No newline at end of file
+        return s
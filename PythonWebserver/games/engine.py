@@ -0,0 +1,111 @@
+import random
+
+
+class MoveTimeout(Exception):
+    '''Raised by an agent proxy when the agent ran out of time for a move or for the match.'''
+
+
+class AgentError(RuntimeError):
+    '''Raised by an agent proxy when the agent raised, could not be loaded or its worker process died.'''
+
+
+def new_seed():
+    '''A fresh game seed, 53 bits so it stays exact as a JavaScript number in API responses.'''
+    return random.getrandbits(53)
+
+
+def agent_seed(seed, index):
+    '''The seed for agents[index]'s random module in a game seeded with seed (None stays unseeded).'''
+    if seed is None:
+        return None
+    return random.Random(f"{seed}:{index}").getrandbits(32)
+
+
+def print_event(event):
+    '''Observer that renders game events to stdout, for running games from the command line.'''
+    print(f"[{event['event']}]")
+    for key, value in event.items():
+        if key == "event":
+            continue
+        if isinstance(value, str) and "\n" in value:
+            print(f"{key}:\n{value}")
+        else:
+            print(f"{key}: {value}")
+
+
+class GameEngine:
+    '''
+    Base for every games/*/game.py Game class.
+
+    Games report what happens through emit() instead of printing. The observer is any
+    callable taking an event dict such as {"event": "move", "player": 0, ...}; when it is
+    None (the default, and what app.py uses) events are dropped and nothing is rendered.
+
+    Every chance decision a game makes must come from self.rng, which is seeded with seed, and
+    every reply an agent gives is appended to self.move_log. Playing the same seed with agents
+    that repeat the logged moves therefore replays the game exactly (see replay.py).
+    '''
+
+    def __init__(self, observer=None, seed=None):
+        self.observer = observer
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.move_log = []
+
+    def emit(self, event, **data):
+        if self.observer is not None:
+            data["event"] = event
+            self.observer(data)
+
+    def ask_agent(self, index, *args):
+        '''
+        Calls agents[index].move(*args). A move that runs out of time, or an agent that raises or crashes,
+        comes back as None, which every game rejects as an illegal move so the opponent wins.
+        '''
+        try:
+            move = self.agents[index].move(*args)
+        except MoveTimeout:
+            self.emit("timeout", player=index)
+            move = None
+        except AgentError as e:
+            self.emit("agent_error", player=index, error=str(e))
+            move = None
+        self.move_log.append(move)
+        return move
+
+
+class MoveGame(GameEngine):
+    '''
+    Shared bookkeeping for turn-based board games (see conn4 and tictactoe).
+
+    Subclasses set max_moves and implement is_winning_move(), which only has to look at
+    the lines passing through the cell that was just played. After placing a token the
+    game calls record_move(), so game_over() and is_draw() never rescan the board.
+    '''
+    max_moves = 0  # Number of moves that fills the board.
+
+    def __init__(self, observer=None, seed=None):
+        super().__init__(observer, seed)
+        self.moves_played = 0
+        self.winner = None
+
+    def is_winning_move(self, move, player):
+        '''Returns True if the token player just placed with move completes a line.'''
+        raise NotImplementedError
+
+    def record_move(self, move, player):
+        '''
+        Counts a move that has already been placed on the board and checks it for a win.
+        Returns True if the move won the game, in which case self.winner is set to player.
+        '''
+        self.moves_played += 1
+        if self.is_winning_move(move, player):
+            self.winner = player
+            return True
+        return False
+
+    def is_draw(self):
+        return self.winner is None and self.moves_played >= self.max_moves
+
+    def game_over(self):
+        return self.winner is not None or self.moves_played >= self.max_moves
@@ -1,11 +1,12 @@
-import random
+from games.engine import GameEngine
 
-class Game:
+class Game(GameEngine):
     MOVES = ["rock", "paper", "scissors"]
 
-    def __init__(self, agents):
+    def __init__(self, agents, observer=None, seed=None):
         if len(agents) != 2:
             raise ValueError("Rock-Paper-Scissors requires exactly 2 agents.")
+        super().__init__(observer, seed)
         self.agents = agents
         self.logs = []   # record round details
         self.board = []  # list form of match state (copyable)
@@ -30,8 +31,8 @@ class Game:
         Plays a single round and returns [0,1], [1,0], or None for draw.
         """
         self.round += 1
-        move1 = self.agents[0].move()
-        move2 = self.agents[1].move()
+        move1 = self.ask_agent(0)
+        move2 = self.ask_agent(1)
 
         # Validate moves
         if move1 not in self.MOVES:
@@ -84,10 +85,6 @@ class Game:
         else:
             final_winner = None 
 
-        print("Final score:", score)
-        print("Match winner:", final_winner)
-        print("Match history:")
-        for line in self.board:
-            print(line)
+        self.emit("game_over", score=score, winner=final_winner, history="\n".join(self.board))
 
         return final_winner
@@ -1,4 +1,8 @@
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # PythonWebserver root, for games.engine
 from game import Game
+from games.engine import print_event
 from agents.test.rockagent import RockAgent
 from agents.test.random import RandomAgent
 
@@ -15,7 +19,7 @@ if __name__ == "__main__":
             name1, agent1 = agents[i]
             name2, agent2 = agents[j]
             print(f"Match: {name1} (agent1) vs {name2} (agent2)")
-            game = Game([agent1(), agent2()])
+            game = Game([agent1(), agent2()], observer=print_event)
             result = game.play()
             if result is None:
                 print("Result: Draw")
@@ -0,0 +1,9 @@
+from games.tictactoe.solver import best_move
+
+class PerfectAgent:
+    def move(self, board):
+        '''
+        Plays the move the solved table (games/tictactoe/solver.py) gives for this board:
+        it never loses, takes the quickest win and otherwise holds the draw.
+        '''
+        return best_move(board)
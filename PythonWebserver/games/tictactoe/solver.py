@@ -0,0 +1,98 @@
+'''
+Every tic-tac-toe position, solved once at import.
+
+A board is indexed in base 3: cell i contributes DIGITS[symbol] * 3**i, so the 3**9 = 19683 indices cover every
+board (about 5.5k of them reachable in play). The tables below are flat arrays over those indices:
+
+    FLAGS[index]      REACHABLE, TERMINAL, X_WON, O_WON bits
+    VALUE[index]      result for the player to move under perfect play: 1 win, 0 draw, -1 loss
+    BEST_MOVE[index]  a perfect move for the player to move, or -1 in terminal and unreachable positions
+
+Because index(board with symbol at cell) = index(board) + DIGITS[symbol] * POWERS[cell], the index can be kept
+up to date one move at a time, which makes terminal and winner checks a single lookup.
+'''
+from array import array
+
+CELLS = 9
+STATES = 3 ** CELLS
+POWERS = [3 ** cell for cell in range(CELLS)]
+DIGITS = {" ": 0, "X": 1, "O": 2}
+
+REACHABLE = 1
+TERMINAL = 2
+X_WON = 4
+O_WON = 8
+
+WINS = [
+    [0, 1, 2], [3, 4, 5], [6, 7, 8],  # rows
+    [0, 3, 6], [1, 4, 7], [2, 5, 8],  # columns
+    [0, 4, 8], [2, 4, 6]              # diagonals
+]
+
+FLAGS = bytearray(STATES)
+VALUE = array('b', bytes(STATES))
+BEST_MOVE = array('b', [-1]) * STATES
+
+
+def state_index(board):
+    '''The base-3 index of a board given as 9 cells of " ", "X" or "O".'''
+    return sum(DIGITS[symbol] * power for symbol, power in zip(board, POWERS))
+
+
+def is_terminal(index):
+    return bool(FLAGS[index] & TERMINAL)
+
+
+def winner(index):
+    '''"X" or "O" if that player has three in a row in the position, otherwise None.'''
+    flags = FLAGS[index]
+    if flags & X_WON:
+        return "X"
+    if flags & O_WON:
+        return "O"
+    return None
+
+
+def best_move(board):
+    return BEST_MOVE[state_index(board)]
+
+
+def _solve(cells, index, digit, empty, scores):
+    '''
+    Negamax over the positions reachable from cells (a list of digits), where digit (1 for X, 2 for O) is to move.
+    Fills in the tables for index and returns its score for the player to move: positive for a win, larger the
+    sooner it comes, so the stored best move never delays a win or hastens a loss. scores memoises those scores.
+    '''
+    if index in scores:
+        return scores[index]
+    flags = REACHABLE
+    previous = 3 - digit
+    if any(cells[a] == cells[b] == cells[c] == previous for a, b, c in WINS):
+        flags |= TERMINAL | (X_WON if previous == 1 else O_WON)
+        score = -(empty + 1)
+    elif empty == 0:
+        flags |= TERMINAL
+        score = 0
+    else:
+        score = None
+        for cell in range(CELLS):
+            if cells[cell]:
+                continue
+            cells[cell] = digit
+            child = -_solve(cells, index + digit * POWERS[cell], previous, empty - 1, scores)
+            cells[cell] = 0
+            if score is None or child > score:
+                score = child
+                BEST_MOVE[index] = cell
+    FLAGS[index] = flags
+    VALUE[index] = (score > 0) - (score < 0)
+    scores[index] = score
+    return score
+
+
+def _solve_all():
+    '''Fill in the tables for every position reachable from the empty board. Re-running it rewrites the same values.'''
+    _solve([0] * CELLS, 0, 1, CELLS, {})
+
+
+_solve_all()
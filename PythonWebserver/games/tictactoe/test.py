@@ -1,4 +1,9 @@
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # PythonWebserver root, for games.engine
 from game import Game
+from games.engine import print_event
+from games.tictactoe.solver import best_move
 import random
 
 # Define some agents
@@ -21,6 +26,10 @@ class CenterFirstAgent:
             if v == " ":
                 return i
 
+class PerfectAgent:
+    def move(self, board):
+        return best_move(board)
+
 # Run Tic Tac Toe Tests
 if __name__ == "__main__":
     print("Testing Tic Tac Toe game\n")
@@ -28,7 +37,8 @@ if __name__ == "__main__":
     agents = [
         ("Random", RandomAgent()),
         ("FirstAvailable", FirstAvailableAgent()),
-        ("CenterFirst", CenterFirstAgent())
+        ("CenterFirst", CenterFirstAgent()),
+        ("Perfect", PerfectAgent())
     ]
 
     # Play each agent vs each other
@@ -39,11 +49,12 @@ if __name__ == "__main__":
             name1, agent1 = agents[i]
             name2, agent2 = agents[j]
             print(f"{name1} (agents[0]) vs {name2} (agents[1])")
-            game = Game([agent1, agent2])  # Pass agents as a list
+            game = Game([agent1, agent2], observer=print_event)  # Pass agents as a list
             result = game.play()
             if result is None:
                 print("Result: Draw\n")
             else:
                 winner_name = name1 if result[0] == 0 else name2
                 loser_name = name2 if result[0] == 0 else name1
-                print(f"Winner: {winner_name}, Loser: {loser_name}\n")
\ No newline at end of file
+                print(f"Winner: {winner_name}, Loser: {loser_name}\n")
+                assert loser_name != "Perfect", "Perfect play must never lose"
\ No newline at end of file
@@ -0,0 +1,176 @@
+import os
+import psycopg2
+from dotenv import load_dotenv
+
+load_dotenv()
+DB_URL = os.getenv('DATABASE_URL')
+
+# EXPLAIN-based regression test for the indexes in migrations/0002_hot_path_indexes.sql and 0006_contest_list_indexes.sql.
+# The dataset is seeded inside a transaction that is rolled back at the end, so the database is left untouched.
+conn = psycopg2.connect(DB_URL)
+cur = conn.cursor()
+
+cur.execute("SELECT COUNT(*) FROM schema_migrations WHERE version >= 6")
+assert cur.fetchone()[0] >= 1, "Run migrate.py (or dbSetup.py) before indexTesting.py"
+
+GROUPS = 200
+AGENT_VERSIONS = 20 # Uploads per group per game
+CONTESTS = 5000
+MOVES_PER_CONTEST = 30
+
+cur.execute(
+    "INSERT INTO groups (groupname) SELECT 'explain_group_' || i FROM generate_series(1, %s) AS i",
+    (GROUPS,),
+)
+cur.execute(
+    """
+    INSERT INTO agents (group_id, name, game, file_path, created_at)
+    SELECT g.group_id, 'agent_' || v, game, '/tmp/agent.py', NOW() - v * INTERVAL '1 hour'
+    FROM groups g
+    CROSS JOIN unnest(ARRAY['conn4', 'tictactoe', 'rps']) AS game
+    CROSS JOIN generate_series(1, %s) AS v
+    WHERE g.groupname LIKE 'explain_group_%%'
+    """,
+    (AGENT_VERSIONS,),
+)
+# Mostly completed contests, as in a real semester; a few are still pending.
+cur.execute(
+    """
+    INSERT INTO contests (name, game, agent1_id, agent2_id, status, created_at)
+    SELECT 'contest_' || i, (ARRAY['conn4', 'tictactoe', 'rps'])[i %% 3 + 1],
+           a.first_id + 2 * (i %% 500), a.first_id + 2 * (i %% 500) + 1,
+           CASE WHEN i %% 100 = 0 THEN 'pending' ELSE 'completed' END,
+           NOW() - i * INTERVAL '1 minute'
+    FROM generate_series(1, %s) AS i
+    CROSS JOIN (SELECT MIN(agent_id) AS first_id FROM agents) AS a
+    """,
+    (CONTESTS,),
+)
+cur.execute(
+    """
+    INSERT INTO contest_actions (contest_id, move_number, agent_id, action_data, board_state)
+    SELECT c.contest_id, m, c.agent1_id, '3', 'board'
+    FROM contests c
+    CROSS JOIN generate_series(1, %s) AS m
+    WHERE c.name LIKE 'contest_%%'
+    """,
+    (MOVES_PER_CONTEST,),
+)
+cur.execute("ANALYZE groups, agents, contests, contest_actions")
+print("Seeded dataset")
+
+
+def plan_nodes(query, params):
+    """Return every node of the query's plan."""
+    cur.execute("EXPLAIN (FORMAT JSON) " + query, params)
+    nodes = []
+    stack = [cur.fetchone()[0][0]["Plan"]]
+    while stack:
+        node = stack.pop()
+        nodes.append(node)
+        stack.extend(node.get("Plans", []))
+    return nodes
+
+
+def plan_indexes(query, params):
+    """Return the set of index names used anywhere in the query's plan."""
+    return {node["Index Name"] for node in plan_nodes(query, params) if "Index Name" in node}
+
+
+# fetch_latest_agent
+used = plan_indexes(
+    """
+    SELECT a.agent_id, a.name, a.file_path
+    FROM agents a
+    JOIN groups g ON a.group_id = g.group_id
+    WHERE g.groupname = %s
+      AND a.game = %s
+    ORDER BY a.created_at DESC
+    LIMIT 1
+    """,
+    ("explain_group_7", "conn4"),
+)
+assert "agents_game_group_created_idx" in used, f"fetch_latest_agent should use agents_game_group_created_idx, used {used}"
+print("fetch_latest_agent index test passed")
+
+# get_contest_details (actions)
+cur.execute("SELECT contest_id FROM contests WHERE name = 'contest_42'")
+contest_id = cur.fetchone()[0]
+used = plan_indexes(
+    """
+    SELECT ca.move_number, ca.agent_id, a.name, ca.action_data, ca.board_state
+    FROM contest_actions ca
+    JOIN agents a ON ca.agent_id = a.agent_id
+    WHERE ca.contest_id = %s
+    ORDER BY ca.move_number
+    """,
+    (contest_id,),
+)
+assert "contest_actions_contest_move_idx" in used, f"get_contest_details should use contest_actions_contest_move_idx, used {used}"
+print("get_contest_details index test passed")
+
+# get_contests?status=pending
+used = plan_indexes(
+    """
+    SELECT c.created_at, c.contest_id, c.name
+    FROM contests c
+    WHERE c.status = %s
+    ORDER BY c.created_at DESC, c.contest_id DESC
+    LIMIT 21
+    """,
+    ("pending",),
+)
+assert "contests_status_created_idx" in used, f"get_contests?status should use contests_status_created_idx, used {used}"
+print("get_contests?status index test passed")
+
+# get_contests: a later page, unfiltered and by game
+cur.execute("SELECT created_at, contest_id FROM contests WHERE name = 'contest_2500'")
+after = cur.fetchone()
+used = plan_indexes(
+    """
+    SELECT c.created_at, c.contest_id, c.name
+    FROM contests c
+    WHERE (c.created_at, c.contest_id) < (%s, %s)
+    ORDER BY c.created_at DESC, c.contest_id DESC
+    LIMIT 21
+    """,
+    after,
+)
+assert "contests_created_idx" in used, f"get_contests pages should use contests_created_idx, used {used}"
+# With only three games the planner may equally filter contests_created_idx by game or read contests_game_created_idx;
+# either way the page must come from an ordered index scan that stops at the LIMIT, never a sort of the table.
+nodes = plan_nodes(
+    """
+    SELECT c.created_at, c.contest_id, c.name
+    FROM contests c
+    WHERE c.game = %s AND (c.created_at, c.contest_id) < (%s, %s)
+    ORDER BY c.created_at DESC, c.contest_id DESC
+    LIMIT 21
+    """,
+    ("tictactoe",) + after,
+)
+node_types = [node["Node Type"] for node in nodes]
+assert any(node["Node Type"] in ("Index Scan", "Index Only Scan") and node.get("Relation Name") == "contests" for node in nodes), \
+    f"get_contests?game should read contests through an index, plan {node_types}"
+assert not any(node_type.endswith("Sort") for node_type in node_types), f"get_contests?game should not sort, plan {node_types}"
+print("get_contests page index test passed")
+
+# get_contests?agent=...
+cur.execute("SELECT agent1_id FROM contests WHERE name = 'contest_42'")
+used = plan_indexes(
+    """
+    SELECT c.created_at, c.contest_id, c.name
+    FROM contests c
+    WHERE (c.agent1_id = %(agent)s OR c.agent2_id = %(agent)s)
+    ORDER BY c.created_at DESC, c.contest_id DESC
+    LIMIT 21
+    """,
+    {"agent": cur.fetchone()[0]},
+)
+assert {"contests_agent1_created_idx", "contests_agent2_created_idx"} <= used, f"get_contests?agent should use both seat indexes, used {used}"
+print("get_contests?agent index test passed")
+
+conn.rollback()
+cur.close()
+conn.close()
+print("All index checks passed!")
@@ -0,0 +1,250 @@
+import json
+import os
+import threading
+import traceback
+
+from db import db_connection
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2")) # Background threads per server process, 0 disables them
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2")) # Seconds an idle worker waits before checking the table again
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60")) # A running job not renewed for this long is taken over by another worker
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3")) # Runs a job gets before an abandoned one is marked failed instead
+
+_handlers = {}
+_wakeup = threading.Event()
+_workers = []
+_workers_pid = None
+_workers_lock = threading.Lock()
+
+
+def job_handler(kind):
+    """
+    Register the function that executes jobs of the given kind.
+
+    The handler is called as handler(payload, progress) where payload is the dict given to enqueue_job()
+    and progress(done, total=None) records how far along the job is. Its return value must be
+    JSON-serialisable and is stored as the job's result; raising marks the job as failed.
+    """
+    def register(func):
+        _handlers[kind] = func
+        return func
+    return register
+
+
+def enqueue_job(cur, kind, payload, created_by=None):
+    """
+    Insert a queued job using the caller's cursor and return its id.
+    The job only becomes visible to workers once the caller commits; call wake_job_workers() afterwards.
+    """
+    if kind not in _handlers:
+        raise ValueError(f"No handler registered for job kind '{kind}'")
+    cur.execute(
+        """
+        INSERT INTO jobs (kind, payload, status, created_by)
+        VALUES (%s, %s, 'queued', %s)
+        RETURNING job_id
+        """,
+        (kind, json.dumps(payload), created_by),
+    )
+    return cur.fetchone()[0]
+
+
+def find_active_job(cur, kind, key, value):
+    """
+    Return the id of a queued or running job of this kind whose payload[key] equals value, if any.
+    A running job whose worker died still counts: claim_next_job() hands it to another worker once its lease expires.
+    """
+    cur.execute(
+        """
+        SELECT job_id FROM jobs
+        WHERE kind = %s AND payload->>%s = %s AND status IN ('queued', 'running')
+        ORDER BY job_id
+        LIMIT 1
+        """,
+        (kind, key, str(value)),
+    )
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def fetch_job(cur, job_id):
+    """Return a job's status as a dict, or None if it does not exist."""
+    cur.execute(
+        """
+        SELECT job_id, kind, status, progress_done, progress_total, result, error,
+               created_by, created_at, started_at, finished_at
+        FROM jobs
+        WHERE job_id = %s
+        """,
+        (job_id,),
+    )
+    row = cur.fetchone()
+    if not row:
+        return None
+    return {
+        "id": row[0],
+        "kind": row[1],
+        "status": row[2],
+        "progress": {"done": row[3], "total": row[4]},
+        "result": row[5],
+        "error": row[6],
+        "created_by": row[7],
+        "created_at": row[8].isoformat() if row[8] else None,
+        "started_at": row[9].isoformat() if row[9] else None,
+        "finished_at": row[10].isoformat() if row[10] else None,
+    }
+
+
+def report_progress(job_id, done, total=None):
+    """Record progress on its own connection so pollers see it while the job's transaction is still open."""
+    with db_connection() as conn, conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE jobs
+            SET progress_done = %s, progress_total = COALESCE(%s, progress_total)
+            WHERE job_id = %s
+            """,
+            (done, total, job_id),
+        )
+        conn.commit()
+
+
+def claim_next_job():
+    """
+    Atomically move the oldest claimable job to running and return (job_id, kind, payload, attempt).
+    Claimable means queued, or running with an expired lease because its worker died or was restarted mid-job;
+    such a job is run again from the start, unless it has already been started JOB_MAX_ATTEMPTS times, in which case
+    it is marked failed. SKIP LOCKED lets any number of workers share the table.
+    """
+    with db_connection() as conn, conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE jobs
+            SET status = 'failed', finished_at = CURRENT_TIMESTAMP,
+                error = 'Abandoned after ' || attempts || ' runs that never finished'
+            WHERE status = 'running' AND (locked_until IS NULL OR locked_until < CURRENT_TIMESTAMP) AND attempts >= %s
+            """,
+            (JOB_MAX_ATTEMPTS,),
+        )
+        cur.execute(
+            """
+            UPDATE jobs
+            SET status = 'running', started_at = CURRENT_TIMESTAMP, attempts = attempts + 1,
+                locked_until = CURRENT_TIMESTAMP + make_interval(secs => %s)
+            WHERE job_id = (
+                SELECT job_id FROM jobs
+                WHERE status = 'queued'
+                   OR (status = 'running' AND (locked_until IS NULL OR locked_until < CURRENT_TIMESTAMP))
+                ORDER BY job_id
+                FOR UPDATE SKIP LOCKED
+                LIMIT 1
+            )
+            RETURNING job_id, kind, payload, attempts
+            """,
+            (JOB_LEASE_SECONDS,),
+        )
+        row = cur.fetchone()
+        conn.commit()
+    return row
+
+
+def renew_lease(job_id, attempt):
+    """Push a running job's lease forward; False if the job was taken over (or finished) in the meantime."""
+    with db_connection() as conn, conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE jobs
+            SET locked_until = CURRENT_TIMESTAMP + make_interval(secs => %s)
+            WHERE job_id = %s AND attempts = %s AND status = 'running'
+            """,
+            (JOB_LEASE_SECONDS, job_id, attempt),
+        )
+        renewed = cur.rowcount == 1
+        conn.commit()
+    return renewed
+
+
+def _renew_until(job_id, attempt, stopped):
+    """Heartbeat thread body: renew the lease three times per JOB_LEASE_SECONDS until stopped is set."""
+    while not stopped.wait(JOB_LEASE_SECONDS / 3):
+        try:
+            if not renew_lease(job_id, attempt):
+                return
+        except Exception:
+            traceback.print_exc() # Database unavailable; the lease holds until the next try.
+
+
+def finish_job(job_id, attempt, status, result=None, error=None):
+    """Record a run's outcome, unless the job was taken over by a later run (attempt is no longer current)."""
+    with db_connection() as conn, conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE jobs
+            SET status = %s, result = %s, error = %s, finished_at = CURRENT_TIMESTAMP, locked_until = NULL
+            WHERE job_id = %s AND attempts = %s
+            """,
+            (status, json.dumps(result) if result is not None else None, error, job_id, attempt),
+        )
+        conn.commit()
+
+
+def run_job(job_id, kind, payload, attempt):
+    handler = _handlers.get(kind)
+    if handler is None:
+        finish_job(job_id, attempt, "failed", error=f"No handler registered for job kind '{kind}'")
+        return
+
+    def progress(done, total=None):
+        report_progress(job_id, done, total)
+
+    stopped = threading.Event()
+    heartbeat = threading.Thread(target=_renew_until, args=(job_id, attempt, stopped), name=f"job-lease-{job_id}", daemon=True)
+    heartbeat.start()
+    try:
+        result = handler(payload, progress)
+    except Exception as e:
+        traceback.print_exc()
+        finish_job(job_id, attempt, "failed", error=str(e))
+    else:
+        finish_job(job_id, attempt, "completed", result=result)
+    finally:
+        stopped.set()
+
+
+def _worker_loop():
+    while True:
+        try:
+            job = claim_next_job()
+        except Exception:
+            traceback.print_exc() # Database unavailable; retry after the poll interval.
+            job = None
+        if job is None:
+            _wakeup.wait(JOB_POLL_INTERVAL)
+            _wakeup.clear()
+            continue
+        try:
+            run_job(*job)
+        except Exception:
+            traceback.print_exc() # Could not record the outcome; keep the worker alive for the next job.
+
+
+def start_job_workers():
+    """Start this process's worker threads once. Safe to call repeatedly and after a fork."""
+    global _workers_pid
+    if _workers_pid == os.getpid():
+        return
+    with _workers_lock:
+        if _workers_pid == os.getpid():
+            return
+        _workers.clear()
+        for index in range(JOB_WORKERS):
+            worker = threading.Thread(target=_worker_loop, name=f"job-worker-{index}", daemon=True)
+            worker.start()
+            _workers.append(worker)
+        _workers_pid = os.getpid()
+
+
+def wake_job_workers():
+    """Nudge idle workers in this process to check for new jobs now rather than at the next poll."""
+    start_job_workers()
+    _wakeup.set()
@@ -0,0 +1,95 @@
+import os
+import re
+import sys
+
+import psycopg2
+
+DB_URL = os.getenv("DATABASE_URL")
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+MIGRATION_LOCK_ID = 5206 # pg_advisory_lock key, so servers starting together apply migrations one at a time
+
+_MIGRATION_FILE = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+
+def list_migrations():
+    """Return [(version, name, path)] for every migrations/NNNN_name.sql file, in version order."""
+    migrations = []
+    for filename in os.listdir(MIGRATIONS_DIR):
+        match = _MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    migrations.sort()
+    versions = [version for version, _, _ in migrations]
+    if len(set(versions)) != len(versions):
+        raise ValueError("Two migration files share a version number")
+    return migrations
+
+
+def applied_versions(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cur.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cur.fetchall()}
+
+
+def apply_migrations(conn, verbose=True):
+    """
+    Apply every migration that has not been recorded in schema_migrations yet.
+
+    Each migration runs in its own transaction together with its schema_migrations row, so a failing
+    migration leaves the database at the previous version. Returns the versions that were applied.
+    """
+    conn.autocommit = False
+    cur = conn.cursor()
+    cur.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+    try:
+        done = applied_versions(cur)
+        conn.commit()
+        applied = []
+        for version, name, path in list_migrations():
+            if version in done:
+                continue
+            with open(path) as f:
+                sql = f.read()
+            try:
+                cur.execute(sql)
+                cur.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            applied.append(version)
+            if verbose:
+                print(f"Applied migration {version:04d}_{name}")
+        return applied
+    finally:
+        cur.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
+        conn.commit()
+        cur.close()
+
+
+def print_status(conn):
+    cur = conn.cursor()
+    done = applied_versions(cur)
+    conn.commit()
+    for version, name, _ in list_migrations():
+        print(f"{version:04d}_{name}: {'applied' if version in done else 'pending'}")
+    cur.close()
+
+
+if __name__ == "__main__":
+    # Usage: python migrate.py [--status]   (connects to DATABASE_URL)
+    conn = psycopg2.connect(DB_URL)
+    try:
+        if "--status" in sys.argv[1:]:
+            print_status(conn)
+        else:
+            applied = apply_migrations(conn)
+            print("Database is up to date." if not applied else f"Applied {len(applied)} migration(s).")
+    finally:
+        conn.close()
@@ -0,0 +1,131 @@
+-- Baseline: the schema previously created by dbSetup.py. IF NOT EXISTS lets databases
+-- built by the old script adopt the migration history without being recreated.
+
+-- NOTE: Serial is better instead of integer, as serial is an automatic incrementer for user ID!
+CREATE TABLE IF NOT EXISTS groups (
+    group_id SERIAL PRIMARY KEY,
+    groupname VARCHAR UNIQUE NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS users (
+    user_id SERIAL PRIMARY KEY,
+    username VARCHAR(50) UNIQUE NOT NULL,
+    email VARCHAR(50) UNIQUE NOT NULL,
+    hashed_password TEXT NOT NULL,
+    role VARCHAR(20) NOT NULL,
+    group_id INT REFERENCES groups(group_id) ON DELETE SET NULL
+);
+
+CREATE TABLE IF NOT EXISTS agents (
+    agent_id SERIAL PRIMARY KEY,
+    group_id INT NOT NULL REFERENCES groups(group_id) ON DELETE CASCADE,
+    name VARCHAR(50) NOT NULL,
+    game varchar(50) NOT NULL,
+    file_path varchar(255),
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS matches (
+    match_id SERIAL PRIMARY KEY,
+    agent1_id INT NOT NULL REFERENCES agents(agent_id) ON DELETE CASCADE,
+    agent2_id INT NOT NULL REFERENCES agents(agent_id) ON DELETE CASCADE,
+    group1_id INT NOT NULL REFERENCES groups(group_id) ON DELETE CASCADE,
+    group2_id INT NOT NULL REFERENCES groups(group_id) ON DELETE CASCADE,
+    played_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Contest tables for FR3.x requirements
+CREATE TABLE IF NOT EXISTS contests (
+    contest_id SERIAL PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    game VARCHAR(50) NOT NULL,
+    agent1_id INT NOT NULL REFERENCES agents(agent_id) ON DELETE CASCADE,
+    agent2_id INT NOT NULL REFERENCES agents(agent_id) ON DELETE CASCADE,
+    winner_id INT REFERENCES agents(agent_id) ON DELETE SET NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    created_by INT REFERENCES users(user_id) ON DELETE SET NULL,
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    completed_at TIMESTAMPTZ
+);
+
+CREATE TABLE IF NOT EXISTS contest_actions (
+    action_id SERIAL PRIMARY KEY,
+    contest_id INT NOT NULL REFERENCES contests(contest_id) ON DELETE CASCADE,
+    move_number INT NOT NULL,
+    agent_id INT NOT NULL REFERENCES agents(agent_id) ON DELETE CASCADE,
+    action_data TEXT NOT NULL,
+    board_state TEXT NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS agent_records (
+    record_id SERIAL PRIMARY KEY,
+    agent_id INT NOT NULL REFERENCES agents(agent_id) ON DELETE CASCADE,
+    wins INT DEFAULT 0,
+    losses INT DEFAULT 0,
+    draws INT DEFAULT 0,
+    UNIQUE(agent_id)
+);
+
+-- Tournament related tables
+-- Note: Added round_number to tournament_matches for easier querying
+CREATE TABLE IF NOT EXISTS tournaments (
+    tournament_id SERIAL PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    game VARCHAR(50) NOT NULL,
+    rounds INT,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    created_by INT REFERENCES users(user_id),
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS tournament_rounds (
+    round_id SERIAL PRIMARY KEY,
+    tournament_id INT NOT NULL REFERENCES tournaments(tournament_id) ON DELETE CASCADE,
+    round_number INT NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (tournament_id, round_number)
+);
+
+CREATE TABLE IF NOT EXISTS tournament_matches (
+    tournament_match_id SERIAL PRIMARY KEY,
+    tournament_id INT NOT NULL REFERENCES tournaments(tournament_id) ON DELETE CASCADE,
+    round_id INT NOT NULL REFERENCES tournament_rounds(round_id) ON DELETE CASCADE,
+    round_number INT NOT NULL,
+    agent1_id INT NOT NULL REFERENCES agents(agent_id),
+    agent2_id INT REFERENCES agents(agent_id),
+    agent1_score INTEGER DEFAULT 0,
+    agent2_score INTEGER DEFAULT 0,
+    result VARCHAR(20) DEFAULT 'pending',
+    winner_agent_id INT REFERENCES agents(agent_id),
+    metadata JSONB,
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (tournament_id, round_number, agent1_id, agent2_id)
+);
+
+CREATE TABLE IF NOT EXISTS tournament_standings (
+    standing_id SERIAL PRIMARY KEY,
+    tournament_id INT NOT NULL REFERENCES tournaments(tournament_id) ON DELETE CASCADE,
+    agent_id INT NOT NULL REFERENCES agents(agent_id) ON DELETE CASCADE,
+    points INTEGER DEFAULT 0,
+    rounds_played INT DEFAULT 0,
+    last_updated TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (tournament_id, agent_id)
+);
+
+-- Background jobs (contest runs, tournaments) polled by the worker threads in jobs.py
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id SERIAL PRIMARY KEY,
+    kind VARCHAR(50) NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}',
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    progress_done INT NOT NULL DEFAULT 0,
+    progress_total INT,
+    result JSONB,
+    error TEXT,
+    created_by INT REFERENCES users(user_id) ON DELETE SET NULL,
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMPTZ,
+    finished_at TIMESTAMPTZ
+);
+CREATE INDEX IF NOT EXISTS jobs_queued_idx ON jobs (job_id) WHERE status = 'queued';
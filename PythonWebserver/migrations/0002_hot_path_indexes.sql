@@ -0,0 +1,18 @@
+-- Secondary indexes for the hottest read paths (checked by indexTesting.py).
+
+-- fetch_latest_agent / fetch_latest_agents_for_game: newest agent per (game, group).
+-- INCLUDE makes it covering, so the lookup never visits the heap.
+CREATE INDEX IF NOT EXISTS agents_game_group_created_idx
+    ON agents (game, group_id, created_at DESC) INCLUDE (agent_id, name, file_path);
+
+-- get_contest_details: a contest's moves in order.
+CREATE INDEX IF NOT EXISTS contest_actions_contest_move_idx
+    ON contest_actions (contest_id, move_number);
+
+-- get_contests?status=...: newest contests with a given status.
+CREATE INDEX IF NOT EXISTS contests_status_created_idx
+    ON contests (status, created_at DESC);
+
+-- tournament_detail: the matches of each round.
+CREATE INDEX IF NOT EXISTS tournament_matches_round_idx
+    ON tournament_matches (round_id, tournament_match_id);
@@ -0,0 +1,2 @@
+-- Tournaments can be played as a knockout, a round robin or a Swiss system (see tournament_pairings.py).
+ALTER TABLE tournaments ADD COLUMN IF NOT EXISTS format VARCHAR(20) NOT NULL DEFAULT 'knockout';
@@ -0,0 +1,12 @@
+-- Materialized Elo ratings (see ratings.py), updated after every contest and tournament round.
+CREATE TABLE IF NOT EXISTS agent_ratings (
+    agent_id INT PRIMARY KEY REFERENCES agents(agent_id) ON DELETE CASCADE,
+    game VARCHAR(50) NOT NULL,
+    rating DOUBLE PRECISION NOT NULL DEFAULT 1500,
+    games_played INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+);
+
+-- GET /api/leaderboard/<game>
+CREATE INDEX IF NOT EXISTS agent_ratings_game_rating_idx
+    ON agent_ratings (game, rating DESC);
@@ -0,0 +1,4 @@
+-- Contests are stored as their seed and the agents' replies in order (GameEngine.move_log) and replayed
+-- on read (see replay.py), instead of one contest_actions row per move.
+ALTER TABLE contests ADD COLUMN IF NOT EXISTS seed BIGINT;
+ALTER TABLE contests ADD COLUMN IF NOT EXISTS moves JSONB;
@@ -0,0 +1,18 @@
+-- GET /api/contests pages by keyset on (created_at, contest_id), newest first (checked by indexTesting.py).
+CREATE INDEX IF NOT EXISTS contests_created_idx
+    ON contests (created_at DESC, contest_id DESC);
+
+-- ?game=...
+CREATE INDEX IF NOT EXISTS contests_game_created_idx
+    ON contests (game, created_at DESC, contest_id DESC);
+
+-- ?status=...: rebuilt with contest_id so the keyset comparison can be resolved inside the index.
+DROP INDEX IF EXISTS contests_status_created_idx;
+CREATE INDEX contests_status_created_idx
+    ON contests (status, created_at DESC, contest_id DESC);
+
+-- ?agent=... and ?group=...: an agent can sit in either seat, so each seat gets its own index.
+CREATE INDEX IF NOT EXISTS contests_agent1_created_idx
+    ON contests (agent1_id, created_at DESC, contest_id DESC);
+CREATE INDEX IF NOT EXISTS contests_agent2_created_idx
+    ON contests (agent2_id, created_at DESC, contest_id DESC);
@@ -0,0 +1,7 @@
+-- Leases for running jobs (see jobs.py). The worker running a job keeps pushing locked_until forward; a job left
+-- in 'running' by a process that died or restarted stops being renewed and is taken over by another worker.
+-- attempts counts the runs of a job and tells a superseded run that the job is no longer its own.
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS locked_until TIMESTAMPTZ;
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS attempts INT NOT NULL DEFAULT 0;
+
+CREATE INDEX IF NOT EXISTS jobs_running_lease_idx ON jobs (locked_until) WHERE status = 'running';
@@ -0,0 +1,157 @@
+import os
+
+import numpy as np
+from psycopg2.extras import execute_values
+
+ELO_INITIAL = 1500.0 # Rating of an agent that has not played yet
+ELO_K = float(os.getenv("ELO_K", "32")) # Largest change a single result can make
+
+
+def expected_score(rating, opponent_rating):
+    """Elo expected score of an agent against an opponent: 0.5 when level, near 1 when much stronger."""
+    return 1.0 / (1.0 + 10.0 ** ((opponent_rating - rating) / 400.0))
+
+
+def update_ratings(cur, results):
+    """
+    Apply results to agent_ratings incrementally, in order, using the caller's transaction.
+
+    Args:
+        results (list): (agent1_id, agent2_id, score) tuples where score is agent1's result: 1 win, 0.5 draw, 0 loss.
+    Rows are created on first use (at ELO_INITIAL) and locked while they are updated, so concurrent contests
+    and tournaments never lose each other's changes.
+    """
+    if not results:
+        return
+    agent_ids = sorted({agent_id for agent1_id, agent2_id, _ in results for agent_id in (agent1_id, agent2_id)})
+    cur.execute(
+        """
+        INSERT INTO agent_ratings (agent_id, game, rating)
+        SELECT agent_id, game, %s FROM agents WHERE agent_id = ANY(%s)
+        ON CONFLICT (agent_id) DO NOTHING
+        """,
+        (ELO_INITIAL, agent_ids),
+    )
+    cur.execute(
+        """
+        SELECT agent_id, rating, games_played FROM agent_ratings
+        WHERE agent_id = ANY(%s)
+        ORDER BY agent_id
+        FOR UPDATE
+        """,
+        (agent_ids,),
+    )
+    ratings = {agent_id: [rating, games_played] for agent_id, rating, games_played in cur.fetchall()}
+
+    for agent1_id, agent2_id, score in results:
+        entry1, entry2 = ratings[agent1_id], ratings[agent2_id]
+        delta = ELO_K * (score - expected_score(entry1[0], entry2[0]))
+        entry1[0] += delta
+        entry2[0] -= delta
+        entry1[1] += 1
+        entry2[1] += 1
+
+    execute_values(
+        cur,
+        """
+        UPDATE agent_ratings AS ar
+        SET rating = v.rating, games_played = v.games_played, updated_at = CURRENT_TIMESTAMP
+        FROM (VALUES %s) AS v (agent_id, rating, games_played)
+        WHERE ar.agent_id = v.agent_id
+        """,
+        [(agent_id, rating, games_played) for agent_id, (rating, games_played) in ratings.items()],
+        page_size=len(ratings),
+    )
+
+
+def compute_ratings(agent1_ids, agent2_ids, scores):
+    """
+    Replay a chronological list of results from scratch with NumPy.
+
+    Results are cut into consecutive batches in which no agent appears twice. Within such a batch every update
+    only depends on ratings from before the batch, so the whole batch is applied with array operations and
+    gives exactly the same ratings as applying the results one by one.
+
+    Return:
+        (agent_ids, ratings, games_played) arrays, one entry per agent that played.
+    """
+    agent1_ids = np.asarray(agent1_ids, dtype=np.int64)
+    agent2_ids = np.asarray(agent2_ids, dtype=np.int64)
+    scores = np.asarray(scores, dtype=np.float64)
+    agent_ids, index = np.unique(np.concatenate([agent1_ids, agent2_ids]), return_inverse=True)
+    first, second = index[:len(agent1_ids)], index[len(agent1_ids):]
+
+    ratings = np.full(len(agent_ids), ELO_INITIAL)
+    last_batch = np.full(len(agent_ids), -1) # Batch in which each agent last played
+    batch_starts = [0]
+    for position in range(len(first)):
+        current = len(batch_starts) - 1
+        if last_batch[first[position]] == current or last_batch[second[position]] == current:
+            batch_starts.append(position)
+            current += 1
+        last_batch[first[position]] = current
+        last_batch[second[position]] = current
+    batch_starts.append(len(first))
+
+    for start, stop in zip(batch_starts, batch_starts[1:]):
+        a, b = first[start:stop], second[start:stop]
+        delta = ELO_K * (scores[start:stop] - 1.0 / (1.0 + 10.0 ** ((ratings[b] - ratings[a]) / 400.0)))
+        ratings[a] += delta # No agent repeats within the batch, so plain fancy-index updates are safe
+        ratings[b] -= delta
+
+    games_played = np.bincount(first, minlength=len(agent_ids)) + np.bincount(second, minlength=len(agent_ids))
+    return agent_ids, ratings, games_played
+
+
+def recompute_ratings(cur, game=None):
+    """
+    Rebuild agent_ratings from every completed contest and tournament match (optionally for one game only).
+    Tournament draws settled by a tiebreak count as draws; byes are ignored. Returns the number of results replayed.
+    """
+    cur.execute(
+        """
+        SELECT agent1_id, agent2_id, score FROM (
+            SELECT c.agent1_id, c.agent2_id, c.game, c.completed_at AS played_at, c.contest_id AS id, 0 AS source,
+                   CASE WHEN c.winner_id = c.agent1_id THEN 1.0
+                        WHEN c.winner_id = c.agent2_id THEN 0.0
+                        ELSE 0.5 END AS score
+            FROM contests c
+            WHERE c.status = 'completed'
+            UNION ALL
+            SELECT tm.agent1_id, tm.agent2_id, t.game, tm.created_at, tm.tournament_match_id, 1,
+                   CASE WHEN tm.metadata->>'decision' = 'tiebreak(draw)' THEN 0.5
+                        WHEN tm.winner_agent_id = tm.agent1_id THEN 1.0
+                        WHEN tm.winner_agent_id = tm.agent2_id THEN 0.0
+                        ELSE 0.5 END
+            FROM tournament_matches tm
+            JOIN tournaments t ON t.tournament_id = tm.tournament_id
+            WHERE tm.agent2_id IS NOT NULL
+        ) AS history
+        WHERE %(game)s::varchar IS NULL OR game = %(game)s
+        ORDER BY played_at, source, id
+        """,
+        {"game": game},
+    )
+    rows = cur.fetchall()
+
+    if game is None:
+        cur.execute("DELETE FROM agent_ratings")
+    else:
+        cur.execute("DELETE FROM agent_ratings WHERE game = %s", (game,))
+    if not rows:
+        return 0
+
+    agent1_ids, agent2_ids, scores = zip(*rows)
+    agent_ids, ratings, games_played = compute_ratings(agent1_ids, agent2_ids, [float(score) for score in scores])
+    execute_values(
+        cur,
+        """
+        INSERT INTO agent_ratings (agent_id, game, rating, games_played)
+        SELECT v.agent_id, a.game, v.rating, v.games_played
+        FROM (VALUES %s) AS v (agent_id, rating, games_played)
+        JOIN agents a ON a.agent_id = v.agent_id
+        """,
+        list(zip(agent_ids.tolist(), ratings.tolist(), games_played.tolist())),
+        page_size=1000,
+    )
+    return len(rows)
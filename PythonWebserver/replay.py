@@ -0,0 +1,67 @@
+class _ReplayFinished(Exception):
+    """Raised by a scripted agent when the recorded moves run out, to stop the game at that position."""
+
+
+class ScriptedAgent:
+    """Agent that answers with the next recorded move, noting the board the real agent was shown."""
+
+    def __init__(self, replay, index):
+        self.replay = replay
+        self.index = index
+
+    def move(self, *args):
+        return self.replay.next_move(self.index)
+
+
+class Replay:
+    """
+    Rebuild a finished game from its seed and move log (GameEngine.move_log) by playing it again.
+
+    The game engines take every chance decision from their seeded rng and only otherwise depend on the agents'
+    replies, so feeding the logged replies back through ScriptedAgents retraces the original game move by move.
+    observer receives the replayed game's events, e.g. games.engine.print_event to render it.
+    """
+
+    def __init__(self, GameClass, seed, moves, agent_count=2, observer=None):
+        self.moves = moves
+        self.limit = len(moves)
+        self.actions = []
+        self.game = GameClass([ScriptedAgent(self, index) for index in range(agent_count)], observer=observer, seed=seed)
+
+    def next_move(self, index):
+        move_number = len(self.actions)
+        if move_number >= self.limit:
+            raise _ReplayFinished()
+        board = getattr(self.game, "board", None)
+        self.actions.append({
+            "move_number": move_number,
+            "agent_index": index,
+            "action": self.moves[move_number],
+            "board": list(board) if board is not None else None,
+        })
+        return self.moves[move_number]
+
+    def run(self, limit=None):
+        """
+        Replay the first limit moves (all by default) and return the result of play(), or None if stopped early.
+        self.actions then lists each replayed move with the agent that made it and the board it was shown.
+        """
+        self.limit = len(self.moves) if limit is None else min(limit, len(self.moves))
+        try:
+            return self.game.play()
+        except _ReplayFinished:
+            return None
+
+
+def replay_actions(GameClass, seed, moves, observer=None):
+    """Every move of a recorded game as {"move_number", "agent_index", "action", "board"} dicts."""
+    replay = Replay(GameClass, seed, moves, observer=observer)
+    replay.run()
+    return replay.actions
+
+
+def position_after(GameClass, seed, moves, move_number):
+    """The game object as it stood after its first move_number moves, e.g. position_after(...).board."""
+    replay = Replay(GameClass, seed, moves)
+    replay.run(move_number)
+    return replay.game
@@ -0,0 +1,135 @@
+import os
+import tempfile
+
+os.environ.setdefault("AGENT_POOL_SIZE", "1") # One worker, so a reused worker is the one the previous agent ran in
+
+from agent_sandbox import ProcessAgent
+from games.engine import AgentError
+from games.tictactoe.game import Game as TicTacToe
+
+# Smoke tests for the sandboxed agent workers in agent_sandbox.py. Needs no database; the agents are written to a
+# temporary directory. Run from the PythonWebserver folder: python sandboxTesting.py
+
+NUMPY_AGENT = """
+import numpy as np
+
+class TTTAgent:
+    def move(self, board):
+        # np.argmax returns an np.int64, which the worker has to send back as a plain int.
+        return np.argmax(np.array(board) == " ")
+
+class ArrayAgent:
+    def move(self, board):
+        return np.array([1, 2])
+"""
+
+FAILING_AGENTS = """
+import os
+
+class FirstAvailableAgent:
+    def move(self, board):
+        return board.index(" ")
+
+class RaisingAgent:
+    def move(self, board):
+        raise ValueError("bug in the agent")
+
+class CrashingAgent:
+    def move(self, board):
+        os._exit(1) # Like a segfault in a C extension or an rlimit kill
+
+class ObjectAgent:
+    def move(self, board):
+        return object() # Cannot be sent back
+"""
+
+# Replaces the class loader inside its worker so that every agent loaded there afterwards plays its moves.
+HIJACKING_AGENT = """
+import agent_loader
+import agent_sandbox
+
+class HijackedAgent:
+    def move(self, board):
+        return -1
+
+agent_sandbox.load_class_from_file = agent_loader.load_class_from_file = lambda path, class_name: HijackedAgent
+
+class TTTAgent:
+    def move(self, board):
+        return board.index(" ")
+"""
+
+
+def write_agent(directory, name, source):
+    path = os.path.join(directory, name)
+    with open(path, "w") as f:
+        f.write(source)
+    return path
+
+
+def test_numpy_replies(directory):
+    path = write_agent(directory, "numpy_agent.py", NUMPY_AGENT)
+    with ProcessAgent(path, "TTTAgent", move_timeout=5.0, match_timeout=30.0) as agent:
+        move = agent.move([" "] * 9)
+        assert move == 0 and type(move) is int, f"numpy move should arrive as the int 0, got {move!r}"
+    with ProcessAgent(path, "ArrayAgent", move_timeout=5.0, match_timeout=30.0) as agent:
+        assert agent.move([" "] * 9) == [1, 2], "numpy arrays should arrive as lists"
+
+    agents = [ProcessAgent(path, "TTTAgent", 5.0, 30.0), ProcessAgent(path, "TTTAgent", 5.0, 30.0)]
+    try:
+        game = TicTacToe(agents, seed=1)
+        game.play()
+    finally:
+        for agent in agents:
+            agent.close()
+    assert None not in game.move_log, "numpy moves must not be scored as timeouts or errors"
+    print("numpy replies: ok")
+
+
+def test_failing_agents_forfeit(directory):
+    path = write_agent(directory, "failing_agents.py", FAILING_AGENTS)
+    with ProcessAgent(path, "RaisingAgent", 5.0, 30.0) as agent:
+        try:
+            agent.move([" "] * 9)
+        except AgentError:
+            pass
+        else:
+            raise AssertionError("an agent that raises should surface as AgentError")
+
+    for failing in ("RaisingAgent", "CrashingAgent", "ObjectAgent", "MissingClass"):
+        for seat in (0, 1):
+            agents = [ProcessAgent(path, "FirstAvailableAgent", 5.0, 30.0)]
+            agents.insert(seat, ProcessAgent(path, failing, 5.0, 30.0))
+            events = []
+            try:
+                result = TicTacToe(agents, observer=events.append, seed=seat).play()
+            finally:
+                for agent in agents:
+                    agent.close()
+            assert result == [1 - seat, seat], f"{failing} in seat {seat} should forfeit, got {result}"
+            assert any(event["event"] == "agent_error" for event in events), f"{failing} should emit agent_error"
+    print("failing agents forfeit: ok")
+
+
+def test_workers_not_shared_between_agents(directory):
+    hijacker = write_agent(directory, "hijacking_agent.py", HIJACKING_AGENT)
+    victim = write_agent(directory, "victim_agent.py", FAILING_AGENTS)
+    with ProcessAgent(hijacker, "TTTAgent", 5.0, 30.0) as agent:
+        agent.move([" "] * 9)
+    with ProcessAgent(victim, "FirstAvailableAgent", 5.0, 30.0) as agent:
+        assert agent.move([" "] * 9) == 0, "another agent's worker must not be reused for this agent"
+
+    with ProcessAgent(hijacker, "TTTAgent", 5.0, 30.0) as agent:
+        agent.move([" "] * 9)
+    write_agent(directory, "hijacking_agent.py", FAILING_AGENTS)
+    with ProcessAgent(hijacker, "FirstAvailableAgent", 5.0, 30.0) as agent:
+        assert agent.move([" "] * 9) == 0, "an edited agent file must get a fresh worker"
+    print("workers not shared between agents: ok")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        test_numpy_replies(directory)
+        test_failing_agents_forfeit(directory)
+        test_workers_not_shared_between_agents(directory)
+    print("All sandbox tests passed")
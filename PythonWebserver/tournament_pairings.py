@@ -0,0 +1,93 @@
+import math
+import random
+
+TOURNAMENT_FORMATS = ("knockout", "round_robin", "swiss")
+
+
+def round_robin_schedule(agent_ids):
+    """
+    Every round of a single round robin, using the circle method.
+
+    Returns a list of (pairings, bye) tuples where pairings is a list of (agent1_id, agent2_id) and bye is the
+    agent sitting the round out (None when there is an even number of agents). Every pair meets exactly once,
+    in len(agent_ids) - 1 rounds (len(agent_ids) when odd), and everyone gets agent1's seat about half the time.
+    """
+    players = list(agent_ids)
+    if len(players) % 2 == 1:
+        players.append(None)
+    count = len(players)
+    schedule = []
+    for round_index in range(count - 1):
+        pairings = []
+        bye = None
+        for index in range(count // 2):
+            home, away = players[index], players[count - 1 - index]
+            if home is None or away is None:
+                bye = away if home is None else home
+                continue
+            # The fixed player alternates seats every round; the rotating pairs alternate by board.
+            if (round_index if index == 0 else index) % 2 == 1:
+                home, away = away, home
+            pairings.append((home, away))
+        schedule.append((pairings, bye))
+        # Keep the first player fixed and rotate everyone else one seat.
+        players = [players[0], players[-1]] + players[1:-1]
+    return schedule
+
+
+def swiss_round_count(agent_count):
+    """Default number of Swiss rounds: enough to separate a single winner, as in a knockout."""
+    return max(1, math.ceil(math.log2(agent_count)))
+
+
+def swiss_pairings(points, opponents, byes):
+    """
+    Pair one Swiss round.
+
+    Args:
+        points (dict): agent_id -> points so far.
+        opponents (dict): agent_id -> set of agent_ids already played.
+        byes (set): agents that have already had a bye.
+
+    Return:
+        (pairings, bye): pairings is a list of (agent1_id, agent2_id); bye is the agent left unpaired, or None.
+        Agents are ranked by points (ties in random order) and each is paired with the highest-ranked agent it
+        has not met yet. If that is impossible the remaining agents are paired in rank order, allowing rematches.
+    """
+    ranked = list(points)
+    random.shuffle(ranked)
+    ranked.sort(key=lambda agent_id: points[agent_id], reverse=True)
+
+    bye = None
+    if len(ranked) % 2 == 1:
+        # The lowest-ranked agent that has not had a bye sits out (and is scored as a win).
+        candidates = [agent_id for agent_id in reversed(ranked) if agent_id not in byes] or [ranked[-1]]
+        bye = candidates[0]
+        ranked.remove(bye)
+
+    pairings = _pair_without_rematches(ranked, opponents)
+    if pairings is None:
+        pairings = [(ranked[index], ranked[index + 1]) for index in range(0, len(ranked), 2)]
+    return pairings, bye
+
+
+def _pair_without_rematches(ranked, opponents, budget=10000):
+    """Depth-first search for a rematch-free pairing that stays as close to rank order as possible."""
+    steps = [0]
+
+    def search(remaining):
+        if not remaining:
+            return []
+        steps[0] += 1
+        if steps[0] > budget:
+            return None
+        first, rest = remaining[0], remaining[1:]
+        for index, candidate in enumerate(rest):
+            if candidate in opponents.get(first, ()):
+                continue
+            tail = search(rest[:index] + rest[index + 1:])
+            if tail is not None:
+                return [(first, candidate)] + tail
+        return None
+
+    return search(ranked)
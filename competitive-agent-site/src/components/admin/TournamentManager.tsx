@@ -2,6 +2,7 @@
 
 import { FormEvent, useEffect, useMemo, useState } from "react";
 import Table, { Column } from "../ui/Table";
+import { waitForJob } from "@/lib/jobs";
 
 type LeaderboardEntry = {
   agent_id: number;
@@ -15,6 +16,7 @@ type TournamentSummary = {
   id: number;
   name: string;
   game: string;
+  format: string;
   rounds: number | null;
   status: string;
   created_at: string | null;
@@ -48,6 +50,7 @@ type TournamentDetail = {
     id: number;
     name: string;
     game: string;
+    format: string;
     rounds: number | null;
     status: string;
     created_at: string | null;
@@ -62,32 +65,48 @@ const GAME_OPTIONS = [
   { value: "rps", label: "Rock Paper Scissors" }
 ];
 
+const FORMAT_OPTIONS = [
+  { value: "knockout", label: "Knockout" },
+  { value: "round_robin", label: "Round Robin" },
+  { value: "swiss", label: "Swiss" }
+];
+
+function formatLabel(value: string) {
+  return FORMAT_OPTIONS.find((option) => option.value === value)?.label ?? value;
+}
+
 export default function TournamentManager() {
   const [summaries, setSummaries] = useState<TournamentSummary[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [selectedId, setSelectedId] = useState<number | null>(null);
   const [detail, setDetail] = useState<TournamentDetail | null>(null);
   const [loadingList, setLoadingList] = useState(false);
   const [loadingDetail, setLoadingDetail] = useState(false);
   const [creating, setCreating] = useState(false);
   const [error, setError] = useState<string>("");
+  const [progress, setProgress] = useState<string>("");
   const [formState, setFormState] = useState({
     game: GAME_OPTIONS[0].value,
+    format: FORMAT_OPTIONS[0].value,
   });
 
   useEffect(() => {
     refreshSummaries();
   }, []);
 
-  async function refreshSummaries() {
+  async function refreshSummaries(cursor: string | null = null) {
     setLoadingList(true);
     setError("");
     try {
-      const res = await fetch("http://localhost:5001/api/admin/tournaments", {
+      const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+      const res = await fetch(`http://localhost:5001/api/admin/tournaments${query}`, {
         credentials: "include",
       });
       const data = await res.json();
       if (!res.ok) throw new Error(data.error || "Failed to load tournaments");
-      setSummaries(data.tournaments || []);
+      // A cursor means "next page": append to what is already shown.
+      setSummaries((current) => (cursor ? [...current, ...(data.tournaments || [])] : data.tournaments || []));
+      setNextCursor(data.next_cursor ?? null);
     } catch (err) {
       setError(err instanceof Error ? err.message : "Failed to load tournaments");
     } finally {
@@ -127,11 +146,19 @@ export default function TournamentManager() {
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({
           game: formState.game,
+          format: formState.format,
         }),
       });
       const data = await res.json();
       if (!res.ok) throw new Error(data.error || "Failed to start tournament");
       await refreshSummaries();
+      if (data.job_id) {
+        // Matches are played by a background job; report progress until it finishes.
+        await waitForJob(data.job_id, (job) =>
+          setProgress(job.progress.total ? `${job.progress.done} / ${job.progress.total} matches played` : "Queued")
+        );
+        await refreshSummaries();
+      }
       if (data.tournament_id) {
         await loadDetail(data.tournament_id);
       }
@@ -139,6 +166,7 @@ export default function TournamentManager() {
       setError(err instanceof Error ? err.message : "Failed to start tournament");
     } finally {
       setCreating(false);
+      setProgress("");
     }
   }
 
@@ -146,6 +174,7 @@ export default function TournamentManager() {
     () => [
       { key: "name", header: "Name" },
       { key: "game", header: "Game" },
+      { key: "format", header: "Format", render: (row) => formatLabel(row.format) },
       { key: "status", header: "Status" },
       {
         key: "created_at",
@@ -237,7 +266,7 @@ export default function TournamentManager() {
 
   return (
     <div>
-      <h3>Knockout Tournament</h3>
+      <h3>Tournaments</h3>
       <form onSubmit={handleSubmit} style={{ display: "flex", gap: 12, flexWrap: "wrap", marginBottom: 16 }}>
         <label style={{ display: "flex", flexDirection: "column", fontSize: 12, color: "#6b7280" }}>
           Game Type
@@ -253,9 +282,26 @@ export default function TournamentManager() {
             ))}
           </select>
         </label>
+        <label style={{ display: "flex", flexDirection: "column", fontSize: 12, color: "#6b7280" }}>
+          Format
+          <select
+            value={formState.format}
+            onChange={(e) => setFormState((prev) => ({ ...prev, format: e.target.value }))}
+            style={{ padding: 8, minWidth: 180 }}
+          >
+            {FORMAT_OPTIONS.map((option) => (
+              <option key={option.value} value={option.value}>
+                {option.label}
+              </option>
+            ))}
+          </select>
+        </label>
         <button type="submit" disabled={creating} style={{ padding: "8px 16px" }}>
-          {creating ? "Starting..." : "Start"}
+          {creating ? "Running..." : "Start"}
         </button>
+        {creating && progress && (
+          <span style={{ alignSelf: "center", color: "#6b7280" }}>{progress}</span>
+        )}
       </form>
 
       {error && <div style={{ color: "#dc2626", marginBottom: 12 }}>{error}</div>}
@@ -266,11 +312,21 @@ export default function TournamentManager() {
         isLoading={loadingList}
         emptyText="No tournaments yet"
       />
+      {nextCursor && (
+        <button
+          type="button"
+          onClick={() => refreshSummaries(nextCursor)}
+          disabled={loadingList}
+          style={{ marginTop: 12, padding: "8px 16px" }}
+        >
+          {loadingList ? "Loading..." : "Load more"}
+        </button>
+      )}
 
       {selectedId && detail && (
         <div style={{ marginTop: 24 }}>
           <h4>
-            {detail.tournament.name} – {detail.tournament.game}
+            {detail.tournament.name} – {detail.tournament.game} ({formatLabel(detail.tournament.format)})
           </h4>
           <p style={{ color: "#6b7280", marginBottom: 12 }}>
             Status: {detail.tournament.status} · Created at: {detail.tournament.created_at ? new Date(detail.tournament.created_at).toLocaleString() : "Unknown"}
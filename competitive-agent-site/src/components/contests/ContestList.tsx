@@ -3,6 +3,7 @@
 import { useState, useEffect } from "react";
 import Table from "../ui/Table";
 import Button from "../ui/Button";
+import { waitForJob } from "@/lib/jobs";
 
 interface Contest {
   contest_id: number;
@@ -22,7 +23,9 @@ interface ContestListProps {
 
 export default function ContestList({ onViewDetails }: ContestListProps) {
   const [contests, setContests] = useState<Contest[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [statusFilter, setStatusFilter] = useState("all");
   const [runningContest, setRunningContest] = useState<number | null>(null);
 
@@ -39,11 +42,13 @@ export default function ContestList({ onViewDetails }: ContestListProps) {
       window.removeEventListener("contestCreated", handleContestCreated);
   }, [statusFilter]);
 
-  const fetchContests = async () => {
+  const fetchContests = async (cursor: string | null = null) => {
+    if (cursor) setLoadingMore(true);
     try {
       console.log("Fetching contests with status:", statusFilter);
+      const query = cursor ? `&cursor=${encodeURIComponent(cursor)}` : "";
       const response = await fetch(
-        `http://localhost:5001/api/contests?status=${statusFilter}`,
+        `http://localhost:5001/api/contests?status=${statusFilter}${query}`,
         {
           credentials: "include",
         }
@@ -54,7 +59,9 @@ export default function ContestList({ onViewDetails }: ContestListProps) {
       if (response.ok) {
         const data = await response.json();
         console.log("Contests data:", data);
-        setContests(data.contests || []);
+        // A cursor means "next page": append to what is already shown.
+        setContests((current) => (cursor ? [...current, ...(data.contests || [])] : data.contests || []));
+        setNextCursor(data.next_cursor ?? null);
       } else {
         const errorData = await response.json();
         console.error("Error response:", errorData);
@@ -64,6 +71,7 @@ export default function ContestList({ onViewDetails }: ContestListProps) {
       console.error("Error details:", err instanceof Error ? err.message : String(err));
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
@@ -79,16 +87,21 @@ export default function ContestList({ onViewDetails }: ContestListProps) {
         }
       );
 
+      const data = await response.json();
       if (response.ok) {
-        // Refresh the list to show updated status
+        // The contest is played by a background job; wait for it before refreshing.
+        await waitForJob(data.job_id);
         await fetchContests();
         alert("Contest completed successfully!");
       } else {
-        const data = await response.json();
         alert(`Failed to run contest: ${data.error}`);
       }
     } catch (err) {
-      alert("An error occurred while running the contest");
+      alert(
+        err instanceof Error
+          ? `Failed to run contest: ${err.message}`
+          : "An error occurred while running the contest"
+      );
     } finally {
       setRunningContest(null);
     }
@@ -168,6 +181,16 @@ export default function ContestList({ onViewDetails }: ContestListProps) {
       ) : (
         <Table data={contests} columns={columns} />
       )}
+
+      {nextCursor && (
+        <Button
+          onClick={() => fetchContests(nextCursor)}
+          disabled={loadingMore}
+          className="mt-4 text-sm"
+        >
+          {loadingMore ? "Loading..." : "Load more"}
+        </Button>
+      )}
     </div>
   );
 }
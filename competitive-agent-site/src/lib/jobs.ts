@@ -0,0 +1,28 @@
+export type JobStatus = {
+  id: number;
+  kind: string;
+  status: "queued" | "running" | "completed" | "failed";
+  progress: { done: number; total: number | null };
+  result: any;
+  error: string | null;
+};
+
+const API_BASE = "http://localhost:5001";
+
+// Poll a background job until it finishes. Resolves with the completed job, rejects if it failed.
+export async function waitForJob(
+  jobId: number,
+  onProgress?: (job: JobStatus) => void,
+  intervalMs = 1000
+): Promise<JobStatus> {
+  for (;;) {
+    const res = await fetch(`${API_BASE}/api/jobs/${jobId}`, { credentials: "include" });
+    const data = await res.json();
+    if (!res.ok) throw new Error(data.error || "Failed to load job status");
+    const job: JobStatus = data.job;
+    onProgress?.(job);
+    if (job.status === "completed") return job;
+    if (job.status === "failed") throw new Error(job.error || "Job failed");
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+}